@@ -37,7 +37,9 @@ import bpy
 from bpy.props import FloatProperty, IntProperty, BoolProperty
 from mathutils import Vector, Matrix
 from collections import deque
-from math import pow, cos, pi, atan2
+from array import array
+from bisect import bisect_left, bisect_right
+from math import pow, cos, pi, atan2, acos, log
 from random import random as rand_val, seed as rand_seed
 import time
 
@@ -77,16 +79,19 @@ def createIvyGeometry(IVY, growLeaves):
     # Loop over all roots to generate its nodes
     for root in IVY.ivyRoots:
         # Only grow if more than one node
-        numNodes = len(root.ivyNodes)
+        numNodes = len(root)
         if numNodes > 1:
             # Calculate the local radius
             local_ivyBranchRadius = 1.0 / (root.parents + 1) + 1.0
-            prevIvyLength = 1.0 / root.ivyNodes[-1].length
-            splineVerts = [ax for n in root.ivyNodes for ax in n.pos.to_4d()]
+            prevIvyLength = 1.0 / root.length[-1]
+            nodePos = root.pos
+            splineVerts = [ax for i in range(0, numNodes * 3, 3)
+                              for ax in (nodePos[i], nodePos[i + 1],
+                                         nodePos[i + 2], 1.0)]
 
             radiusConstant = local_ivyBranchRadius * IVY.ivyBranchSize
-            splineRadii = [radiusConstant * (1.3 - n.length * prevIvyLength)
-                                                        for n in root.ivyNodes]
+            splineRadii = [radiusConstant * (1.3 - length * prevIvyLength)
+                                                    for length in root.length]
 
             # Add the poly curve and set coords and radii
             newSpline = curve.splines.new(type='POLY')
@@ -94,37 +99,41 @@ def createIvyGeometry(IVY, growLeaves):
             newSpline.points.foreach_set('co', splineVerts)
             newSpline.points.foreach_set('radius', splineRadii)
 
+            adhesion = root.adhesionVector
+
             # Loop over all nodes in the root
-            for i, n in enumerate(root.ivyNodes):
+            for i in range(numNodes):
+                smoothAdhesionVector = Vector((0.0, 0.0, 0.0))
                 for k in range(len(gaussWeight)):
-                    idx = max(0, min(i + k - 5, numNodes - 1))
-                    n.smoothAdhesionVector += (gaussWeight[k] *
-                                             root.ivyNodes[idx].adhesionVector)
-                n.smoothAdhesionVector /= 56.0
-                n.adhesionLength = n.smoothAdhesionVector.length
-                n.smoothAdhesionVector.normalize()
+                    idx = max(0, min(i + k - 5, numNodes - 1)) * 3
+                    smoothAdhesionVector += (gaussWeight[k] *
+                                         Vector(adhesion[idx:idx + 3]))
+                smoothAdhesionVector /= 56.0
+                adhesionLength = smoothAdhesionVector.length
+                smoothAdhesionVector.normalize()
 
                 if growLeaves and (i < numNodes - 1):
-                    node = root.ivyNodes[i]
-                    nodeNext = root.ivyNodes[i + 1]
+                    nodeLength = root.length[i]
+                    nodePos = root.node_pos(i)
+                    nodeNextPos = root.node_pos(i + 1)
 
                     # Find the weight and normalize the smooth adhesion vector
-                    weight = pow(node.length * prevIvyLength, 0.7)
+                    weight = pow(nodeLength * prevIvyLength, 0.7)
 
                     # Calculate the ground ivy and the new weight
-                    groundIvy = max(0.0, -node.smoothAdhesionVector.z)
-                    weight += groundIvy * pow(1 - node.length *
+                    groundIvy = max(0.0, -smoothAdhesionVector.z)
+                    weight += groundIvy * pow(1 - nodeLength *
                                                               prevIvyLength, 2)
 
                     # Find the alignment weight
-                    alignmentWeight = node.adhesionLength
+                    alignmentWeight = adhesionLength
 
                     # Calculate the needed angles
-                    phi = atan2(node.smoothAdhesionVector.y,
-                                node.smoothAdhesionVector.x) - pi / 2.0
+                    phi = atan2(smoothAdhesionVector.y,
+                                smoothAdhesionVector.x) - pi / 2.0
 
                     theta = (0.5 *
-                        node.smoothAdhesionVector.angle(Vector((0, 0, -1)), 0))
+                        smoothAdhesionVector.angle(Vector((0, 0, -1)), 0))
 
                     # Find the size weight
                     sizeWeight = 1.5 - (cos(2 * pi * weight) * 0.5 + 0.5)
@@ -150,7 +159,7 @@ def createIvyGeometry(IVY, growLeaves):
                                                    ))
 
                             # Find the leaf center
-                            center = (node.pos.lerp(nodeNext.pos, j / 10.0) +
+                            center = (nodePos.lerp(nodeNextPos, j / 10.0) +
                                                IVY.ivyLeafSize * randomVector)
 
                             # For each of the verts, rotate/scale and append
@@ -216,30 +225,91 @@ def computeBoundingSphere(ob):
 '''
 
 
-class IvyNode:
-    """ The basic class used for each point on the ivy which is grown."""
-    __slots__ = ('pos', 'primaryDir', 'adhesionVector', 'adhesionLength',
-                 'smoothAdhesionVector', 'length', 'floatingLength', 'climb')
-
-    def __init__(self):
-        self.pos = Vector((0, 0, 0))
-        self.primaryDir = Vector((0, 0, 1))
-        self.adhesionVector = Vector((0, 0, 0))
-        self.smoothAdhesionVector = Vector((0, 0, 0))
-        self.length = 0.0001
-        self.floatingLength = 0.0
-        self.climb = True
-
-
 class IvyRoot:
-    """ The class used to hold all ivy nodes growing from this root point."""
-    __slots__ = ('ivyNodes', 'alive', 'parents')
+    """ The class used to hold all ivy nodes growing from this root point.
+
+    Node data is stored in flat arrays, vectors as (x, y, z) triplets.
+    """
+    __slots__ = ('pos', 'primaryDir', 'adhesionVector', 'length',
+                 'floatingLength', 'climb', 'alive', 'parents')
 
     def __init__(self):
-        self.ivyNodes = deque()
+        self.pos = array('d')
+        self.primaryDir = array('d')
+        self.adhesionVector = array('d')
+        self.length = array('d')
+        self.floatingLength = array('d')
+        self.climb = array('b')
         self.alive = True
         self.parents = 0
 
+    def __len__(self):
+        return len(self.length)
+
+    def add_node(self, pos,
+                 primaryDir=(0.0, 0.0, 1.0),
+                 adhesionVector=(0.0, 0.0, 0.0),
+                 length=0.0001,
+                 floatingLength=0.0,
+                 climb=True):
+        self.pos.extend(pos)
+        self.primaryDir.extend(primaryDir)
+        self.adhesionVector.extend(adhesionVector)
+        self.length.append(length)
+        self.floatingLength.append(floatingLength)
+        self.climb.append(climb)
+
+    def node_pos(self, i):
+        i *= 3
+        return Vector(self.pos[i:i + 3])
+
+
+class IvySurface:
+    """ Nearest point and ray queries on the object the ivy grows on."""
+    __slots__ = ('ob', 'matrix', 'matrix_inv', 'bvh')
+
+    def __init__(self, ob, scene):
+        self.ob = ob
+        # The object doesn't move while growing, only invert once
+        self.matrix = ob.matrix_world.copy()
+        self.matrix_inv = self.matrix.inverted()
+        try:
+            from mathutils.bvhtree import BVHTree
+        except ImportError:
+            # Fall back to querying the object
+            self.bvh = None
+        else:
+            self.bvh = BVHTree.FromObject(ob, scene)
+
+    def nearest(self, co, max_l):
+        """Return the nearest (location, normal) in object space or None"""
+        if self.bvh is not None:
+            loc, no, index, dist = self.bvh.find_nearest(co, max_l)
+            if index is None:
+                return None
+        else:
+            loc, no, index = self.ob.closest_point_on_mesh(co, max_l)
+            if index == -1:
+                return None
+        return loc, no
+
+    def ray_cast(self, start, end):
+        """Return the first (location, normal) hit in object space or None"""
+        if self.bvh is not None:
+            direction = end - start
+            distance = direction.length
+            if distance == 0.0:
+                return None
+            loc, no, index, dist = self.bvh.ray_cast(start, direction,
+                                                     distance)
+            if index is None:
+                return None
+        else:
+            loc, no, index = self.ob.ray_cast(start, end)
+            if index == -1:
+                return None
+        return loc, no
+
 
 class Ivy:
     """ The class holding all parameters and ivy roots."""
@@ -284,13 +354,10 @@ class Ivy:
     def seed(self, seedPos):
         # Seed the Ivy by making a new root and first node
         tmpRoot = IvyRoot()
-        tmpIvy = IvyNode()
-        tmpIvy.pos = seedPos
-
-        tmpRoot.ivyNodes.append(tmpIvy)
+        tmpRoot.add_node(seedPos)
         self.ivyRoots.append(tmpRoot)
 
-    def grow(self, ob):
+    def grow(self, surface):
         # Determine the local sizes
         #local_ivySize = self.ivySize  # * radius
         #local_maxFloatLength = self.maxFloatLength  # * radius
@@ -302,14 +369,17 @@ class Ivy:
                 continue
 
             # Get the last node in the current root
-            prevIvy = root.ivyNodes[-1]
+            prevPos = Vector(root.pos[-3:])
+            prevPrimaryDir = Vector(root.primaryDir[-3:])
+            prevLength = root.length[-1]
+            prevFloatingLength = root.floatingLength[-1]
 
             # If the node is floating for too long, kill the root
-            if prevIvy.floatingLength > self.maxFloatLength:
+            if prevFloatingLength > self.maxFloatLength:
                 root.alive = False
 
             # Set the primary direction from the last node
-            primaryVector = prevIvy.primaryDir
+            primaryVector = prevPrimaryDir
 
             # Make the random vector and normalize
             randomVector = Vector((rand_val() - 0.5, rand_val() - 0.5,
@@ -317,7 +387,7 @@ class Ivy:
             randomVector.normalize()
 
             # Calculate the adhesion vector
-            adhesionVector = adhesion(prevIvy.pos, ob,
+            adhesionVector = adhesion(prevPos, surface,
                                                       self.maxAdhesionDistance)
 
             # Calculate the growing vector
@@ -328,83 +398,112 @@ class Ivy:
             # Find the gravity vector
             gravityVector = (self.ivySize * self.gravityWeight *
                                                             Vector((0, 0, -1)))
-            gravityVector *= pow(prevIvy.floatingLength / self.maxFloatLength,
+            gravityVector *= pow(prevFloatingLength / self.maxFloatLength,
                                  0.7)
 
             # Determine the new position vector
-            newPos = prevIvy.pos + growVector + gravityVector
+            newPos = prevPos + growVector + gravityVector
 
             # Check for collisions with the object
-            climbing = collision(ob, prevIvy.pos, newPos)
+            climbing = collision(surface, prevPos, newPos)
 
             # Update the growing vector for any collisions
-            growVector = newPos - prevIvy.pos - gravityVector
+            growVector = newPos - prevPos - gravityVector
             growVector.normalize()
 
-            # Create a new IvyNode and set its properties
-            tmpNode = IvyNode()
-            tmpNode.climb = climbing
-            tmpNode.pos = newPos
-            tmpNode.primaryDir = prevIvy.primaryDir.lerp(growVector, 0.5)
-            tmpNode.primaryDir.normalize()
-            tmpNode.adhesionVector = adhesionVector
-            tmpNode.length = prevIvy.length + (newPos - prevIvy.pos).length
+            # Set the new node's properties
+            primaryDir = prevPrimaryDir.lerp(growVector, 0.5)
+            primaryDir.normalize()
+            length = prevLength + (newPos - prevPos).length
 
-            if tmpNode.length > self.maxLength:
-                self.maxLength = tmpNode.length
+            if length > self.maxLength:
+                self.maxLength = length
 
             # If the node isn't climbing, update it's floating length
             # Otherwise set it to 0
             if not climbing:
-                tmpNode.floatingLength = prevIvy.floatingLength + (newPos -
-                                                            prevIvy.pos).length
+                floatingLength = prevFloatingLength + (newPos -
+                                                            prevPos).length
             else:
-                tmpNode.floatingLength = 0.0
-
-            root.ivyNodes.append(tmpNode)
+                floatingLength = 0.0
+
+            root.add_node(newPos, primaryDir, adhesionVector,
+                          length, floatingLength, climbing)
+
+        self.branch()
+
+    def branch(self):
+        # Loop through all roots to check if a new root is generated.
+        #
+        # Each node branches when 'probability * weight' exceeds the
+        # branching probability, with 'weight' depending on the ratio of the
+        # node length to the root length. Only nodes in a window of this
+        # ratio can branch, lengths are sorted so this is found by bisecting.
+        # Within the window candidates are sampled by skipping ahead with the
+        # maximum per-node probability, then accepted with the node's
+        # probability relative to it. This picks the same node as testing
+        # each node in turn (in distribution), without visiting every node.
+        branchingProbability = self.branchingProbability
+        probabilityMax = 1.0 - branchingProbability
+        if probabilityMax <= 0.0:
+            return
+
+        cosLimit = 1.0 - 2.0 * branchingProbability
+        if cosLimit <= -1.0:
+            return
+        elif cosLimit >= 1.0:
+            ratioMin, ratioMax = 0.0, 1.0
+        else:
+            ratioMin = acos(cosLimit) / (2.0 * pi)
+            ratioMax = 1.0 - ratioMin
+
+        if probabilityMax < 1.0:
+            skipScale = 1.0 / log(1.0 - probabilityMax)
+        else:
+            skipScale = 0.0
 
-        # Loop through all roots to check if a new root is generated
         for root in self.ivyRoots:
             # Check the root is alive and isn't at high level of recursion
             if (root.parents > 3) or (not root.alive):
                 continue
 
             # Check to make sure there's more than 1 node
-            if len(root.ivyNodes) > 1:
-                # Loop through all nodes in root to check if new root is grown
-                for node in root.ivyNodes:
-                    # Set the last node of the root and find the weighting
-                    prevIvy = root.ivyNodes[-1]
-                    weight = 1.0 - (cos(2.0 * pi * node.length /
-                                        prevIvy.length) * 0.5 + 0.5)
-
-                    probability = rand_val()
+            numNodes = len(root)
+            if numNodes > 1:
+                lengths = root.length
+                prevLength = lengths[-1]
+                i = bisect_right(lengths, ratioMin * prevLength)
+                end = bisect_left(lengths, ratioMax * prevLength, i, numNodes)
+
+                i += int(log(1.0 - rand_val()) * skipScale)
+                while i < end:
+                    weight = 1.0 - (cos(2.0 * pi * lengths[i] /
+                                        prevLength) * 0.5 + 0.5)
+                    probability = 1.0 - branchingProbability / weight
 
                     # Check if a new root is grown and if so, set its values
-                    if (probability * weight > self.branchingProbability):
-                        tmpNode = IvyNode()
-                        tmpNode.pos = node.pos
-                        tmpNode.floatingLength = node.floatingLength
-
+                    if rand_val() * probabilityMax < probability:
                         tmpRoot = IvyRoot()
                         tmpRoot.parents = root.parents + 1
+                        tmpRoot.add_node(root.pos[i * 3:i * 3 + 3],
+                                floatingLength=root.floatingLength[i])
 
-                        tmpRoot.ivyNodes.append(tmpNode)
                         self.ivyRoots.append(tmpRoot)
                         return
 
+                    i += 1 + int(log(1.0 - rand_val()) * skipScale)
+
 
-def adhesion(loc, ob, max_l):
+def adhesion(loc, surface, max_l):
     # Get transfor vector and transformed loc
-    tran_mat = ob.matrix_world.inverted()
-    tran_loc = tran_mat * loc
+    tran_loc = surface.matrix_inv * loc
 
     # Compute the adhesion vector by finding the nearest point
-    nearest_result = ob.closest_point_on_mesh(tran_loc, max_l)
+    nearest_result = surface.nearest(tran_loc, max_l)
     adhesion_vector = Vector((0.0, 0.0, 0.0))
-    if nearest_result[2] != -1:
+    if nearest_result is not None:
         # Compute the distance to the nearest point
-        adhesion_vector = ob.matrix_world * nearest_result[0] - loc
+        adhesion_vector = surface.matrix * nearest_result[0] - loc
         distance = adhesion_vector.length
         # If it's less than the maximum allowed and not 0, continue
         if distance:
@@ -415,18 +514,18 @@ def adhesion(loc, ob, max_l):
     return adhesion_vector
 
 
-def collision(ob, pos, new_pos):
+def collision(surface, pos, new_pos):
     # Check for collision with the object
     climbing = False
 
     # Transform vecs
-    tran_mat = ob.matrix_world.inverted()
+    tran_mat = surface.matrix_inv
     tran_pos = tran_mat * pos
     tran_new_pos = tran_mat * new_pos
 
-    ray_result = ob.ray_cast(tran_pos, tran_new_pos)
+    ray_result = surface.ray_cast(tran_pos, tran_new_pos)
     # If there's a collision we need to check it
-    if ray_result[2] != -1:
+    if ray_result is not None:
         # Check whether the collision is going into the object
         if (tran_new_pos - tran_pos).dot(ray_result[1]) < 0.0:
             # Find projection of the piont onto the plane
@@ -435,7 +534,7 @@ def collision(ob, pos, new_pos):
             # Reflect in the plane
             tran_new_pos += 2 * (p0 - tran_new_pos)
             new_pos *= 0
-            new_pos += ob.matrix_world * tran_new_pos
+            new_pos += surface.matrix * tran_new_pos
             climbing = True
     return climbing
 
@@ -563,6 +662,9 @@ class IvyGen(bpy.types.Operator):
         # Generate first root and node
         IVY.seed(seedPoint)
 
+        # Prepare the object for nearest point and ray queries
+        surface = IvySurface(ob, context.scene)
+
         checkTime = False
         maxLength = self.maxIvyLength  # * radius
 
@@ -579,7 +681,7 @@ class IvyGen(bpy.types.Operator):
                (IVY.maxLength < maxLength) and
                (not checkTime or (time.time() - t < self.maxTime))):
             # Grow the ivy for this iteration
-            IVY.grow(ob)
+            IVY.grow(surface)
 
             # Print the proportion of ivy growth to console
             if (IVY.maxLength / maxLength * 100) > 10 * startPercent // 10:
@@ -73,6 +73,12 @@ from bpy.props import *
 from mathutils import *
 from mathutils.noise import *
 from math import *
+import os
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 # Create a new mesh (object) from verts/edges/faces.
@@ -92,6 +98,28 @@ def create_mesh_object(context, verts, edges, faces, name):
     from bpy_extras import object_utils
     return object_utils.object_data_add(context, mesh, operator=None)
 
+# Create a new mesh (object) from numpy arrays of verts (N x 3)
+# and quad faces (N x 4), without going through python lists.
+def create_mesh_object_arrays(context, verts, faces, name):
+    # Create new mesh
+    mesh = bpy.data.meshes.new(name)
+
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", verts.astype(numpy.float32).ravel())
+
+    mesh.loops.add(faces.size)
+    mesh.loops.foreach_set("vertex_index", faces.astype(numpy.int32).ravel())
+
+    mesh.polygons.add(len(faces))
+    mesh.polygons.foreach_set("loop_start", numpy.arange(0, faces.size, 4, dtype=numpy.int32))
+    mesh.polygons.foreach_set("loop_total", numpy.full(len(faces), 4, dtype=numpy.int32))
+
+    # Update mesh geometry after adding stuff.
+    mesh.update(calc_edges=True)
+
+    from bpy_extras import object_utils
+    return object_utils.object_data_add(context, mesh, operator=None)
+
 # A very simple "bridge" tool.
 # Connects two equally long vertex rows with faces.
 # Returns a list of the new faces (list of  lists)
@@ -426,6 +454,252 @@ def sphere_gen( sub_d, size_me, options ):
     return verts, faces
 
 
+###------------------------------------------------------------
+# Batched generation, evaluates whole grids as numpy arrays.
+# The noise functions from mathutils.noise only work on single coordinates,
+# everything else (options, origin, falloff, strata, clamp, topology) is done once per grid.
+
+# grids with fewer vertices than this evaluate noise in this process,
+# below it starting worker processes costs more than it saves.
+NOISE_FORK_MIN = 16384
+
+# state shared with forked worker processes (see 'noise_map').
+_fork_shared = None
+
+def _noise_tile(row_range):
+    noise, coords, row_len = _fork_shared
+    return [noise(co) for co in coords[row_range.start * row_len:row_range.stop * row_len]]
+
+# evaluate noise(co) for a list of coords made of 'rows' rows of equal length.
+# Tiles of rows are spread over forked worker processes, which inherit
+# mathutils.noise and 'noise' (so it doesn't need to be picklable).
+# Runs serially where 'fork' isn't available, the result is the same.
+def noise_map(noise, coords, rows=1):
+    global _fork_shared
+
+    processes = os.cpu_count() or 1
+    if processes > 1 and rows > 1 and len(coords) >= NOISE_FORK_MIN:
+        import multiprocessing
+        if "fork" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("fork")
+            row_len = len(coords) // rows
+            chunk = max(1, (rows + (processes * 4) - 1) // (processes * 4))
+            tiles = [range(i, min(i + chunk, rows)) for i in range(0, rows, chunk)]
+
+            _fork_shared = noise, coords, row_len
+            try:
+                with ctx.Pool(processes) as pool:
+                    results = pool.map(_noise_tile, tiles)
+            except OSError:
+                # can't start workers, evaluate here instead.
+                results = None
+            finally:
+                _fork_shared = None
+
+            if results is not None:
+                return [value for result in results for value in result]
+
+    return [noise(co) for co in coords]
+
+# marble_noise, for arrays of coordinates
+def marble_noise_batch(x,y,z, origin, size, shape, bias, sharpnes, turb, depth, hard, basis, rows=1 ):
+    x = x / size
+    y = y / size
+    z = z / size
+
+    if shape == 1:
+        # ring
+        x2 = x*2
+        y2 = y*2
+        s = (-numpy.cos(x2**2+y2**2)/(x2**2+y2**2+0.5))
+    elif shape == 2:
+        # swirl
+        x2 = x*2
+        y2 = y*2
+        s = (( x2*numpy.sin( x2*x2+y2*y2 ) + y2*numpy.cos( x2*x2+y2*y2 ) ) / (x2**2+y2**2+0.5))
+    elif shape == 3:
+        # bumps
+        s = ((numpy.cos( x*2*pi ) + numpy.cos( y*2*pi ))-0.5)
+    elif shape == 4:
+        # y grad.
+        s = (y*pi)
+    elif shape == 5:
+        # x grad.
+        s = (x*pi)
+    else:
+        # marble
+        s = ((x+y)*5)
+
+    coords = numpy.column_stack((x + origin[0], y + origin[1], z + origin[2])).tolist()
+    value = s + turb * numpy.array(noise_map(lambda co: turbulence_vector(co, depth, hard, basis )[0], coords, rows))
+
+    if bias == 1:
+        b = 2 * pi
+        value = 1 - 2 * numpy.abs(numpy.floor((value * (1/b))+0.5) - (value*(1/b)))
+    elif bias == 2:
+        b = 2 * pi
+        value = numpy.mod(value, b) / b
+    else:
+        value = 0.5 + 0.5 * numpy.sin(value)
+
+    if sharpnes == 1:
+        value = value**0.5
+    elif sharpnes == 2:
+        value = value**0.25
+
+    return value
+
+# landscape_gen, for arrays of coordinates made of 'rows' rows of equal length
+def landscape_gen_batch(x,y,z,falloffsize,options,rows=1):
+
+    # options
+    rseed    = options[0]
+    nsize    = options[1]
+    ntype      = int( options[2][0] )
+    nbasis     = int( options[3][0] )
+    vlbasis    = int( options[4][0] )
+    distortion = options[5]
+    hardnoise  = options[6]
+    depth      = options[7]
+    dimension  = options[8]
+    lacunarity = options[9]
+    offset     = options[10]
+    gain       = options[11]
+    marblebias     = int( options[12][0] )
+    marblesharpnes = int( options[13][0] )
+    marbleshape    = int( options[14][0] )
+    invert       = options[15]
+    height       = options[16]
+    heightoffset = options[17]
+    falloff      = int( options[18][0] )
+    sealevel     = options[19]
+    platlevel    = options[20]
+    strata       = options[21]
+    stratatype   = options[22]
+    sphere       = options[23]
+
+    # origin
+    if rseed == 0:
+        origin = 0.0,0.0,0.0
+        origin_x = 0.0
+        origin_y = 0.0
+        origin_z = 0.0
+    else:
+        # randomise origin
+        seed_set( rseed )
+        origin = random_unit_vector()
+        origin_x = ( 0.5 - origin[0] ) * 1000.0
+        origin_y = ( 0.5 - origin[1] ) * 1000.0
+        origin_z = ( 0.5 - origin[2] ) * 1000.0
+
+    # adjust noise size and origin
+    if ntype != 7:
+        ncoords = numpy.column_stack(( x / nsize + origin_x, y / nsize + origin_y, z / nsize + origin_z )).tolist()
+
+    # noise basis type's
+    if nbasis == 9: nbasis = 14  # to get cellnoise basis you must set 14 instead of 9
+    if vlbasis ==9: vlbasis = 14
+    # noise type's
+    noise = None
+    if ntype == 0:   noise = lambda co: multi_fractal(        co, dimension, lacunarity, depth, nbasis ) * 0.5
+    elif ntype == 1: noise = lambda co: ridged_multi_fractal( co, dimension, lacunarity, depth, offset, gain, nbasis ) * 0.5
+    elif ntype == 2: noise = lambda co: hybrid_multi_fractal( co, dimension, lacunarity, depth, offset, gain, nbasis ) * 0.5
+    elif ntype == 3: noise = lambda co: hetero_terrain(       co, dimension, lacunarity, depth, offset, nbasis ) * 0.25
+    elif ntype == 4: noise = lambda co: fractal(              co, dimension, lacunarity, depth, nbasis )
+    elif ntype == 5: noise = lambda co: turbulence_vector(    co, depth, hardnoise, nbasis )[0]
+    elif ntype == 6: noise = lambda co: variable_lacunarity(  co, distortion, nbasis, vlbasis ) + 0.5
+    elif ntype == 7: value = marble_noise_batch( x*2.0/falloffsize,y*2.0/falloffsize,z*2/falloffsize, origin, nsize, marbleshape, marblebias, marblesharpnes, distortion, depth, hardnoise, nbasis, rows )
+    elif ntype == 8: noise = lambda co: shattered_hterrain( co[0], co[1], co[2], dimension, lacunarity, depth, offset, distortion, nbasis )
+    elif ntype == 9: noise = lambda co: strata_hterrain( co[0], co[1], co[2], dimension, lacunarity, depth, offset, distortion, nbasis )
+    else:
+        value = numpy.zeros(len(x))
+    if noise is not None:
+        value = noise_map(noise, ncoords, rows)
+    value = numpy.asarray(value, dtype=numpy.float64)
+
+    # adjust height
+    if invert !=0:
+        value = (1-value) * height + heightoffset
+    else:
+        value = value * height + heightoffset
+
+    # edge falloff
+    if sphere == 0: # no edge falloff if spherical
+        if falloff != 0:
+            if falloff == 1:
+                dist = numpy.hypot(x * x, y * y)
+                radius = (falloffsize/2)**2
+            else:
+                if falloff == 2:
+                    dist = numpy.hypot(x, y)
+                elif falloff == 3:
+                    dist = numpy.abs(y)
+                else:
+                    dist = numpy.abs(x)
+                radius = falloffsize/2
+            value = value - sealevel
+            inside = dist < radius
+            dist = dist / radius
+            dist = ( (dist) * (dist) * ( 3-2*(dist) ) )
+            value = numpy.where(inside, ( value - value * dist ) + sealevel, sealevel)
+
+    # strata / terrace / layered
+    if stratatype !='0':
+        strata = strata / height
+    if stratatype == '1':
+        strata *= 2
+        steps = ( numpy.sin( value*strata*pi ) * ( 0.1/strata*pi ) )
+        value = ( value * (1.0-0.5) + steps*0.5 ) * 2.0
+    elif stratatype == '2':
+        steps = -numpy.abs( numpy.sin( value*(strata)*pi ) * ( 0.1/(strata)*pi ) )
+        value =( value * (1.0-0.5) + steps*0.5 ) * 2.0
+    elif stratatype == '3':
+        steps = numpy.abs( numpy.sin( value*(strata)*pi ) * ( 0.1/(strata)*pi ) )
+        value =( value * (1.0-0.5) + steps*0.5 ) * 2.0
+
+    # clamp height
+    value = numpy.minimum(numpy.maximum(value, sealevel), platlevel)
+
+    return value
+
+
+# faces of a sub_d x sub_d grid, same order as createFaces() between rows.
+def grid_faces_batch( sub_d ):
+    row = numpy.arange(sub_d - 1)
+    a = (numpy.arange(sub_d - 1)[:, None] * sub_d + row[None, :]).ravel()
+    return numpy.column_stack((a, a + sub_d, a + sub_d + 1, a + 1))
+
+
+# generate grid, returns (verts, faces) as numpy arrays.
+def grid_gen_batch( sub_d, size_me, options ):
+
+    delta = size_me / (sub_d - 1)
+    start = -(size_me / 2.0)
+
+    row = start + numpy.arange(sub_d) * delta
+    x = numpy.repeat(row, sub_d)
+    y = numpy.tile(row, sub_d)
+    z = landscape_gen_batch(x,y,numpy.zeros(len(x)),size_me,options,sub_d)
+
+    return numpy.column_stack((x, y, z)), grid_faces_batch(sub_d)
+
+
+# generate sphere, returns (verts, faces) as numpy arrays.
+def sphere_gen_batch( sub_d, size_me, options ):
+
+    row_x = numpy.repeat(numpy.arange(sub_d), sub_d)
+    row_y = numpy.tile(numpy.arange(sub_d), sub_d)
+
+    lat = -pi/2+row_x*pi/(sub_d-1)
+    lon = row_y*pi*2/(sub_d-1)
+    u = numpy.sin(lon) * numpy.cos(lat) * size_me/2
+    v = numpy.cos(lon) * numpy.cos(lat) * size_me/2
+    w = numpy.sin(lat) * size_me/2
+    h = landscape_gen_batch(u,v,w,size_me,options,sub_d) / size_me
+
+    return numpy.column_stack((u+u*h, v+v*h, w+w*h)), grid_faces_batch(sub_d)
+
+
 ###------------------------------------------------------------
 # Add landscape
 class landscape_add(bpy.types.Operator):
@@ -765,15 +1039,26 @@ class landscape_add(bpy.types.Operator):
                 ]
 
             # Main function
-            if self.SphereMesh !=0:
-                # sphere
-                verts, faces = sphere_gen( self.Subdivision, self.MeshSize, options )
+            if numpy is not None:
+                if self.SphereMesh !=0:
+                    # sphere
+                    verts, faces = sphere_gen_batch( self.Subdivision, self.MeshSize, options )
+                else:
+                    # grid
+                    verts, faces = grid_gen_batch( self.Subdivision, self.MeshSize, options )
+
+                # create mesh object
+                obj = create_mesh_object_arrays(context, verts, faces, "Landscape")
             else:
-                # grid
-                verts, faces = grid_gen( self.Subdivision, self.MeshSize, options )
-
-            # create mesh object
-            obj = create_mesh_object(context, verts, [], faces, "Landscape")
+                if self.SphereMesh !=0:
+                    # sphere
+                    verts, faces = sphere_gen( self.Subdivision, self.MeshSize, options )
+                else:
+                    # grid
+                    verts, faces = grid_gen( self.Subdivision, self.MeshSize, options )
+
+                # create mesh object
+                obj = create_mesh_object(context, verts, [], faces, "Landscape")
             bpy.ops.object.mode_set(mode='EDIT')
             bpy.ops.mesh.normals_make_consistent(inside=True)
             bpy.ops.object.mode_set(mode='OBJECT')
@@ -39,11 +39,19 @@ from bpy.props import *
 import mathutils
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 ##############################
 #### simplipoly algorithm ####
 ##############################
 # get SplineVertIndices to keep
 def simplypoly(splineVerts, options):
+    if numpy is not None:
+        return simplypoly_array(pointsAsArray(splineVerts), options)
+
     # main vars
     newVerts = [] # list of vertindices to keep
     points = splineVerts # list of 3dVectors
@@ -55,13 +63,19 @@ def simplypoly(splineVerts, options):
     k_thresh = options[2] # curvature threshold
     dis_error = options[6] # additional distance error
 
+    # the derivatives are the same weighted sum for every window
+    weights1 = getDerivativeWeights(order, 1/(order-1), order-1)
+    weights2 = getDerivativeWeights(order, 1/(order-1), order-2)
+
     # get curvatures per vert
     for i, point in enumerate(points[:-(order-1)]):
         BVerts = points[i:i+order]
-        for b, BVert in enumerate(BVerts[1:-1]):
-            deriv1 = getDerivative(BVerts, 1/(order-1), order-1)
-            deriv2 = getDerivative(BVerts, 1/(order-1), order-2)
-            curva = getCurvature(deriv1, deriv2)
+        deriv1 = sum((w * v for w, v in zip(weights1[1:], BVerts[1:])),
+                     weights1[0] * BVerts[0])
+        deriv2 = sum((w * v for w, v in zip(weights2[1:], BVerts[1:])),
+                     weights2[0] * BVerts[0])
+        curva = getCurvature(deriv1, deriv2)
+        for b in range(order - 2):
             pointCurva[i+b+1].append(curva)
 
     # average the curvatures
@@ -88,44 +102,84 @@ def simplypoly(splineVerts, options):
 
     return newVerts
 
+# same as simplypoly() for an (n, 3) array of points
+def simplypoly_array(points, options):
+    order = options[3] # order of sliding beziercurves
+    k_thresh = options[2] # curvature threshold
+    dis_error = options[6] # additional distance error
+    total = len(points)
+
+    # get curvatures per window of order points, added to all
+    # inner verts of the window, then averaged
+    curvatures = numpy.zeros(total)
+    windows = total - order + 1
+    if windows > 0:
+        weights1 = getDerivativeWeights(order, 1/(order-1), order-1)
+        weights2 = getDerivativeWeights(order, 1/(order-1), order-2)
+        deriv1 = sum(w * points[j:j+windows] for j, w in enumerate(weights1))
+        deriv2 = sum(w * points[j:j+windows] for j, w in enumerate(weights2))
+        length1 = numpy.sqrt((deriv1 * deriv1).sum(axis=1))
+        cross = numpy.cross(deriv1, deriv2)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            curva = numpy.sqrt((cross * cross).sum(axis=1)) / length1 ** 3
+        curva[length1 == 0.0] = 0.0 # in case of points in straight line
+        for b in range(order - 2):
+            curvatures[b+1:b+1+windows] += curva
+    curvatures /= (order-1)
+
+    # get distancevalues per vert - first and last vert are always kept
+    distances = numpy.zeros(total)
+    if total > 2:
+        distances[1:-1] = altitudes(points[2:] - points[:-2],
+                                    points[1:-1] - points[:-2])
+
+    # generate list of vertindices to keep
+    keep = (curvatures >= k_thresh*0.01) | (distances >= dis_error*0.1)
+    newVerts = [0] + numpy.nonzero(keep)[0].tolist() + [total-1]
+
+    return newVerts
+
+# get an (n, 3) array from a list of vectors
+def pointsAsArray(points):
+    if isinstance(points, numpy.ndarray):
+        return points
+    points = numpy.array([v[:] for v in points], dtype=numpy.float64)
+    if points.ndim == 2 and points.shape[1] == 2:
+        points = numpy.hstack((points, numpy.zeros((len(points), 1))))
+    return points
+
 # get binomial coefficient
 def binom(n, m):
-    b = [0] * (n+1)
-    b[0] = 1
-    for i in range(1, n+1):
-        b[i] = 1
-        j = i-1
-        while j > 0:
-            b[j] += b[j-1]
-            j-= 1
-    return b[m]
+    rows = _binom_rows
+    while len(rows) <= n:
+        row = rows[-1]
+        rows.append([1] + [a + b for a, b in zip(row, row[1:])] + [1])
+    return rows[n][m]
+
+_binom_rows = [[1]] # pascal's triangle, extended as needed
 
 # get nth derivative of order(len(verts)) bezier curve
 def getDerivative(verts, t, nth):
-    order = len(verts) - 1 - nth
-    QVerts = []
-
-    if nth:
-        for i in range(nth):
-            if QVerts:
-                verts = QVerts
-            derivVerts = []
-            for i in range(len(verts)-1):
-                derivVerts.append(verts[i+1] - verts[i])
-            QVerts = derivVerts
-    else:
-        QVerts = verts
-
-    if len(verts[0]) == 3:
-        point = mathutils.Vector((0, 0, 0))
-    if len(verts[0]) == 2:
-        point = mathutils.Vector((0, 0))
-
-    for i, vert in enumerate(QVerts):
-        point += binom(order, i) * math.pow(t, i) * math.pow(1-t, order-i) * vert
-    deriv = point
-
-    return deriv
+    weights = getDerivativeWeights(len(verts), t, nth)
+    return sum((w * v for w, v in zip(weights[1:], verts[1:])),
+               weights[0] * verts[0])
+
+# get the weights per vert of getDerivative(), so the derivative
+# of any window of count verts is sum(weights[i] * verts[i])
+def getDerivativeWeights(count, t, nth):
+    order = count - 1 - nth
+
+    # bernstein coefficients
+    bernstein = [binom(order, i) * math.pow(t, i) * math.pow(1-t, order-i)
+                 for i in range(order+1)]
+    # nth forward difference
+    difference = [(-1) ** (nth-i) * binom(nth, i) for i in range(nth+1)]
+
+    weights = [0.0] * count
+    for i, b in enumerate(bernstein):
+        for j, d in enumerate(difference):
+            weights[i+j] += b * d
+    return weights
 
 # get curvature from first, second derivative
 def getCurvature(deriv1, deriv2):
@@ -152,39 +206,72 @@ def altitude(point1, point2, pointn):
     altitude = math.sin(alpha) * edge2.length
     return altitude
 
-# iterate through verts
-def iterate(points, newVerts, error):
-    new = []
-    for newIndex in range(len(newVerts)-1):
-        bigVert = 0
-        alti_store = 0
-        for i, point in enumerate(points[newVerts[newIndex]+1:newVerts[newIndex+1]]):
-            alti = altitude(points[newVerts[newIndex]], points[newVerts[newIndex+1]], point)
-            if alti > alti_store:
-                alti_store = alti
-                if alti_store >= error:
-                    bigVert = i+1+newVerts[newIndex]
-        if bigVert:
-            new.append(bigVert)
-    if new == []:
-        return False
-    return new
+# get altitudes for arrays of edges, same as altitude()
+# edge1 = point2 - point1, edge2 = pointn - point1
+def altitudes(edge1, edge2):
+    length1 = numpy.sqrt((edge1 * edge1).sum(axis=-1))
+    length2 = numpy.sqrt((edge2 * edge2).sum(axis=-1))
+    cross = numpy.cross(edge1, edge2)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        altitude = numpy.sqrt((cross * cross).sum(axis=-1)) / length1
+    altitude = numpy.where(length1 == 0.0, length2, altitude)
+    altitude = numpy.where(length2 == 0.0, 0.0, altitude)
+    return altitude
 
 #### get SplineVertIndices to keep
+# segments are split at their furthest vert until all are within error,
+# using a stack of segments so each is only visited once.
 def simplify_RDP(splineVerts, options):
     #main vars
     error = options[4]
+    total = len(splineVerts)
 
     # set first and last vert
-    newVerts = [0, len(splineVerts)-1]
-
-    # iterate through the points
-    new = 1
-    while new != False:
-        new = iterate(splineVerts, newVerts, error)
-        if new:
-            newVerts += new
-            newVerts.sort()
+    newVerts = [0, total-1]
+    if total < 3:
+        return newVerts
+
+    if numpy is not None:
+        points = pointsAsArray(splineVerts)
+        keep = numpy.zeros(total, dtype=bool)
+        keep[newVerts] = True
+
+    stack = [(0, total-1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        if numpy is not None:
+            point1 = points[first]
+            altis = altitudes(points[last] - point1,
+                              points[first+1:last] - point1)
+            i = int(altis.argmax())
+            alti_store = altis[i]
+            bigVert = i+1+first if alti_store >= error else 0
+        else:
+            bigVert = 0
+            alti_store = 0
+            point1 = splineVerts[first]
+            point2 = splineVerts[last]
+            for i in range(first+1, last):
+                alti = altitude(point1, point2, splineVerts[i])
+                if alti > alti_store:
+                    alti_store = alti
+                    if alti_store >= error:
+                        bigVert = i
+
+        if bigVert and alti_store > 0:
+            if numpy is not None:
+                keep[bigVert] = True
+            else:
+                newVerts.append(bigVert)
+            stack.append((bigVert, last))
+            stack.append((first, bigVert))
+
+    if numpy is not None:
+        return numpy.nonzero(keep)[0].tolist()
+    newVerts.sort()
     return newVerts
 
 ##########################
@@ -308,8 +395,16 @@ def getFcurveData(obj):
     fcurves = []
     for fc in obj.animation_data.action.fcurves:
         if fc.select:
-            fcVerts = [vcVert.co.to_3d()
-                        for vcVert in fc.keyframe_points.values()]
+            if numpy is not None:
+                # (frame, value, 0) rows
+                co = numpy.empty(len(fc.keyframe_points) * 2,
+                                 dtype=numpy.float32)
+                fc.keyframe_points.foreach_get('co', co)
+                fcVerts = numpy.zeros((len(fc.keyframe_points), 3))
+                fcVerts[:, :2] = co.reshape(-1, 2)
+            else:
+                fcVerts = [vcVert.co.to_3d()
+                            for vcVert in fc.keyframe_points.values()]
             fcurves.append(fcVerts)
     return fcurves
 
@@ -320,41 +415,63 @@ def selectedfcurves(obj):
             fcurves_sel.append(fc)
     return fcurves_sel
 
+## get vertindices to keep for all fcurves, None for fcurves left as is
+def fcurves_simplify_indices(fcurves, options):
+    mode = options[0]
+    newVertsAll = []
+    for fcurve in fcurves:
+        newVerts = None
+        # test if fcurve is long enough
+        if len(fcurve) >= 7:
+            # simplify spline according to mode
+            if mode == 'DISTANCE':
+                newVerts = simplify_RDP(fcurve, options)
+
+            if mode == 'CURVATURE':
+                newVerts = simplypoly(fcurve, options)
+        newVertsAll.append(newVerts)
+    return newVertsAll
+
 ###########################################################
 ## fCurves Main
 def fcurves_simplify(context, obj, options, fcurves):
-    # main vars
-    mode = options[0]
-
     #get indices of selected fcurves
     fcurve_sel = selectedfcurves(obj)
 
+    # simplify all fcurves before editing any
+    newVertsAll = fcurves_simplify_indices(fcurves, options)
+
     # go through fcurves
     for fcurve_i, fcurve in enumerate(fcurves):
-        # test if fcurve is long enough
-        if len(fcurve) >= 7:
+        newVerts = newVertsAll[fcurve_i]
+        if newVerts is None:
+            continue
 
-            # simplify spline according to mode
-            if mode == 'DISTANCE':
-                newVerts = simplify_RDP(fcurve, options)
+        keyframe_points = fcurve_sel[fcurve_i].keyframe_points
 
-            if mode == 'CURVATURE':
-                newVerts = simplypoly(fcurve, options)
+        if len(keyframe_points) == len(fcurve):
+            # keyframes match the data, only remove the ones not kept
+            keep = set(newVerts)
+            for i in range(len(fcurve)-1, 0, -1):
+                if i not in keep:
+                    keyframe_points.remove(keyframe_points[i], fast=True)
+            fcurve_sel[fcurve_i].update()
+            continue
 
-            # convert indices into vectors3D
-            newPoints = []
-
-            #this is different from the main() function for normal curves, different api...
-            for v in newVerts:
-                newPoints.append(fcurve[v])
-
-            #remove all points from curve first
-            for i in range(len(fcurve)-1,0,-1):
-                fcurve_sel[fcurve_i].keyframe_points.remove(fcurve_sel[fcurve_i].keyframe_points[i])
-            # put newPoints into fcurve
-            for v in newPoints:
-                fcurve_sel[fcurve_i].keyframe_points.insert(frame=v[0],value=v[1])
-            #fcurve.points.foreach_set('co', newPoints)
+        # convert indices into vectors3D
+        newPoints = []
+
+        #this is different from the main() function for normal curves, different api...
+        for v in newVerts:
+            newPoints.append(fcurve[v])
+
+        #remove all points from curve first
+        for i in range(len(keyframe_points)-1,0,-1):
+            keyframe_points.remove(keyframe_points[i])
+        # put newPoints into fcurve
+        for v in newPoints:
+            keyframe_points.insert(frame=v[0],value=v[1])
+        #fcurve.points.foreach_set('co', newPoints)
     return
 
 #################################################
@@ -87,6 +87,36 @@ class ImportHiRISEIMGDTM(bpy.types.Operator, ImportHelper):
                             default='BIN12-FAST'
                             )
 
+    use_tiles = BoolProperty(name="Tiled",
+                             description="Import the DTM as one object per tile, "
+                                         "with a resolution depending on the distance to the camera "
+                                         "(binning setting is not used)",
+                             default=False)
+    tile_size = IntProperty(name="Tile Size",
+                            description="Size of the tiles, in samples (rounded down to a multiple of 12)",
+                            min=12,
+                            max=100000,
+                            default=1200)
+    tile_lod = EnumProperty(items=(
+                                   ('DISTANCE', "Camera Distance", "Only import the resolution needed by the camera distance of each tile"),
+                                   ('ALL', "LOD Set", "Import all resolutions of each tile, only showing the one needed by the camera distance"),
+                                  ),
+                            name="Levels",
+                            description="Levels of detail to import for each tile",
+                            default='DISTANCE'
+                            )
+    lod_distance = FloatProperty(name="LOD Distance",
+                                 description="Tiles closer than this to the camera (or 3D cursor) are imported at full resolution, "
+                                             "2x2, 6x6 and 12x12 binning are used up to 2, 6 times this distance and beyond",
+                                 min=0.0,
+                                 default=10.0,
+                                 subtype='DISTANCE')
+    tile_jobs = IntProperty(name="Jobs",
+                            description="Number of worker processes binning the tiles",
+                            min=1,
+                            max=64,
+                            default=4)
+
     ## TODO: add support for cropping on import when the checkbox is checked
     # do_crop = BoolProperty(name="Crop Image", description="Crop the image during import", ... )
     ## we only want these visible when the above is "true"
@@ -109,6 +139,7 @@ class ImportHiRISEIMGDTM(bpy.types.Operator, ImportHelper):
                              scale=self.scale,
                              bin_mode=self.bin_mode,
                              cropVars=False,
+                             tileVars=(self.tile_size, self.tile_lod, self.lod_distance, self.tile_jobs) if self.use_tiles else False,
                              )
 
 ## How to register the script inside of Blender
@@ -20,13 +20,49 @@
 This script can import a HiRISE DTM .IMG file.
 """
 
-import bpy
-from bpy.props import *
+try:
+    import bpy
+    from bpy.props import *
+except ImportError:
+    # running as a tile worker (see executeTiles), outside of Blender
+    bpy = None
 
 from struct import pack, unpack
-import os
+import os, sys
 import queue, threading
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Binning modes for the array engine: (bin size, method, sample offset)
+#   'ALL': average of the block, ignored if any sample of the block is ignored
+#   'MEAN': average of the valid samples of the block
+#   'FAST': single sample of the block, at given offset in its first line
+BIN_MODES = {
+  'NONE': (1, 'FAST', 0),
+  'BIN2': (2, 'ALL', 0),
+  'BIN6': (6, 'MEAN', 0),
+  'BIN6-FAST': (6, 'FAST', 0),
+  'BIN12': (12, 'MEAN', 0),
+  'BIN12-FAST': (12, 'FAST', 11),
+  }
+
+# Number of samples read at once by the array engine (bounds temporary memory)
+BAND_SAMPLES = 1 << 22
+
+# Levels of detail of tiled imports, from full resolution to coarsest, with the
+# camera distance (as a factor of the LOD distance) up to which each one is used
+TILE_LODS = (
+  ('NONE', 1.0),
+  ('BIN2', 2.0),
+  ('BIN6', 6.0),
+  ('BIN12', None),
+  )
+# Tile sizes are a multiple of every LOD bin size, so neighbour tiles share their border vertices
+TILE_BLOCK = 12
+
 class image_properties:
     """ keeps track of image attributes throughout the hirise_dtm_importer class """
     def __init__(self, name, dimensions, pixel_scale):
@@ -65,6 +101,7 @@ class hirise_dtm_importer(object):
       self.__bin_mode = 'BIN6'
       self.scale( 1.0 )
       self.__cropXY = False
+      self.__tiles = False
 
     def bin_mode(self, bin_mode=None):
       if bin_mode != None:
@@ -80,6 +117,14 @@ class hirise_dtm_importer(object):
       self.__cropXY = [ widthX, widthY, offX, offY ]
       return self.__cropXY
 
+    def tiles(self, tile_size, lod_mode='DISTANCE', lod_distance=100.0, jobs=1):
+      """ enables tiled import, see executeTiles()
+          (tile size is rounded down to a multiple of TILE_BLOCK)
+      """
+      tile_size = max(TILE_BLOCK, tile_size - tile_size % TILE_BLOCK)
+      self.__tiles = [ tile_size, lod_mode, lod_distance, jobs ]
+      return self.__tiles
+
     ############################################################################
     ## PDS Label Operations
     ############################################################################
@@ -168,6 +213,24 @@ class hirise_dtm_importer(object):
 
       return vmin, vmax
 
+    def readLabel(self, img):
+      """ reads the PDS label, returns the image dimensions and valid min/max values,
+          and leaves img at the start of the image data
+      """
+      (label, parsedLabel) = self.getPDSLabel(img)
+
+      image_dims = self.getLinesAndSamples(parsedLabel)
+      img_min_max_vals = self.getValidMinMax(parsedLabel)
+      self.__ignore_value = self.getMissingConstant(parsedLabel)
+
+
+      # MAGIC VALUE? -- need to formalize this to rid ourselves of bad points
+      img.seek(28)
+      # Crop off 4 lines
+      img.seek(4*image_dims[0])
+
+      return image_dims, img_min_max_vals
+
     def getMissingConstant(self, label):
       """ uses the parsed PDS Label to get the MISSING_CONSTANT parameter
           from the first object named "IMAGE" -- is hackish
@@ -616,6 +679,310 @@ class hirise_dtm_importer(object):
 
       return ob
 
+    ############################################################################
+    ## Array operations (numpy engine)
+    ############################################################################
+
+    def getImageArray(self, img, img_props, offset):
+      """ memory-maps the image samples (32-bit little endian floats) as a lines x samples array """
+      samples, lines = img_props.dims()
+      # don't map past the end of a truncated file
+      img.seek(0, os.SEEK_END)
+      lines = max(0, min(lines, (img.tell() - offset) // (4 * samples)))
+      if lines == 0:
+        return numpy.zeros((0, samples), dtype='<f4')
+      return numpy.memmap(img, dtype='<f4', mode='r', offset=offset, shape=(lines, samples))
+
+    def cropArray(self, data, img_props, XSize=None, YSize=None, XOffset=0, YOffset=0):
+      """ return a cropped view of the image array """
+      XSize, YSize, XOffset, YOffset = self.cropDims(img_props, XSize, YSize, XOffset, YOffset)
+      return data[YOffset:YOffset+YSize, XOffset:XOffset+XSize]
+
+    def cropDims(self, img_props, XSize=None, YSize=None, XOffset=0, YOffset=0):
+      """ clamps the crop region to the image, returns it as (XSize, YSize, XOffset, YOffset) """
+      processed_dims = img_props.processed_dims()
+
+      if XSize is None:
+        XSize = processed_dims[0]
+      if YSize is None:
+        YSize = processed_dims[1]
+
+      if XSize + XOffset > processed_dims[0]:
+        XSize = processed_dims[0]
+        XOffset = 0
+      if YSize + YOffset > processed_dims[1]:
+        YSize = processed_dims[1]
+        YOffset = 0
+
+      img_props.processed_dims( (XSize, YSize) )
+      return XSize, YSize, XOffset, YOffset
+
+    def binArray(self, data, img_props, bin_mode, valid_min=0.0, scale=1.0):
+      """ bins the image array by blocks, using strided reductions over bands of lines
+          returns heights ((sample - valid_min) * scale) as float32, NaN where ignored
+      """
+      ignore_value = self.__ignore_value
+      size, method, sample_offset = BIN_MODES.get(bin_mode, BIN_MODES['NONE'])
+
+      lines = data.shape[0] // size
+      samples = data.shape[1] // size
+      # dimensions shrink as we remove pixels
+      img_props.processed_dims( (samples, lines) )
+      # each pixel is larger as binning gets larger
+      pixel_scale = img_props.pixel_scale()
+      img_props.pixel_scale( (pixel_scale[0]*size, pixel_scale[1]*size) )
+
+      heights = numpy.empty((lines, samples), dtype=numpy.float32)
+      if lines == 0 or samples == 0:
+        return heights
+
+      band = max(1, BAND_SAMPLES // (size * size * samples))
+      for y in range(0, lines, band):
+        y_end = min(lines, y + band)
+        if method == 'FAST':
+          values = numpy.array(data[y*size:y_end*size:size,
+                                    sample_offset:sample_offset+samples*size:size], dtype=numpy.float64)
+          values[values == ignore_value] = numpy.nan
+        else:
+          block = numpy.array(data[y*size:y_end*size, :samples*size], dtype=numpy.float64)
+          block = block.reshape(y_end - y, size, samples, size)
+          valid = block != ignore_value
+          if method == 'ALL':
+            values = block.mean(axis=(1, 3))
+            values[~valid.all(axis=(1, 3))] = numpy.nan
+          else:
+            block[~valid] = 0.0
+            count = valid.sum(axis=(1, 3))
+            with numpy.errstate(invalid='ignore', divide='ignore'):
+              values = block.sum(axis=(1, 3)) / count
+        values -= valid_min
+        values *= scale
+        heights[y:y_end] = values
+
+      return heights
+
+    def genMeshArray(self, heights, img_props):
+      """ Returns a mesh object from an array of heights, NaN values are ignored """
+      lines, samples = heights.shape
+
+      scale_x = self.scale() * img_props.pixel_scale()[0]
+      scale_y = self.scale() * img_props.pixel_scale()[1]
+
+      valid = ~numpy.isnan(heights)
+
+      # vertices of valid points, line by line
+      grid_y, grid_x = numpy.nonzero(valid)
+      coords = numpy.empty((len(grid_x), 3), dtype=numpy.float32)
+      coords[:, 0] = grid_x * scale_x
+      coords[:, 1] = grid_y * -scale_y
+      coords[:, 2] = heights[valid]
+
+      # square faces where all four corners are valid
+      index = numpy.cumsum(valid, dtype=numpy.int32).reshape(valid.shape) - 1
+      quads = valid[:-1, :-1] & valid[:-1, 1:] & valid[1:, 1:] & valid[1:, :-1]
+      faces = numpy.empty((numpy.count_nonzero(quads), 4), dtype=numpy.int32)
+      faces[:, 0] = index[:-1, :-1][quads]
+      faces[:, 1] = index[:-1, 1:][quads]
+      faces[:, 2] = index[1:, 1:][quads]
+      faces[:, 3] = index[1:, :-1][quads]
+
+      me = bpy.data.meshes.new(img_props.name()) # create a new mesh
+      me.vertices.add(len(coords))
+      me.vertices.foreach_set("co", coords.ravel())
+      me.loops.add(faces.size)
+      me.loops.foreach_set("vertex_index", faces.ravel())
+      me.polygons.add(len(faces))
+      me.polygons.foreach_set("loop_start", numpy.arange(0, faces.size, 4, dtype=numpy.int32))
+      me.polygons.foreach_set("loop_total", numpy.full(len(faces), 4, dtype=numpy.int32))
+
+      me.update(calc_edges=True)
+
+      bin_desc = self.bin_mode()
+      if bin_desc == 'NONE':
+        bin_desc = 'No Bin'
+
+      ob=bpy.data.objects.new("DTM - %s" % bin_desc, me)
+
+      return ob
+
+    def executeArray(self, img, img_props, img_min_max_vals):
+      """ same as the iterators chain of execute(), as whole array operations """
+      # Crop off 4 lines (see execute())
+      data = self.getImageArray(img, img_props, 4*img_props.dims()[0])
+
+      if self.__cropXY:
+        data = self.cropArray(data, img_props,
+                              XSize=self.__cropXY[0],
+                              YSize=self.__cropXY[1],
+                              XOffset=self.__cropXY[2],
+                              YOffset=self.__cropXY[3]
+                              )
+
+      heights = self.binArray(data, img_props, self.bin_mode(), img_min_max_vals[0], self.scale())
+      del data
+
+      return self.genMeshArray(heights, img_props)
+
+    ############################################################################
+    ## Tiled import
+    ############################################################################
+
+    def tileWindows(self, img_props, tile_size):
+      """ splits the (cropped) image into tiles, returns (tile x, tile y, x, y, width, height) tuples """
+      samples, lines = img_props.processed_dims()
+      windows = []
+      for tile_y, y in enumerate(range(0, lines, tile_size)):
+        for tile_x, x in enumerate(range(0, samples, tile_size)):
+          windows.append( (tile_x, tile_y, x, y, min(tile_size, samples - x), min(tile_size, lines - y)) )
+      return windows
+
+    def tileLods(self, windows, img_min_max_vals, lod_mode, lod_distance):
+      """ returns the bin modes to generate for each tile, and the one to show, from the camera
+          (or 3D cursor) distance to the tile
+      """
+      scene = self.__context.scene
+      if scene.camera:
+        view = scene.camera.matrix_world.translation
+      else:
+        view = scene.cursor_location
+      scale = self.scale()
+      z_max = (img_min_max_vals[1] - img_min_max_vals[0]) * scale
+
+      lods = []
+      for tile_x, tile_y, x, y, width, height in windows:
+        # distance to the tile bounds
+        dx = max(x * scale - view[0], 0.0, view[0] - (x + width) * scale)
+        dy = max(-(y + height) * scale - view[1], 0.0, view[1] + y * scale)
+        dz = max(-view[2], 0.0, view[2] - z_max)
+        distance = (dx * dx + dy * dy + dz * dz) ** 0.5
+
+        for bin_mode, factor in TILE_LODS:
+          if factor is None or distance <= lod_distance * factor:
+            break
+        if lod_mode == 'ALL':
+          lods.append( ([mode for mode, _factor in TILE_LODS], bin_mode) )
+        else:
+          lods.append( ([bin_mode], bin_mode) )
+      return lods
+
+    def binTile(self, data, img_props, window, bin_mode, img_min_max_vals):
+      """ bins a single tile of the (cropped) image array, returns its heights """
+      size = BIN_MODES[bin_mode][0]
+      tile_x, tile_y, x, y, width, height = window
+      # one more block on right and bottom sides, so that neighbour tiles share their border vertices
+      samples, lines = img_props.processed_dims()
+      tile_props = image_properties( img_props.name(), img_props.dims(), img_props.pixel_scale() )
+      return self.binArray(data[y:min(lines, y+height+size), x:min(samples, x+width+size)], tile_props,
+                           bin_mode, img_min_max_vals[0], self.scale())
+
+    def binTiles(self, img, img_props, img_min_max_vals, todo):
+      """ bins given (window, bin mode) tiles, returns their heights in the same order """
+      data = self.getImageArray(img, img_props, 4*img_props.dims()[0])
+
+      if self.__cropXY:
+        data = self.cropArray(data, img_props,
+                              XSize=self.__cropXY[0],
+                              YSize=self.__cropXY[1],
+                              XOffset=self.__cropXY[2],
+                              YOffset=self.__cropXY[3]
+                              )
+
+      return [self.binTile(data, img_props, window, bin_mode, img_min_max_vals) for window, bin_mode in todo]
+
+    def binTilesJobs(self, img, img_props, img_min_max_vals, todo, jobs):
+      """ same as binTiles() using worker processes (Blender's Python running this file) """
+      import pickle
+      import subprocess
+      import tempfile
+      import zipfile
+
+      procs = []
+      for i in range(jobs):
+        fd, job_tmp = tempfile.mkstemp(suffix=".pickle")
+        with open(fd, "wb") as f:
+          pickle.dump({
+            "filepath": self.__filepath,
+            "scale": self.scale(),
+            "crop": self.__cropXY,
+            "todo": todo[i::jobs],
+            }, f, pickle.HIGHEST_PROTOCOL)
+        fd, result_tmp = tempfile.mkstemp(suffix=".npz")
+        os.close(fd)
+        cmd = [bpy.app.binary_path_python, os.path.abspath(__file__), "--tile-worker", job_tmp, result_tmp]
+        procs.append( (subprocess.Popen(cmd), job_tmp, result_tmp, i) )
+
+      heights = [None] * len(todo)
+      for proc, job_tmp, result_tmp, i in procs:
+        proc.wait()
+        try:
+          with numpy.load(result_tmp) as result:
+            for j, idx in enumerate(range(i, len(todo), jobs)):
+              heights[idx] = result["tile%d" % j]
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+          # result file left empty or truncated by the worker
+          print("Tile worker failed (%d), binning its tiles here" % proc.returncode)
+        finally:
+          os.remove(job_tmp)
+          os.remove(result_tmp)
+
+      failed = [idx for idx, tile_heights in enumerate(heights) if tile_heights is None]
+      if failed:
+        for idx, tile_heights in zip(failed, self.binTiles(img, img_props, img_min_max_vals,
+                                                           [todo[idx] for idx in failed])):
+          heights[idx] = tile_heights
+      return heights
+
+    def executeTiles(self, img, img_props, img_min_max_vals):
+      """ imports the DTM as one object per tile, at a resolution depending on the camera distance
+          (or one empty per tile parenting all its resolutions, when lod mode is 'ALL')
+      """
+      tile_size, lod_mode, lod_distance, jobs = self.__tiles
+
+      # get cropped dimensions
+      tiles_props = image_properties( img_props.name(), img_props.dims(), img_props.pixel_scale() )
+      if self.__cropXY:
+        self.cropDims(tiles_props,
+                      XSize=self.__cropXY[0],
+                      YSize=self.__cropXY[1],
+                      XOffset=self.__cropXY[2],
+                      YOffset=self.__cropXY[3]
+                      )
+
+      windows = self.tileWindows(tiles_props, tile_size)
+      lods = self.tileLods(windows, img_min_max_vals, lod_mode, lod_distance)
+      todo = [(window, bin_mode) for window, (bin_modes, _bin_mode) in zip(windows, lods) for bin_mode in bin_modes]
+
+      jobs = min(jobs, len(todo))
+      if jobs > 1:
+        heights = self.binTilesJobs(img, img_props, img_min_max_vals, todo, jobs)
+      else:
+        heights = self.binTiles(img, img_props, img_min_max_vals, todo)
+
+      scale = self.scale()
+      obs = []
+      tiles_obs = {}
+      for (window, bin_mode), tile_heights in zip(todo, heights):
+        tile_x, tile_y, x, y, width, height = window
+        size = BIN_MODES[bin_mode][0]
+        tile_props = image_properties( "%s %d_%d" % (img_props.name(), tile_x, tile_y),
+                                       img_props.dims(), (size, size) )
+        ob = self.genMeshArray(tile_heights, tile_props)
+        ob.name = "DTM - %d_%d - %s" % (tile_x, tile_y, 'No Bin' if bin_mode == 'NONE' else bin_mode)
+        ob.location = (x * scale, -y * scale, 0.0)
+        tiles_obs.setdefault(window, []).append( (bin_mode, ob) )
+        obs.append(ob)
+
+      if lod_mode == 'ALL':
+        for window, (_bin_modes, bin_mode_show) in zip(windows, lods):
+          tile_x, tile_y = window[:2]
+          parent = bpy.data.objects.new("DTM - %d_%d - LOD" % (tile_x, tile_y), None)
+          obs.append(parent)
+          for bin_mode, ob in tiles_obs[window]:
+            ob.parent = parent
+            ob.hide = ob.hide_render = (bin_mode != bin_mode_show)
+
+      return obs
+
     ################################################################################
     #  Yay, done with importer functions ... let's see the abstraction in action!    #
     ################################################################################
@@ -623,17 +990,7 @@ class hirise_dtm_importer(object):
 
       img = open(self.__filepath, 'rb')
 
-      (label, parsedLabel) = self.getPDSLabel(img)
-
-      image_dims = self.getLinesAndSamples(parsedLabel)
-      img_min_max_vals = self.getValidMinMax(parsedLabel)
-      self.__ignore_value = self.getMissingConstant(parsedLabel)
-
-
-      # MAGIC VALUE? -- need to formalize this to rid ourselves of bad points
-      img.seek(28)
-      # Crop off 4 lines
-      img.seek(4*image_dims[0])
+      image_dims, img_min_max_vals = self.readLabel(img)
 
       # HiRISE images (and most others?) have 1m x 1m pixels
       pixel_scale=(1, 1)
@@ -644,6 +1001,18 @@ class hirise_dtm_importer(object):
       # Set the properties of the image in a manageable object
       img_props = image_properties( image_name, image_dims, pixel_scale )
 
+      if self.__tiles and numpy is None:
+        print("Tiled import needs numpy, importing a single mesh")
+      elif self.__tiles:
+        obs = self.executeTiles(img, img_props, img_min_max_vals)
+        img.close()
+        return self.addObjects(obs)
+
+      if numpy is not None:
+        ob_new = self.executeArray(img, img_props, img_min_max_vals)
+        img.close()
+        return self.addObjects([ob_new])
+
       # Get an iterator to iterate over lines
       image_iter = self.getImage(img, img_props)
 
@@ -685,21 +1054,26 @@ class hirise_dtm_importer(object):
       if img:
         img.close()
 
-      # Add mesh object to the current scene
+      return self.addObjects([ob_new])
+
+    def addObjects(self, obs_new):
+      # Add mesh objects to the current scene
       scene = self.__context.scene
-      scene.objects.link(ob_new)
+      for ob_new in obs_new:
+        scene.objects.link(ob_new)
       scene.update()
 
       # deselect other objects
       bpy.ops.object.select_all(action='DESELECT')
 
       # scene.objects.active = ob_new
-      # Select the new mesh
-      ob_new.select = True
+      # Select the new meshes
+      for ob_new in obs_new:
+        ob_new.select = True
 
       return ('FINISHED',)
 
-def load(operator, context, filepath, scale, bin_mode, cropVars):
+def load(operator, context, filepath, scale, bin_mode, cropVars, tileVars=False):
     print("Bin Mode: %s" % bin_mode)
     print("Scale: %f" % scale)
     importer = hirise_dtm_importer(context,filepath)
@@ -707,7 +1081,32 @@ def load(operator, context, filepath, scale, bin_mode, cropVars):
     importer.scale( scale )
     if cropVars:
         importer.crop( cropVars[0], cropVars[1], cropVars[2], cropVars[3] )
+    if tileVars:
+        importer.tiles( tileVars[0], tileVars[1], tileVars[2], tileVars[3] )
     importer.execute()
 
     print("Loading %s" % filepath)
     return {'FINISHED'}
+
+def tile_worker(job_path, result_path):
+    """ bins tiles listed in a job file written by binTilesJobs(), saves their heights to result_path """
+    import pickle
+    with open(job_path, "rb") as f:
+      job = pickle.load(f)
+
+    importer = hirise_dtm_importer(None, job["filepath"])
+    importer.scale( job["scale"] )
+    if job["crop"]:
+      importer.crop( *job["crop"] )
+
+    img = open(job["filepath"], 'rb')
+    image_dims, img_min_max_vals = importer.readLabel(img)
+    img_props = image_properties( os.path.basename(job["filepath"]), image_dims, (1, 1) )
+    heights = importer.binTiles(img, img_props, img_min_max_vals, job["todo"])
+    img.close()
+
+    numpy.savez(result_path, **{"tile%d" % i: tile_heights for i, tile_heights in enumerate(heights)})
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--tile-worker"]:
+      tile_worker(sys.argv[2], sys.argv[3])
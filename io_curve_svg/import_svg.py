@@ -18,8 +18,9 @@
 
 # <pep8 compliant>
 
+import array
 import re
-import xml.dom.minidom
+import xml.sax
 from math import cos, sin, tan, atan2, pi, ceil
 
 import bpy
@@ -46,6 +47,15 @@ SVGEmptyStyles = {'useFill': None,
                   'fill': None}
 
 
+SVGFloatRE = re.compile(r'[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?')
+SVGSeparatorsRE = re.compile(r'[\s,]*')
+
+# Commands or numbers of path data. Any other character is ignored,
+# "1." (missed fractional part, Inkscape sometimes writes it) is a number.
+SVGPathTokenRE = re.compile(r'([MmZzLlHhVvCcSsQqTtAa])|'
+                            r'([-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)')
+
+
 def SVGParseFloat(s, i=0):
     """
     Parse first float value from string
@@ -53,77 +63,35 @@ def SVGParseFloat(s, i=0):
     Returns value as string
     """
 
-    start = i
-    n = len(s)
-    token = ''
-
     # Skip leading whitespace characters
-    while i < n and (s[i].isspace() or s[i] == ','):
-        i += 1
+    i = SVGSeparatorsRE.match(s, i).end()
 
-    if i == n:
+    if i == len(s):
         return None, i
 
-    # Read sign
-    if s[i] == '-':
-        token += '-'
-        i += 1
-    elif s[i] == '+':
-        i += 1
-
-    # Read integer part
-    if s[i].isdigit():
-        while i < n and s[i].isdigit():
-            token += s[i]
-            i += 1
-
-    # Fractional part
-    if i < n and s[i] == '.':
-        token += '.'
-        i += 1
-
-        if s[i].isdigit():
-            while i < n and s[i].isdigit():
-                token += s[i]
-                i += 1
-        elif s[i].isspace() or s[i] == ',':
-            # Inkscape sometimes uses weird float format with missed
-            # fractional part after dot. Suppose zero fractional part
-            # for this case
-            pass
-        else:
-            raise Exception('Invalid float value near ' + s[start:start + 10])
-
-    # Degree
-    if i < n and (s[i] == 'e' or s[i] == 'E'):
-        token += s[i]
-        i += 1
-        if s[i] == '+' or s[i] == '-':
-            token += s[i]
-            i += 1
-
-            if s[i].isdigit():
-                while i < n and s[i].isdigit():
-                    token += s[i]
-                    i += 1
-            else:
-                raise Exception('Invalid float value near ' +
-                    s[start:start + 10])
-        else:
-            raise Exception('Invalid float value near ' + s[start:start + 10])
+    match = SVGFloatRE.match(s, i)
+    if match is None:
+        raise Exception('Invalid float value near ' + s[i:i + 10])
 
-    return token, i
+    return match.group(), match.end()
 
 
-def SVGCreateCurve():
+def SVGCreateCurve(context, cu=None):
     """
     Create new curve object to hold splines in
+
+    Existing curve data can be given to create an instance of it
     """
 
-    cu = bpy.data.curves.new("Curve", 'CURVE')
+    if cu is None:
+        cu = bpy.data.curves.new("Curve", 'CURVE')
+
     obj = bpy.data.objects.new("Curve", cu)
     bpy.context.scene.objects.link(obj)
 
+    if context['curves'] is not None:
+        context['curves'].append(obj)
+
     return obj
 
 
@@ -135,6 +103,40 @@ def SVGFinishCurve():
     pass
 
 
+def SVGCreateSplineData():
+    """
+    Create new spline definition
+
+    Coordinates are flat arrays of (x, y) pairs, one pair per point
+    """
+
+    return {'co': array.array('d'),
+            'handle_left': array.array('d'),
+            'handle_right': array.array('d'),
+            'handle_left_type': [],
+            'handle_right_type': [],
+            'closed': False}
+
+
+def SVGTransformCoords(matrix, coords):
+    """
+    Transform flat array of (x, y) SVG coords
+
+    Returns flat array of (x, y, z) coords
+    """
+
+    (m00, m01, m02, m03), (m10, m11, m12, m13), (m20, m21, m22, m23) = matrix[0], matrix[1], matrix[2]
+    xs = coords[0::2]
+    ys = coords[1::2]
+
+    result = array.array('f', (0.0,)) * (len(xs) * 3)
+    result[0::3] = array.array('f', [m00 * x + m01 * y + m03 for x, y in zip(xs, ys)])
+    result[1::3] = array.array('f', [m10 * x + m11 * y + m13 for x, y in zip(xs, ys)])
+    result[2::3] = array.array('f', [m20 * x + m21 * y + m23 for x, y in zip(xs, ys)])
+
+    return result
+
+
 def SVGFlipHandle(x, y, x1, y1):
     """
     Flip handle around base point
@@ -456,29 +458,8 @@ class SVGPathData:
         d - the definition of the outline of a shape
         """
 
-        spaces = ' ,\t'
-        commands = {'m', 'l', 'h', 'v', 'c', 's', 'q', '', 't', 'a', 'z'}
-        tokens = []
-
-        i = 0
-        n = len(d)
-        while i < n:
-            c = d[i]
-
-            if c in spaces:
-                pass
-            elif c.lower() in commands:
-                tokens.append(c)
-            elif c in ['-', '.'] or c.isdigit():
-                token, last_char = SVGParseFloat(d, i)
-                tokens.append(token)
-
-                # in most cases len(token) and (last_char - i) are the same
-                # but with whitespace or ',' prefix they are not.
-
-                i += (last_char - i) - 1
-
-            i += 1
+        # Commands are kept as strings, numbers converted to floats
+        tokens = [cmd or float(number) for cmd, number in SVGPathTokenRE.findall(d)]
 
         self._data = tokens
         self._index = 0
@@ -529,12 +510,14 @@ class SVGPathData:
         Return coordinate created from current token and move to next token
         """
 
-        token = self.next()
+        return self.next()
 
-        if token is None:
-            return None
+    def hasCoord(self):
+        """
+        Check if current token is a coordinate (not a command)
+        """
 
-        return float(token)
+        return self._index < self._len and self._data[self._index].__class__ is float
 
 
 class SVGPathParser:
@@ -610,56 +593,53 @@ class SVGPathParser:
         to current point coordinate
         """
 
-        if self._spline is None:
-            self._spline = {'points': [],
-                            'closed': False}
+        spline = self._spline
+
+        if spline is None:
+            spline = self._spline = SVGCreateSplineData()
 
-            self._splines.append(self._spline)
+            self._splines.append(spline)
 
-        if len(self._spline['points']) > 0:
+        elif spline['handle_left_type']:
             # Not sure bout specifications, but Illustrator could create
             # last point at the same position, as start point (which was
             # reached by MoveTo command) to set needed handle coords.
             # It's also could use last point at last position to make path
             # filled.
 
-            first = self._spline['points'][0]
-            if abs(first['x'] - x) < 1e-6 and abs(first['y'] - y) < 1e-6:
+            co = spline['co']
+            if abs(co[0] - x) < 1e-6 and abs(co[1] - y) < 1e-6:
                 if handle_left is not None:
-                    first['handle_left'] = handle_left
-                    first['handle_left_type'] = 'FREE'
+                    spline['handle_left'][0:2] = array.array('d', handle_left)
+                    spline['handle_left_type'][0] = 'FREE'
 
                 if handle_left_type != 'VECTOR':
-                    first['handle_left_type'] = handle_left_type
+                    spline['handle_left_type'][0] = handle_left_type
 
-                if self._data.eof() or self._data.lookupNext().lower() == 'm':
-                    self._spline['closed'] = True
+                if self._data.eof() or self._data.lookupNext() in {'m', 'M'}:
+                    spline['closed'] = True
 
                 return
 
-        point = {'x': x,
-                 'y': y,
-
-                 'handle_left': handle_left,
-                 'handle_left_type': handle_left_type,
-
-                 'handle_right': handle_right,
-                 'handle_right_type': handle_right_type}
-
-        self._spline['points'].append(point)
+        # Vector handles are recalculated, only free ones need coordinates
+        spline['co'].extend((x, y))
+        spline['handle_left'].extend((x, y) if handle_left is None else handle_left)
+        spline['handle_right'].extend((x, y) if handle_right is None else handle_right)
+        spline['handle_left_type'].append(handle_left_type)
+        spline['handle_right_type'].append(handle_right_type)
 
     def _updateHandle(self, handle=None, handle_type=None):
         """
         Update right handle of previous point when adding new point to spline
         """
 
-        point = self._spline['points'][-1]
+        spline = self._spline
 
         if handle_type is not None:
-            point['handle_right_type'] = handle_type
+            spline['handle_right_type'][-1] = handle_type
 
         if handle is not None:
-            point['handle_right'] = handle
+            spline['handle_right'][-2:] = array.array('d', handle)
 
     def _pathMoveTo(self, code):
         """
@@ -672,8 +652,7 @@ class SVGPathParser:
         self._spline = None  # Flag to start new spline
         self._point = (x, y)
 
-        cur = self._data.cur()
-        while cur is not None and not cur.isalpha():
+        while self._data.hasCoord():
             x, y = self._getCoordPair(relative, self._point)
 
             if self._spline is None:
@@ -682,7 +661,6 @@ class SVGPathParser:
             self._appendPoint(x, y)
 
             self._point = (x, y)
-            cur = self._data.cur()
 
         self._handle = None
 
@@ -693,8 +671,7 @@ class SVGPathParser:
 
         c = code.lower()
 
-        cur = self._data.cur()
-        while cur is not None and not cur.isalpha():
+        while self._data.hasCoord():
             if c == 'l':
                 x, y = self._getCoordPair(code == 'l', self._point)
             elif c == 'h':
@@ -715,7 +692,6 @@ class SVGPathParser:
             self._appendPoint(x, y)
 
             self._point = (x, y)
-            cur = self._data.cur()
 
         self._handle = None
 
@@ -725,8 +701,7 @@ class SVGPathParser:
         """
 
         c = code.lower()
-        cur = self._data.cur()
-        while cur is not None and not cur.isalpha():
+        while self._data.hasCoord():
             if c == 'c':
                 x1, y1 = self._getCoordPair(code.islower(), self._point)
                 x2, y2 = self._getCoordPair(code.islower(), self._point)
@@ -754,7 +729,6 @@ class SVGPathParser:
 
             self._point = (x, y)
             self._handle = (x2, y2)
-            cur = self._data.cur()
 
     def _pathCurveToQT(self, code):
         """
@@ -762,9 +736,8 @@ class SVGPathParser:
         """
 
         c = code.lower()
-        cur = self._data.cur()
 
-        while cur is not None and not cur.isalpha():
+        while self._data.hasCoord():
             if c == 'q':
                 x1, y1 = self._getCoordPair(code.islower(), self._point)
             else:
@@ -787,7 +760,6 @@ class SVGPathParser:
 
             self._point = (x, y)
             self._handle = (x1, y1)
-            cur = self._data.cur()
 
     def _calcArc(self, rx, ry, ang, fa, fs, x, y):
         """
@@ -893,21 +865,18 @@ class SVGPathParser:
         Elliptical arc CurveTo path command
         """
 
-        cur = self._data.cur()
-
-        while cur is not None and not cur.isalpha():
-            rx = float(self._data.next())
-            ry = float(self._data.next())
-            ang = float(self._data.next()) / 180 * pi
-            fa = float(self._data.next())
-            fs = float(self._data.next())
+        while self._data.hasCoord():
+            rx = self._data.next()
+            ry = self._data.next()
+            ang = self._data.next() / 180 * pi
+            fa = self._data.next()
+            fs = self._data.next()
             x, y = self._getCoordPair(code.islower(), self._point)
 
             self._calcArc(rx, ry, ang, fa, fs, x, y)
 
             self._point = (x, y)
             self._handle = None
-            cur = self._data.cur()
 
     def _pathClose(self, code):
         """
@@ -917,8 +886,8 @@ class SVGPathParser:
         if self._spline:
             self._spline['closed'] = True
 
-            cv = self._spline['points'][0]
-            self._point = (cv['x'], cv['y'])
+            co = self._spline['co']
+            self._point = (co[0], co[1])
 
     def parse(self):
         """
@@ -973,14 +942,18 @@ class SVGGeometry:
 
         if hasattr(node, 'getAttribute'):
             defs = context['defines']
+            # Only keep geometries which are referenced, if known
+            refs = context['references']
 
             attr_id = node.getAttribute('id')
             if attr_id and defs.get('#' + attr_id) is None:
-                defs['#' + attr_id] = self
+                if refs is None or '#' + attr_id in refs:
+                    defs['#' + attr_id] = self
 
             className = node.getAttribute('class')
             if className and defs.get(className) is None:
-                defs[className] = self
+                if refs is None or className in refs:
+                    defs[className] = self
 
     def _pushRect(self, rect):
         """
@@ -1077,21 +1050,46 @@ class SVGGeometry:
         Create real geometries
         """
 
+        context = self._context
+
         if self._creating:
+            # Cycle, created geometries depend on where it started
+            context['cycle'] = True
             return
 
+        if context['created'] is not None:
+            context['created'].add(self)
+
         self._creating = True
 
+        state = self.pushCreateState()
+
+        self._doCreateGeom(instancing)
+
+        self.popCreateState(state)
+
+        self._creating = False
+
+    def pushCreateState(self):
+        """
+        Push state needed to create geometries of this node and its children
+
+        Returns state to be given to popCreateState
+        """
+
         matrix = self.getTransformMatrix()
         if matrix is not None:
             self._pushMatrix(matrix)
 
-        self._doCreateGeom(instancing)
+        return matrix
 
-        if matrix is not None:
-            self._popMatrix()
+    def popCreateState(self, state):
+        """
+        Pop state pushed by pushCreateState
+        """
 
-        self._creating = False
+        if state is not None:
+            self._popMatrix()
 
 
 class SVGGeometryContainer(SVGGeometry):
@@ -1117,21 +1115,39 @@ class SVGGeometryContainer(SVGGeometry):
         Parse XML node to memory
         """
 
-        if type(self._node) is xml.dom.minidom.Element:
-            self._styles = SVGParseStyles(self._node, self._context)
-
-        self._pushStyle(self._styles)
+        self.parseBegin()
 
         for node in self._node.childNodes:
-            if type(node) is not xml.dom.minidom.Element:
-                continue
-
             ob = parseAbstractNode(node, self._context)
             if ob is not None:
                 self._geometries.append(ob)
 
+        self.parseEnd()
+
+    def parseBegin(self):
+        """
+        Start parsing, children nodes are parsed with container styles
+        """
+
+        if hasattr(self._node, 'getAttribute'):
+            self._styles = SVGParseStyles(self._node, self._context)
+
+        self._pushStyle(self._styles)
+
+    def parseEnd(self):
+        """
+        Finish parsing
+        """
+
         self._popStyle()
 
+    def appendGeometry(self, geom):
+        """
+        Append parsed child geometry
+        """
+
+        self._geometries.append(geom)
+
     def _doCreateGeom(self, instancing):
         """
         Create real geometries
@@ -1185,7 +1201,7 @@ class SVGGeometryPATH(SVGGeometry):
         Create real geometries
         """
 
-        ob = SVGCreateCurve()
+        ob = SVGCreateCurve(self._context)
         cu = ob.data
 
         if self._node.getAttribute('id'):
@@ -1197,31 +1213,32 @@ class SVGGeometryPATH(SVGGeometry):
         else:
             cu.dimensions = '3D'
 
+        matrix = self._context['matrix']
+
         for spline in self._splines:
-            act_spline = None
-            for point in spline['points']:
-                co = self._transformCoord((point['x'], point['y']))
+            handle_left_types = spline['handle_left_type']
+            handle_right_types = spline['handle_right_type']
+            if not handle_left_types:
+                continue
 
-                if act_spline is None:
-                    cu.splines.new('BEZIER')
+            act_spline = cu.splines.new('BEZIER')
+            act_spline.use_cyclic_u = spline['closed']
 
-                    act_spline = cu.splines[-1]
-                    act_spline.use_cyclic_u = spline['closed']
-                else:
-                    act_spline.bezier_points.add()
+            bezier_points = act_spline.bezier_points
+            bezier_points.add(len(handle_left_types) - 1)
 
-                bezt = act_spline.bezier_points[-1]
-                bezt.co = co
+            for bezt, handle_left_type, handle_right_type in zip(bezier_points,
+                                                                  handle_left_types,
+                                                                  handle_right_types):
+                bezt.handle_left_type = handle_left_type
+                bezt.handle_right_type = handle_right_type
 
-                bezt.handle_left_type = point['handle_left_type']
-                if point['handle_left'] is not None:
-                    handle = point['handle_left']
-                    bezt.handle_left = self._transformCoord(handle)
+            bezier_points.foreach_set('co', SVGTransformCoords(matrix, spline['co']))
+            bezier_points.foreach_set('handle_left', SVGTransformCoords(matrix, spline['handle_left']))
+            bezier_points.foreach_set('handle_right', SVGTransformCoords(matrix, spline['handle_right']))
 
-                bezt.handle_right_type = point['handle_right_type']
-                if point['handle_right'] is not None:
-                    handle = point['handle_right']
-                    bezt.handle_right = self._transformCoord(handle)
+            # Recalculate vector handles from final coordinates
+            bezier_points[0].handle_left_type = handle_left_types[0]
 
         SVGFinishCurve()
 
@@ -1279,13 +1296,20 @@ class SVGGeometryUSE(SVGGeometry):
     User of referenced elements
     """
 
+    def getReference(self):
+        """
+        Get referenced geometry, None if not parsed (yet)
+        """
+
+        return self._context['defines'].get(self._node.getAttribute('xlink:href'))
+
     def _doCreateGeom(self, instancing):
         """
         Create real geometries
         """
 
         ref = self._node.getAttribute('xlink:href')
-        geom = self._context['defines'].get(ref)
+        geom = self.getReference()
 
         if geom is not None:
             rect = SVGRectFromNode(self._node, self._context)
@@ -1293,12 +1317,67 @@ class SVGGeometryUSE(SVGGeometry):
 
             self._pushMatrix(self.getNodeMatrix())
 
-            geom.createGeom(True)
+            self._createInstance(ref, geom, rect)
 
             self._popMatrix()
 
             self._popRect()
 
+    def _createInstance(self, ref, geom, rect):
+        """
+        Create instance of referenced geometry
+
+        Referenced geometry is created once (for a given display rectangle)
+        in its own space, next uses only create objects sharing its curves.
+        """
+
+        context = self._context
+        key = (ref, rect)
+        matrix = context['matrix']
+        created = context['created']
+        instance = context['instances'].get(key)
+
+        if instance is not None and any(g._creating for g in instance[1]):
+            # Would be cut by a cycle here
+            instance = None
+
+        if instance is None:
+            curves = context['curves']
+            cycle = context['cycle']
+            context['matrix'] = Matrix()
+            context['curves'] = []
+            context['created'] = set()
+            context['cycle'] = False
+
+            geom.createGeom(True)
+
+            objects = context['curves']
+            geoms = context['created']
+            geom_cycle = context['cycle']
+            context['matrix'] = matrix
+            context['curves'] = curves
+            context['created'] = created
+            context['cycle'] = cycle or geom_cycle
+
+            # Only share geometries created the same way everywhere
+            if not geom_cycle:
+                context['instances'][key] = ([(ob.data, ob.matrix_world.copy()) for ob in objects], geoms)
+
+            for ob in objects:
+                ob.matrix_world = matrix * ob.matrix_world
+
+            if curves is not None:
+                curves.extend(objects)
+
+        else:
+            obs, geoms = instance
+            for cu, local_matrix in obs:
+                ob = SVGCreateCurve(context, cu)
+                ob.matrix_world = matrix * local_matrix
+
+        if created is not None:
+            created.update(geoms)
+
 
 class SVGGeometryRECT(SVGGeometry):
     """
@@ -1403,7 +1482,7 @@ class SVGGeometryRECT(SVGGeometry):
         radius = (rx, ry)
 
         # Geometry creation
-        ob = SVGCreateCurve()
+        ob = SVGCreateCurve(self._context)
         cu = ob.data
 
         if self._styles['useFill']:
@@ -1513,7 +1592,7 @@ class SVGGeometryELLIPSE(SVGGeometry):
             return
 
         # Create circle
-        ob = SVGCreateCurve()
+        ob = SVGCreateCurve(self._context)
         cu = ob.data
 
         if self._styles['useFill']:
@@ -1627,7 +1706,7 @@ class SVGGeometryLINE(SVGGeometry):
         y2 = SVGParseCoord(self._y2, crect[1])
 
         # Create cline
-        ob = SVGCreateCurve()
+        ob = SVGCreateCurve(self._context)
         cu = ob.data
 
         coords = [(x1, y1), (x2, y2)]
@@ -1698,7 +1777,7 @@ class SVGGeometryPOLY(SVGGeometry):
         Create real geometries
         """
 
-        ob = SVGCreateCurve()
+        ob = SVGCreateCurve(self._context)
         cu = ob.data
 
         if self._closed and self._styles['useFill']:
@@ -1755,11 +1834,13 @@ class SVGGeometrySVG(SVGGeometryContainer):
     Main geometry holder
     """
 
-    def _doCreateGeom(self, instancing):
+    def pushCreateState(self):
         """
-        Create real geometries
+        Push state needed to create geometries of this node and its children
         """
 
+        state = super().pushCreateState()
+
         rect = SVGRectFromNode(self._node, self._context)
 
         matrix = self.getNodeMatrix()
@@ -1774,17 +1855,38 @@ class SVGGeometrySVG(SVGGeometryContainer):
         self._pushMatrix(matrix)
         self._pushRect(rect)
 
-        super()._doCreateGeom(False)
+        return state
+
+    def popCreateState(self, state):
+        """
+        Pop state pushed by pushCreateState
+        """
 
         self._popRect()
         self._popMatrix()
 
+        super().popCreateState(state)
+
+    def _doCreateGeom(self, instancing):
+        """
+        Create real geometries
+        """
+
+        super()._doCreateGeom(False)
+
 
 class SVGLoader(SVGGeometryContainer):
     """
     SVG file loader
+
+    File is read by a streaming parser, twice: first to collect references
+    to elements, then to parse elements. Drawn geometries are created as
+    soon as their element ends, only referenced ones are kept in memory.
     """
 
+    __slots__ = ('_filepath',  # Path of SVG file
+                 '_deferred')  # Instances of elements defined after their use
+
     def getTransformMatrix(self):
         """
         Get matrix created from "transform" attribute
@@ -1800,8 +1902,6 @@ class SVGLoader(SVGGeometryContainer):
         Initialize SVG loader
         """
 
-        node = xml.dom.minidom.parse(filepath)
-
         m = Matrix()
         m = m * Matrix.Scale(1.0 / 90.0 * 0.3048 / 12.0, 4, Vector((1.0, 0.0, 0.0)))
         m = m * Matrix.Scale(-1.0 / 90.0 * 0.3048 / 12.0, 4, Vector((0.0, 1.0, 0.0)))
@@ -1809,6 +1909,11 @@ class SVGLoader(SVGGeometryContainer):
         rect = (1, 1)
 
         self._context = {'defines': {},
+                         'references': None,
+                         'instances': {},
+                         'curves': None,
+                         'created': None,
+                         'cycle': False,
                          'transform': [],
                          'rects': [rect],
                          'rect': rect,
@@ -1817,7 +1922,265 @@ class SVGLoader(SVGGeometryContainer):
                          'styles': [None],
                          'style': None}
 
-        super().__init__(node, self._context)
+        super().__init__(None, self._context)
+
+        self._filepath = filepath
+        self._deferred = []
+
+    def parse(self):
+        """
+        Parse SVG file, creating real geometries of drawn elements
+        """
+
+        handler = SVGReferencesHandler()
+        SVGParseFile(self._filepath, handler)
+        self._context['references'] = handler.references
+
+        self.parseBegin()
+        SVGParseFile(self._filepath, SVGContentHandler(self, self._context))
+        self.parseEnd()
+
+    def deferInstance(self, geom, parents):
+        """
+        Create given USE geometry once the whole file is parsed
+
+        parents - geometries containing it, considered as still being
+                  created then (so cycles are handled as without deferring)
+        """
+
+        context = self._context
+        state = {'transform': context['transform'][:],
+                 'matrix': context['matrix'].copy(),
+                 'rects': context['rects'][:],
+                 'rect': context['rect']}
+
+        self._deferred.append((geom, parents, state))
+
+    def _doCreateGeom(self, instancing):
+        """
+        Create real geometries
+        """
+
+        context = self._context
+
+        for geom, parents, state in self._deferred:
+            current = {key: context[key] for key in state}
+            context.update(state)
+            for parent in parents:
+                parent._creating = True
+
+            geom.createGeom(instancing)
+
+            for parent in parents:
+                parent._creating = False
+            context.update(current)
+
+        self._deferred = []
+
+
+#### SVG streaming parser ####
+
+
+class SVGNode:
+    """
+    XML element, as given by the streaming parser
+    """
+
+    __slots__ = ('tagName',  # Qualified name of element
+                 'childNodes',  # Children are handled by the parser
+                 '_attributes')  # Attributes values by qualified name
+
+    def __init__(self, tagName, attributes):
+        """
+        Initialize new element
+        """
+
+        self.tagName = tagName
+        self.childNodes = ()
+        self._attributes = dict(attributes.items())
+
+    def getAttribute(self, name):
+        """
+        Get attribute value, empty string if not set
+        """
+
+        return self._attributes.get(name, '')
+
+
+class SVGReferencesHandler(xml.sax.ContentHandler):
+    """
+    Collect references to elements
+    """
+
+    def __init__(self):
+        """
+        Initialize handler
+        """
+
+        super().__init__()
+
+        self.references = set()
+
+    def startElement(self, name, attrs):
+        """
+        Element start
+        """
+
+        ref = attrs.get('xlink:href')
+        if ref:
+            self.references.add(ref)
+
+
+class SVGContentHandler(xml.sax.ContentHandler):
+    """
+    Parse elements to geometries, create drawn ones when they end
+    """
+
+    def __init__(self, loader, context):
+        """
+        Initialize handler
+        """
+
+        super().__init__()
+
+        self._loader = loader
+        self._context = context
+
+        # Open elements: (geometry, is drawn, is kept, creation state)
+        self._stack = [(loader, True, False, None)]
+        self._open = {loader}
+
+        # Geometries known to be parsed, with all geometries they use
+        self._complete = set()
+
+    def _isDefined(self, geom):
+        """
+        Check if geometry is referenced by id or class
+        """
+
+        node = geom._node
+        defs = self._context['defines']
+
+        attr_id = node.getAttribute('id')
+        if attr_id and defs.get('#' + attr_id) is geom:
+            return True
+
+        className = node.getAttribute('class')
+        return bool(className) and defs.get(className) is geom
+
+    def _isComplete(self, geom):
+        """
+        Check if geometry and all geometries it uses are completely parsed
+        """
+
+        visited = set()
+        todo = [geom]
+
+        while todo:
+            geom = todo.pop()
+            if geom in visited or geom in self._complete:
+                continue
+            if geom in self._open:
+                return False
+
+            visited.add(geom)
+
+            if isinstance(geom, SVGGeometryUSE):
+                ref = geom.getReference()
+                if ref is None:
+                    return False
+                todo.append(ref)
+            elif isinstance(geom, SVGGeometryContainer):
+                todo.extend(geom.getGeometries())
+
+        self._complete.update(visited)
+
+        return True
+
+    def startElement(self, name, attrs):
+        """
+        Element start
+        """
+
+        parent, drawn, kept, state = self._stack[-1]
+
+        geomClass = None
+        if isinstance(parent, SVGGeometryContainer):
+            geomClass = SVGGeometryClassFromName(name)
+
+        if geomClass is None:
+            # Unsupported element, its children are ignored as well
+            self._stack.append((None, False, False, None))
+            return
+
+        geom = geomClass(SVGNode(name, attrs), self._context)
+
+        if kept:
+            parent.appendGeometry(geom)
+        else:
+            kept = self._isDefined(geom)
+
+        # Referenced elements are only created by USE geometries
+        drawn = drawn and geomClass not in {SVGGeometryDEFS, SVGGeometrySYMBOL}
+
+        state = None
+        if isinstance(geom, SVGGeometryContainer):
+            geom.parseBegin()
+
+            if drawn:
+                state = geom.pushCreateState()
+        else:
+            geom.parse()
+
+        self._stack.append((geom, drawn, kept, state))
+        self._open.add(geom)
+
+    def endElement(self, name):
+        """
+        Element end
+        """
+
+        geom, drawn, kept, state = self._stack.pop()
+
+        if geom is None:
+            return
+
+        self._open.discard(geom)
+
+        if isinstance(geom, SVGGeometryContainer):
+            geom.parseEnd()
+
+            if drawn:
+                geom.popCreateState(state)
+
+        elif drawn:
+            if isinstance(geom, SVGGeometryUSE):
+                ref = geom.getReference()
+
+                if ref is not None and ref in self._open:
+                    # Cycle, use of one of its parents
+                    return
+
+                if ref is None or not self._isComplete(ref):
+                    # Defined after this use, or uses such geometry: its
+                    # instance would miss geometries not parsed yet
+                    parents = [frame[0] for frame in self._stack if frame[0] is not None]
+                    self._loader.deferInstance(geom, parents)
+                    return
+
+            geom.createGeom(False)
+
+
+def SVGParseFile(filepath, handler):
+    """
+    Run streaming parser with given content handler
+    """
+
+    parser = xml.sax.make_parser()
+    # Don't fetch external DTD
+    parser.setFeature(xml.sax.handler.feature_external_ges, False)
+    parser.setContentHandler(handler)
+    parser.parse(filepath)
 
 
 svgGeometryClasses = {
@@ -1835,13 +2198,17 @@ svgGeometryClasses = {
     'g': SVGGeometryG}
 
 
-def parseAbstractNode(node, context):
-    name = node.tagName.lower()
+def SVGGeometryClassFromName(name):
+    name = name.lower()
 
     if name.startswith('svg:'):
         name = name[4:]
 
-    geomClass = svgGeometryClasses.get(name)
+    return svgGeometryClasses.get(name)
+
+
+def parseAbstractNode(node, context):
+    geomClass = SVGGeometryClassFromName(node.tagName)
 
     if geomClass is not None:
         ob = geomClass(node, context)
@@ -1871,7 +2238,7 @@ def load(operator, context, filepath=""):
     # non SVG files can give useful messages.
     try:
         load_svg(filepath)
-    except (xml.parsers.expat.ExpatError, UnicodeEncodeError) as e:
+    except (xml.sax.SAXParseException, UnicodeEncodeError) as e:
         import traceback
         traceback.print_exc()
 
@@ -19,7 +19,7 @@
 bl_info = {
     "name": "Export Pointcache Format(.pc2)",
     "author": "Florian Meyer (tstscr)",
-    "version": (1, 1),
+    "version": (1, 2),
     "blender": (2, 71, 0),
     "location": "File > Export > Pointcache (.pc2)",
     "description": "Export mesh Pointcache data (.pc2)",
@@ -50,8 +50,7 @@ import time
 import math
 import struct
 
-def get_sampled_frames(start, end, sampling):
-    return [math.modf(start + x * sampling) for x in range(int((end - start) / sampling) + 1)]
+from point_cache_utils import PointCacheWriter, sample_frames
 
 def do_export(context, props, filepath):
     mat_x90 = mathutils.Matrix.Rotation(-math.pi/2, 4, 'X')
@@ -60,45 +59,37 @@ def do_export(context, props, filepath):
     start = props.range_start
     end = props.range_end
     sampling = float(props.sampling)
-    apply_modifiers = props.apply_modifiers
-    me = ob.to_mesh(sc, apply_modifiers, 'PREVIEW')
-    vertCount = len(me.vertices)
-    sampletimes = get_sampled_frames(start, end, sampling)
+    orig_frame = sc.frame_current
+    sampletimes = sample_frames(start, end, sampling)
     sampleCount = len(sampletimes)
 
+    file = open(filepath, "wb")
+    writer = PointCacheWriter(file, sc, ob, 'little',
+                              matrix=mat_x90 if props.rot_x90 else None,
+                              use_world_space=props.world_space,
+                              apply_modifiers=props.apply_modifiers)
+
     # Create the header
     headerFormat='<12siiffi'
     headerStr = struct.pack(headerFormat, b'POINTCACHE2\0',
-                            1, vertCount, start, sampling, sampleCount)
-
-    file = open(filepath, "wb")
+                            1, writer.vertex_count, start, sampling, sampleCount)
     file.write(headerStr)
 
-    for frame in sampletimes:
-        sc.frame_set(int(frame[1]), frame[0])  # stupid modf() gives decimal part first!
-        me = ob.to_mesh(sc, apply_modifiers, 'PREVIEW')
-
-        if len(me.vertices) != vertCount:
-            file.close()
-            try:
-                remove(filepath)
-            except:
-                empty = open(filepath, 'w')
-                empty.write('DUMMIFILE - export failed\n')
-                empty.close()
-            print('Export failed. Vertexcount of Object is not constant')
-            return False
-
-        if props.world_space:
-            me.transform(ob.matrix_world)
-        if props.rot_x90:
-            me.transform(mat_x90)
-
-        for v in me.vertices:
-            thisVertex = struct.pack('<fff', float(v.co[0]),
-                                             float(v.co[1]),
-                                             float(v.co[2]))
-            file.write(thisVertex)
+    try:
+        for frame, subframe in sampletimes:
+            writer.write_sample(frame, subframe)
+    except ValueError as e:
+        file.close()
+        try:
+            remove(filepath)
+        except:
+            empty = open(filepath, 'w')
+            empty.write('DUMMIFILE - export failed\n')
+            empty.close()
+        print('Export failed. %s' % e)
+        return False
+    finally:
+        sc.frame_set(orig_frame)
 
     file.flush()
     file.close()
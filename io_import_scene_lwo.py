@@ -62,6 +62,8 @@ bl_info= {
 
 
 import os
+import sys
+import array
 import struct
 import chunk
 
@@ -345,6 +347,65 @@ def read_vx(pointdata):
     return index, size
 
 
+def read_vx_at(data, offset):
+    """Read a variable-length index at offset, without slicing the data.
+
+    Returns the index and the offset just after it."""
+    if data[offset] != 255:
+        return (data[offset] << 8) | data[offset+1], offset+2
+    else:
+        return (data[offset+1] << 16) | (data[offset+2] << 8) | data[offset+3], offset+4
+
+
+# Indices below this value are always stored as 2 byte VX.
+VX_SHORT_LIMIT= 0xFF00
+
+
+def read_be_array(typecode, data):
+    """Convert a block of big-endian values to an array in one go."""
+    values= array.array(typecode)
+    values.frombytes(data[:len(data) - (len(data) % values.itemsize)])
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+def iter_vmap(vmap_bytes, offset, dim, pnts_count, pols_count=None):
+    """
+    Decode the records of a VMAP (or VMAD when pols_count is given) body.
+
+    Yields (pnt_id, values) or (pnt_id, pol_id, values) tuples, values being
+    a tuple of dim floats. When every index fits in 2 bytes the records have a
+    fixed size and are decoded with one compiled struct, otherwise the VX
+    indices are decoded incrementally.
+    """
+    values_struct= struct.Struct(">%df" % dim)
+    is_vmad= pols_count is not None
+
+    if pnts_count < VX_SHORT_LIMIT and (not is_vmad or pols_count < VX_SHORT_LIMIT):
+        record= struct.Struct((">HH%df" if is_vmad else ">H%df") % dim)
+        end= offset + ((len(vmap_bytes) - offset) // record.size) * record.size
+        if is_vmad:
+            for rec in record.iter_unpack(memoryview(vmap_bytes)[offset:end]):
+                yield rec[0], rec[1], rec[2:]
+        else:
+            for rec in record.iter_unpack(memoryview(vmap_bytes)[offset:end]):
+                yield rec[0], rec[1:]
+        return
+
+    unpack_from= values_struct.unpack_from
+    values_size= values_struct.size
+    chunk_len= len(vmap_bytes)
+    while offset < chunk_len:
+        pnt_id, offset= read_vx_at(vmap_bytes, offset)
+        if is_vmad:
+            pol_id, offset= read_vx_at(vmap_bytes, offset)
+            yield pnt_id, pol_id, unpack_from(vmap_bytes, offset)
+        else:
+            yield pnt_id, unpack_from(vmap_bytes, offset)
+        offset+= values_size
+
+
 def read_tags(tag_bytes, object_tags):
     """Read the object's Tags chunk."""
     offset= 0
@@ -407,85 +468,56 @@ def read_layr_5(layr_bytes, object_layers):
 def read_pnts(pnt_bytes, object_layers):
     """Read the layer's points."""
     print("\tReading Layer ("+object_layers[-1].name+") Points")
-    offset= 0
-    chunk_len= len(pnt_bytes)
+    pnts= read_be_array('f', pnt_bytes[:len(pnt_bytes) - (len(pnt_bytes) % 12)])
+    pivot= object_layers[-1].pivot
 
-    while offset < chunk_len:
-        pnts= struct.unpack(">fff", pnt_bytes[offset:offset+12])
-        offset+= 12
-        # Re-order the points so that the mesh has the right pitch,
-        # the pivot already has the correct order.
-        pnts= [pnts[0] - object_layers[-1].pivot[0],\
-               pnts[2] - object_layers[-1].pivot[1],\
-               pnts[1] - object_layers[-1].pivot[2]]
-        object_layers[-1].pnts.append(pnts)
+    # Re-order the points so that the mesh has the right pitch,
+    # the pivot already has the correct order.
+    object_layers[-1].pnts.extend([[x - pivot[0], z - pivot[1], y - pivot[2]]
+                                   for x, y, z in zip(pnts[0::3], pnts[1::3], pnts[2::3])])
 
 
 def read_weightmap(weight_bytes, object_layers):
     """Read a weight map's values."""
-    chunk_len= len(weight_bytes)
     offset= 2
     name, name_len= read_lwostring(weight_bytes[offset:])
     offset+= name_len
-    weights= []
-
-    while offset < chunk_len:
-        pnt_id, pnt_id_len= read_vx(weight_bytes[offset:offset+4])
-        offset+= pnt_id_len
-        value,= struct.unpack(">f", weight_bytes[offset:offset+4])
-        offset+= 4
-        weights.append([pnt_id, value])
+    weights= [[pnt_id, value[0]] for pnt_id, value in
+              iter_vmap(weight_bytes, offset, 1, len(object_layers[-1].pnts))]
 
     object_layers[-1].wmaps[name]= weights
 
 
 def read_morph(morph_bytes, object_layers, is_abs):
     """Read an endomorph's relative or absolute displacement values."""
-    chunk_len= len(morph_bytes)
     offset= 2
     name, name_len= read_lwostring(morph_bytes[offset:])
     offset+= name_len
     deltas= []
+    layer_pnts= object_layers[-1].pnts
 
-    while offset < chunk_len:
-        pnt_id, pnt_id_len= read_vx(morph_bytes[offset:offset+4])
-        offset+= pnt_id_len
-        pos= struct.unpack(">fff", morph_bytes[offset:offset+12])
-        offset+= 12
-        pnt= object_layers[-1].pnts[pnt_id]
-
+    for pnt_id, pos in iter_vmap(morph_bytes, offset, 3, len(layer_pnts)):
         if is_abs:
             deltas.append([pnt_id, pos[0], pos[2], pos[1]])
         else:
             # Swap the Y and Z to match Blender's pitch.
+            pnt= layer_pnts[pnt_id]
             deltas.append([pnt_id, pnt[0]+pos[0], pnt[1]+pos[2], pnt[2]+pos[1]])
 
-        object_layers[-1].morphs[name]= deltas
+    object_layers[-1].morphs[name]= deltas
 
 
 def read_colmap(col_bytes, object_layers):
     """Read the RGB or RGBA color map."""
-    chunk_len= len(col_bytes)
     dia,= struct.unpack(">H", col_bytes[0:2])
     offset= 2
     name, name_len= read_lwostring(col_bytes[offset:])
     offset+= name_len
     colors= {}
 
-    if dia == 3:
-        while offset < chunk_len:
-            pnt_id, pnt_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pnt_id_len
-            col= struct.unpack(">fff", col_bytes[offset:offset+12])
-            offset+= 12
-            colors[pnt_id]= (col[0], col[1], col[2])
-    elif dia == 4:
-        while offset < chunk_len:
-            pnt_id, pnt_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pnt_id_len
-            col= struct.unpack(">ffff", col_bytes[offset:offset+16])
-            offset+= 16
-            colors[pnt_id]= (col[0], col[1], col[2])
+    if dia == 3 or dia == 4:
+        for pnt_id, col in iter_vmap(col_bytes, offset, dia, len(object_layers[-1].pnts)):
+            colors[pnt_id]= col[:3]
 
     if name in object_layers[-1].colmaps:
         if "PointMap" in object_layers[-1].colmaps[name]:
@@ -498,7 +530,6 @@ def read_colmap(col_bytes, object_layers):
 
 def read_color_vmad(col_bytes, object_layers, last_pols_count):
     """Read the Discontinous (per-polygon) RGB values."""
-    chunk_len= len(col_bytes)
     dia,= struct.unpack(">H", col_bytes[0:2])
     offset= 2
     name, name_len= read_lwostring(col_bytes[offset:])
@@ -506,35 +537,16 @@ def read_color_vmad(col_bytes, object_layers, last_pols_count):
     colors= {}
     abs_pid= len(object_layers[-1].pols) - last_pols_count
 
-    if dia == 3:
-        while offset < chunk_len:
-            pnt_id, pnt_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pnt_id_len
-            pol_id, pol_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pol_id_len
-
+    if dia == 3 or dia == 4:
+        for pnt_id, pol_id, col in iter_vmap(col_bytes, offset, dia,
+                                             len(object_layers[-1].pnts),
+                                             len(object_layers[-1].pols)):
             # The PolyID in a VMAD can be relative, this offsets it.
             pol_id+= abs_pid
-            col= struct.unpack(">fff", col_bytes[offset:offset+12])
-            offset+= 12
             if pol_id in colors:
-                colors[pol_id][pnt_id]= (col[0], col[1], col[2])
+                colors[pol_id][pnt_id]= col[:3]
             else:
-                colors[pol_id]= dict({pnt_id: (col[0], col[1], col[2])})
-    elif dia == 4:
-        while offset < chunk_len:
-            pnt_id, pnt_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pnt_id_len
-            pol_id, pol_id_len= read_vx(col_bytes[offset:offset+4])
-            offset+= pol_id_len
-
-            pol_id+= abs_pid
-            col= struct.unpack(">ffff", col_bytes[offset:offset+16])
-            offset+= 16
-            if pol_id in colors:
-                colors[pol_id][pnt_id]= (col[0], col[1], col[2])
-            else:
-                colors[pol_id]= dict({pnt_id: (col[0], col[1], col[2])})
+                colors[pol_id]= {pnt_id: col[:3]}
 
     if name in object_layers[-1].colmaps:
         if "FaceMap" in object_layers[-1].colmaps[name]:
@@ -547,18 +559,10 @@ def read_color_vmad(col_bytes, object_layers, last_pols_count):
 
 def read_uvmap(uv_bytes, object_layers):
     """Read the simple UV coord values."""
-    chunk_len= len(uv_bytes)
     offset= 2
     name, name_len= read_lwostring(uv_bytes[offset:])
     offset+= name_len
-    uv_coords= {}
-
-    while offset < chunk_len:
-        pnt_id, pnt_id_len= read_vx(uv_bytes[offset:offset+4])
-        offset+= pnt_id_len
-        pos= struct.unpack(">ff", uv_bytes[offset:offset+8])
-        offset+= 8
-        uv_coords[pnt_id]= (pos[0], pos[1])
+    uv_coords= dict(iter_vmap(uv_bytes, offset, 2, len(object_layers[-1].pnts)))
 
     if name in object_layers[-1].uvmaps:
         if "PointMap" in object_layers[-1].uvmaps[name]:
@@ -571,26 +575,20 @@ def read_uvmap(uv_bytes, object_layers):
 
 def read_uv_vmad(uv_bytes, object_layers, last_pols_count):
     """Read the Discontinous (per-polygon) uv values."""
-    chunk_len= len(uv_bytes)
     offset= 2
     name, name_len= read_lwostring(uv_bytes[offset:])
     offset+= name_len
     uv_coords= {}
     abs_pid= len(object_layers[-1].pols) - last_pols_count
 
-    while offset < chunk_len:
-        pnt_id, pnt_id_len= read_vx(uv_bytes[offset:offset+4])
-        offset+= pnt_id_len
-        pol_id, pol_id_len= read_vx(uv_bytes[offset:offset+4])
-        offset+= pol_id_len
-
+    for pnt_id, pol_id, pos in iter_vmap(uv_bytes, offset, 2,
+                                         len(object_layers[-1].pnts),
+                                         len(object_layers[-1].pols)):
         pol_id+= abs_pid
-        pos= struct.unpack(">ff", uv_bytes[offset:offset+8])
-        offset+= 8
         if pol_id in uv_coords:
-            uv_coords[pol_id][pnt_id]= (pos[0], pos[1])
+            uv_coords[pol_id][pnt_id]= pos
         else:
-            uv_coords[pol_id]= dict({pnt_id: (pos[0], pos[1])})
+            uv_coords[pol_id]= {pnt_id: pos}
 
     if name in object_layers[-1].uvmaps:
         if "FaceMap" in object_layers[-1].uvmaps[name]:
@@ -603,7 +601,6 @@ def read_uv_vmad(uv_bytes, object_layers, last_pols_count):
 
 def read_weight_vmad(ew_bytes, object_layers):
     """Read the VMAD Weight values."""
-    chunk_len= len(ew_bytes)
     offset= 2
     name, name_len= read_lwostring(ew_bytes[offset:])
     if name != "Edge Weight":
@@ -614,14 +611,9 @@ def read_weight_vmad(ew_bytes, object_layers):
     # normal pointing at you). This gives edges a 'direction' which is used
     # when it comes to storing CC edge weight values. The weight is given
     # to the point preceding the edge that the weight belongs to.
-    while offset < chunk_len:
-        pnt_id, pnt_id_len = read_vx(ew_bytes[offset:offset+4])
-        offset+= pnt_id_len
-        pol_id, pol_id_len= read_vx(ew_bytes[offset:offset+4])
-        offset+= pol_id_len
-        weight,= struct.unpack(">f", ew_bytes[offset:offset+4])
-        offset+= 4
-
+    for pnt_id, pol_id, (weight,) in iter_vmap(ew_bytes, offset, 1,
+                                               len(object_layers[-1].pnts),
+                                               len(object_layers[-1].pols)):
         face_pnts= object_layers[-1].pols[pol_id]
         try:
             # Find the point's location in the polygon's point list
@@ -643,20 +635,30 @@ def read_pols(pol_bytes, object_layers):
     print("\tReading Layer ("+object_layers[-1].name+") Polygons")
     offset= 0
     pols_count = len(pol_bytes)
-    old_pols_count= len(object_layers[-1].pols)
-
-    while offset < pols_count:
-        pnts_count,= struct.unpack(">H", pol_bytes[offset:offset+2])
-        offset+= 2
-        all_face_pnts= []
-        for j in range(pnts_count):
-            face_pnt, data_size= read_vx(pol_bytes[offset:offset+4])
-            offset+= data_size
-            all_face_pnts.append(face_pnt)
+    layer_pols= object_layers[-1].pols
+    old_pols_count= len(layer_pols)
+
+    if len(object_layers[-1].pnts) < VX_SHORT_LIMIT:
+        # Every point index is 2 bytes, decode the whole chunk as shorts.
+        pol_shorts= read_be_array('H', pol_bytes)
+        pols_count= len(pol_shorts)
+        while offset < pols_count:
+            pnts_count= pol_shorts[offset]
+            offset+= 1
+            layer_pols.append(pol_shorts[offset:offset+pnts_count].tolist())
+            offset+= pnts_count
+    else:
+        while offset < pols_count:
+            pnts_count= (pol_bytes[offset] << 8) | pol_bytes[offset+1]
+            offset+= 2
+            all_face_pnts= []
+            for j in range(pnts_count):
+                face_pnt, offset= read_vx_at(pol_bytes, offset)
+                all_face_pnts.append(face_pnt)
 
-        object_layers[-1].pols.append(all_face_pnts)
+            layer_pols.append(all_face_pnts)
 
-    return len(object_layers[-1].pols) - old_pols_count
+    return len(layer_pols) - old_pols_count
 
 
 def read_pols_5(pol_bytes, object_layers):
@@ -666,26 +668,29 @@ def read_pols_5(pol_bytes, object_layers):
     """
     print("\tReading Layer ("+object_layers[-1].name+") Polygons")
     offset= 0
-    chunk_len= len(pol_bytes)
-    old_pols_count= len(object_layers[-1].pols)
+    # Everything in a LWOB polygon chunk is 2 bytes, decode it in one go.
+    pol_shorts= read_be_array('H', pol_bytes)
+    chunk_len= len(pol_shorts)
+    layer_pols= object_layers[-1].pols
+    surf_tags= object_layers[-1].surf_tags
+    old_pols_count= len(layer_pols)
     poly= 0
 
     while offset < chunk_len:
-        pnts_count,= struct.unpack(">H", pol_bytes[offset:offset+2])
-        offset+= 2
-        all_face_pnts= []
-        for j in range(pnts_count):
-            face_pnt,= struct.unpack(">H", pol_bytes[offset:offset+2])
-            offset+= 2
-            all_face_pnts.append(face_pnt)
-
-        object_layers[-1].pols.append(all_face_pnts)
-        sid,= struct.unpack(">h", pol_bytes[offset:offset+2])
-        offset+= 2
+        pnts_count= pol_shorts[offset]
+        offset+= 1
+        layer_pols.append(pol_shorts[offset:offset+pnts_count].tolist())
+        offset+= pnts_count
+
+        # The surface index is signed.
+        sid= pol_shorts[offset]
+        offset+= 1
+        if sid >= 0x8000:
+            sid-= 0x10000
         sid= abs(sid) - 1
-        if sid not in object_layers[-1].surf_tags:
-            object_layers[-1].surf_tags[sid]= []
-        object_layers[-1].surf_tags[sid].append(poly)
+        if sid not in surf_tags:
+            surf_tags[sid]= []
+        surf_tags[sid].append(poly)
         poly+= 1
 
     return len(object_layers[-1].pols) - old_pols_count
@@ -702,8 +707,7 @@ def read_bones(bone_bytes, object_layers):
         offset+= 2
         all_bone_pnts= []
         for j in range(pnts_count):
-            bone_pnt, data_size= read_vx(bone_bytes[offset:offset+4])
-            offset+= data_size
+            bone_pnt, offset= read_vx_at(bone_bytes, offset)
             all_bone_pnts.append(bone_pnt)
 
         object_layers[-1].bones.append(all_bone_pnts)
@@ -722,8 +726,7 @@ def read_bone_tags(tag_bytes, object_layers, object_tags, type):
         return
 
     while offset < chunk_len:
-        pid, pid_len= read_vx(tag_bytes[offset:offset+4])
-        offset+= pid_len
+        pid, offset= read_vx_at(tag_bytes, offset)
         tid,= struct.unpack(">H", tag_bytes[offset:offset+2])
         offset+= 2
         bone_dict[pid]= object_tags[tid]
@@ -738,8 +741,7 @@ def read_surf_tags(tag_bytes, object_layers, last_pols_count):
     # Read in the PolyID/Surface Index pairs.
     abs_pid= len(object_layers[-1].pols) - last_pols_count
     while offset < chunk_len:
-        pid, pid_len= read_vx(tag_bytes[offset:offset+4])
-        offset+= pid_len
+        pid, offset= read_vx_at(tag_bytes, offset)
         sid,= struct.unpack(">H", tag_bytes[offset:offset+2])
         offset+=2
         if sid not in object_layers[-1].surf_tags:
@@ -141,6 +141,10 @@ class ImportPDB(Operator, ImportHelper):
     use_sticks_bonds = BoolProperty(
         name="Bonds", default=False,
         description="Show double and tripple bonds")
+    use_sticks_infer = BoolProperty(
+        name="Infer bonds", default=False,
+        description="Add sticks between atoms closer than their covalent "
+                    "radii (for files without CONECT records)")
     sticks_dist = FloatProperty(
         name="", default = 1.1, min=1.0, max=3.0,
         description="Distance between sticks measured in stick diameter")
@@ -192,6 +196,9 @@ class ImportPDB(Operator, ImportHelper):
         row.prop(self, "use_sticks_type")
         row = box.row()
         row.active = self.use_sticks
+        row.prop(self, "use_sticks_infer")
+        row = box.row()
+        row.active = self.use_sticks
         col = row.column()
         if self.use_sticks_type == '0' or self.use_sticks_type == '2':
             col.prop(self, "sticks_sectors")
@@ -244,6 +251,7 @@ class ImportPDB(Operator, ImportHelper):
                       self.use_sticks_color,
                       self.use_sticks_smooth,
                       self.use_sticks_bonds,
+                      self.use_sticks_infer,
                       self.use_sticks_one_object,
                       self.use_sticks_one_object_nr,
                       self.sticks_unit_length,
@@ -155,6 +155,15 @@ ELEMENTS_DEFAULT = (
 # custom data file.
 ELEMENTS = []
 
+# The elements of the list above, with the upper case short name as key.
+ELEMENTS_LOOKUP = {}
+
+# Sticks are inferred between atoms, which are closer than the sum of their
+# covalent radii plus this tolerance (in Angstrom) ...
+BOND_TOLERANCE = 0.4
+# ... and not closer than this (overlapping atoms, alternate locations).
+BOND_DISTANCE_MIN = 0.4
+
 # This is the class, which stores the properties for one element.
 class ElementProp(object):
     __slots__ = ('number', 'name', 'short_name', 'color', 'radii', 'radii_ionic')
@@ -194,6 +203,7 @@ class StickProp(object):
 def read_elements():
 
     del ELEMENTS[:]
+    ELEMENTS_LOOKUP.clear()
 
     for item in ELEMENTS_DEFAULT:
 
@@ -206,6 +216,7 @@ def read_elements():
         li = ElementProp(item[0],item[1],item[2],item[3],
                                      radii,radii_ionic)
         ELEMENTS.append(li)
+        ELEMENTS_LOOKUP.setdefault(str.upper(li.short_name), li)
 
 
 # The function, which reads the x,y,z positions of all atoms in a PDB 
@@ -284,28 +295,23 @@ def read_pdb_file(filepath_pdb, radiustype):
                     short_name2 = line[76:78]
                 
                 if short_name2.isalpha() == True:
-                    FOUND = False
-                    for element in ELEMENTS:
-                        if str.upper(short_name2) == str.upper(element.short_name):
-                            FOUND = True
-                            break
+                    FOUND = str.upper(short_name2) in ELEMENTS_LOOKUP
                     if FOUND == False:
                         short_name = short_name2
             # ....................................................... to here.
             
             # Go through all elements and find the element of the current atom.
             FLAG_FOUND = False
-            for element in ELEMENTS:
-                if str.upper(short_name) == str.upper(element.short_name):
-                    # Give the atom its proper names, color and radius:
-                    short_name = str.upper(element.short_name)
-                    name = element.name
-                    # int(radiustype) => type of radius:
-                    # pre-defined (0), atomic (1) or van der Waals (2)
-                    radius = float(element.radii[int(radiustype)])
-                    color = element.color
-                    FLAG_FOUND = True
-                    break
+            element = ELEMENTS_LOOKUP.get(str.upper(short_name))
+            if element is not None:
+                # Give the atom its proper names, color and radius:
+                short_name = str.upper(element.short_name)
+                name = element.name
+                # int(radiustype) => type of radius:
+                # pre-defined (0), atomic (1) or van der Waals (2)
+                radius = float(element.radii[int(radiustype)])
+                color = element.color
+                FLAG_FOUND = True
 
             # Is it a vacancy or an 'unknown atom' ?
             if FLAG_FOUND == False:
@@ -351,11 +357,16 @@ def read_pdb_file(filepath_pdb, radiustype):
     return (Number_of_total_atoms, all_atoms)
 
 
-# The function, which reads the sticks in a PDB file.
-def read_pdb_file_sticks(filepath_pdb, use_sticks_bonds, all_atoms):
+# The function, which reads the sticks in a PDB file. With use_sticks_infer,
+# sticks are also added between all atoms, which are close enough to be
+# bonded (see infer_sticks).
+def read_pdb_file_sticks(filepath_pdb, use_sticks_bonds, all_atoms,
+                         use_sticks_infer=False):
 
     # The list of all sticks.
     all_sticks = []
+    # The atom pairs of all sticks, the smaller atom number first.
+    all_sticks_keys = set()
 
     # Open the PDB file.
     filepath_pdb_p = open(filepath_pdb, "r")
@@ -450,18 +461,12 @@ def read_pdb_file_sticks(filepath_pdb, use_sticks_bonds, all_atoms):
             # Note that in a PDB file, sticks of one atom pair can appear a
             # couple of times. (Only god knows why ...)
             # So, does a stick between the considered atoms already exist?
-            FLAG_BAR = False
-            for k in range(Number_of_sticks):
-                if ((all_sticks[k].atom1 == atom1 and all_sticks[k].atom2 == atom2) or
-                    (all_sticks[k].atom2 == atom1 and all_sticks[k].atom1 == atom2)):
-                    sticks_double += 1
-                    # If yes, then FLAG on 'True'.
-                    FLAG_BAR       = True
-                    break
-
-            # If the stick is not yet registered (FLAG_BAR == False), then
-            # register it!
-            if FLAG_BAR == False:
+            key = (atom1, atom2) if atom1 < atom2 else (atom2, atom1)
+            if key in all_sticks_keys:
+                sticks_double += 1
+            # If the stick is not yet registered, then register it!
+            else:
+                all_sticks_keys.add(key)
                 all_sticks.append(StickProp(atom1,atom2,number,dist_n))
                 Number_of_sticks += 1
                 j += 1
@@ -470,10 +475,75 @@ def read_pdb_file_sticks(filepath_pdb, use_sticks_bonds, all_atoms):
         line = line.rstrip()
 
     filepath_pdb_p.close()
+
+    if use_sticks_infer == True:
+        for key in infer_sticks(all_atoms):
+            if key not in all_sticks_keys:
+                all_sticks_keys.add(key)
+                all_sticks.append(StickProp(key[0],key[1],1,None))
     
     return all_sticks
 
 
+# The function, which finds all atom pairs closer than the sum of their
+# covalent radii (+ BOND_TOLERANCE). The atoms are sorted into a uniform
+# grid with cells as large as the longest possible bond, such that only
+# atoms in neighbouring cells need to be compared. Returns a list of atom
+# number pairs, counted from 1 like in the CONECT records.
+def infer_sticks(all_atoms):
+
+    # Positions and covalent radii of all real atoms (no TER and vacancies).
+    atoms = []
+    for i, atom in enumerate(all_atoms):
+        if atom.element in {"TER", "VAC"}:
+            continue
+        element = ELEMENTS_LOOKUP.get(atom.element)
+        if element is None:
+            continue
+        atoms.append((i + 1, atom.location[:], float(element.radii[1])))
+
+    if atoms == []:
+        return []
+
+    size = 2.0 * max(atom[2] for atom in atoms) + BOND_TOLERANCE
+    grid = {}
+    for atom in atoms:
+        x, y, z = atom[1]
+        key = (int(x // size), int(y // size), int(z // size))
+        if key in grid:
+            grid[key].append(atom)
+        else:
+            grid[key] = [atom]
+
+    # Half of the neighbouring cells, the other half is covered by the
+    # cells on the opposite side. The cell itself is handled separately.
+    offsets = [(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1)
+               for k in (-1, 0, 1) if (i, j, k) > (0, 0, 0)]
+
+    distance_min = BOND_DISTANCE_MIN * BOND_DISTANCE_MIN
+    sticks = []
+
+    def add_sticks(atom1, others):
+        n1, (x1, y1, z1), r1 = atom1
+        for n2, (x2, y2, z2), r2 in others:
+            dist = (x1 - x2) ** 2 + (y1 - y2) ** 2 + (z1 - z2) ** 2
+            dist_max = r1 + r2 + BOND_TOLERANCE
+            if distance_min < dist < dist_max * dist_max:
+                sticks.append((n1, n2) if n1 < n2 else (n2, n1))
+
+    for (kx, ky, kz), cell in grid.items():
+        for i, atom1 in enumerate(cell):
+            add_sticks(atom1, cell[i + 1:])
+            for ox, oy, oz in offsets:
+                other = grid.get((kx + ox, ky + oy, kz + oz))
+                if other is not None:
+                    add_sticks(atom1, other)
+
+    sticks.sort()
+
+    return sticks
+
+
 # Function, which produces a cylinder. All is somewhat easy to undertsand.
 def build_stick(radius, length, sectors):
 
@@ -1138,6 +1208,7 @@ def import_pdb(Ball_type,
                use_sticks_color,
                use_sticks_smooth,
                use_sticks_bonds,
+               use_sticks_infer,
                use_sticks_one_object,
                use_sticks_one_object_nr,
                Stick_unit, Stick_dist,
@@ -1226,7 +1297,8 @@ def import_pdb(Ball_type,
 
     all_sticks = read_pdb_file_sticks(filepath_pdb, 
                                       use_sticks_bonds, 
-                                      all_atoms)
+                                      all_atoms,
+                                      use_sticks_infer)
 
     #
     # So far, all atoms, sticks and materials have been registered.
@@ -98,7 +98,9 @@ POS_TRACK_TAG = 0xB020
 ROT_TRACK_TAG = 0xB021
 SCL_TRACK_TAG = 0xB022
 
+import array
 import struct
+import sys
 
 # So 3ds max can open files, limit names to 12 in length
 # this is verry annoying for filenames!
@@ -330,6 +332,53 @@ class _3ds_array(object):
         return '(%d items)' % len(self.values)
 
 
+class _3ds_packed_array(object):
+    """Class representing an array of fixed-size items for a 3ds file, stored as one typed buffer.
+
+    Written the same way as a _3ds_array (a _3ds_ushort item count followed by the items),
+    but the items are kept in an array.array and written with a single call,
+    so no per-item Python objects are needed for vertices, UVs or faces.
+    """
+    __slots__ = "typecode", "item_len", "values", "size"
+
+    def __init__(self, typecode, values, item_len=1):
+        self.typecode = typecode
+        self.item_len = item_len
+        self.values = values
+        self.size = SZ_SHORT + len(values) * array.array(typecode).itemsize
+
+    def __len__(self):
+        return len(self.values) // self.item_len
+
+    def get_size(self):
+        return self.size
+
+    def validate(self):
+        # values may have been built in a wider type than the file allows (indices over 65535).
+        return len(self) <= 65535 and self.values.typecode == self.typecode
+
+    def write(self, file):
+        _3ds_ushort(len(self)).write(file)
+        values = self.values
+        if sys.byteorder != 'little':
+            values = array.array(self.typecode, values)
+            values.byteswap()
+        file.write(values.tobytes())
+
+    def __str__(self):
+        return '(%d items)' % len(self)
+
+
+def _3ds_ushort_values(values):
+    """Return an array.array('H') of *values*, or array.array('I') when they don't fit in an ushort.
+
+    The wide version is caught by _3ds_packed_array.validate."""
+    try:
+        return array.array('H', values)
+    except OverflowError:
+        return array.array('I', values)
+
+
 class _3ds_named_variable(object):
     """Convenience class for named variables."""
 
@@ -376,15 +425,21 @@ class _3ds_chunk(object):
 
         The name is mostly for debugging purposes."""
         self.variables.append(_3ds_named_variable(name, var))
+        self.size.value = 0
 
     def add_subchunk(self, chunk):
         """Add a subchunk."""
         self.subchunks.append(chunk)
+        self.size.value = 0
 
     def get_size(self):
         """Calculate the size of the chunk and return it.
 
-        The sizes of the variables and subchunks are used to determine this chunk\'s size."""
+        The sizes of the variables and subchunks are used to determine this chunk\'s size.
+        The size is computed once, bottom-up, and cached until a variable or subchunk is added
+        to this chunk (the tree is expected to be complete before sizes are requested)."""
+        if self.size.value:
+            return self.size.value
         tmpsize = self.ID.get_size() + self.size.get_size()
         for variable in self.variables:
             tmpsize += variable.get_size()
@@ -603,209 +658,160 @@ def make_material_chunk(material, image):
     return material_chunk
 
 
-class tri_wrapper(object):
-    """Class representing a triangle.
-
-    Used when converting faces to triangles"""
-
-    __slots__ = "vertex_index", "mat", "image", "faceuvs", "offset"
-
-    def __init__(self, vindex=(0, 0, 0), mat=None, image=None, faceuvs=None):
-        self.vertex_index = vindex
-        self.mat = mat
-        self.image = image
-        self.faceuvs = faceuvs
-        self.offset = [0, 0, 0]  # offset indices
-
-
 def extract_triangles(mesh):
     """Extract triangles from a mesh.
 
-    If the mesh contains quads, they will be split into triangles."""
-    tri_list = []
-    do_uv = bool(mesh.tessface_uv_textures)
-
-    img = None
-    for i, face in enumerate(mesh.tessfaces):
-        f_v = face.vertices
-
-        uf = mesh.tessface_uv_textures.active.data[i] if do_uv else None
+    If the mesh contains quads, they will be split into triangles.
+    Returns the tessface vertex indices (4 per face, as in `vertices_raw`) and
+    the tessface corners used by each triangle (3 per triangle, as indices into
+    the 4-per-face corner arrays)."""
+    tessfaces = mesh.tessfaces
+    tot_face = len(tessfaces)
 
-        if do_uv:
-            f_uv = uf.uv
-            img = uf.image if uf else None
-            if img is not None:
-                img = img.name
+    face_verts = array.array('i', [0]) * (tot_face * 4)
+    tessfaces.foreach_get("vertices_raw", face_verts)
 
+    tri_corners = array.array('i')
+    for c in range(0, tot_face * 4, 4):
         # if f_v[3] == 0:
-        if len(f_v) == 3:
-            new_tri = tri_wrapper((f_v[0], f_v[1], f_v[2]), face.material_index, img)
-            if (do_uv):
-                new_tri.faceuvs = uv_key(f_uv[0]), uv_key(f_uv[1]), uv_key(f_uv[2])
-            tri_list.append(new_tri)
-
+        if face_verts[c + 3] == 0:
+            tri_corners.extend((c, c + 1, c + 2))
         else:  # it's a quad
-            new_tri = tri_wrapper((f_v[0], f_v[1], f_v[2]), face.material_index, img)
-            new_tri_2 = tri_wrapper((f_v[0], f_v[2], f_v[3]), face.material_index, img)
-
-            if (do_uv):
-                new_tri.faceuvs = uv_key(f_uv[0]), uv_key(f_uv[1]), uv_key(f_uv[2])
-                new_tri_2.faceuvs = uv_key(f_uv[0]), uv_key(f_uv[2]), uv_key(f_uv[3])
-
-            tri_list.append(new_tri)
-            tri_list.append(new_tri_2)
+            tri_corners.extend((c, c + 1, c + 2, c, c + 2, c + 3))
 
-    return tri_list
+    return face_verts, tri_corners
 
 
-def remove_face_uv(verts, tri_list):
+def remove_face_uv(vert_cos, face_verts, face_uvs, tri_corners):
     """Remove face UV coordinates from a list of triangles.
 
     Since 3ds files only support one pair of uv coordinates for each vertex, face uv coordinates
     need to be converted to vertex uv coordinates. That means that vertices need to be duplicated when
-    there are multiple uv coordinates per vertex."""
+    there are multiple uv coordinates per vertex.
+    Returns flat vertex coordinates, vertex UVs and triangle vertex indices."""
 
-    # initialize a list of UniqueLists, one per vertex:
-    #uv_list = [UniqueList() for i in xrange(len(verts))]
-    unique_uvs = [{} for i in range(len(verts))]
+    # one {uv_key: offset} dict per vertex:
+    unique_uvs = [{} for i in range(len(vert_cos) // 3)]
+    corner_offsets = array.array('i', [0]) * len(tri_corners)
 
-    # for each face uv coordinate, add it to the UniqueList of the vertex
-    for tri in tri_list:
-        for i in range(3):
-            # store the index into the UniqueList for future reference:
-            # offset.append(uv_list[tri.vertex_index[i]].add(_3ds_point_uv(tri.faceuvs[i])))
+    # for each face uv coordinate, add it to the dict of the vertex
+    for i, c in enumerate(tri_corners):
+        context_uv_vert = unique_uvs[face_verts[c]]
+        uvkey = uv_key(face_uvs[c * 2:c * 2 + 2])
 
-            context_uv_vert = unique_uvs[tri.vertex_index[i]]
-            uvkey = tri.faceuvs[i]
+        offset = context_uv_vert.get(uvkey)
+        if offset is None:
+            offset = context_uv_vert[uvkey] = len(context_uv_vert)
 
-            offset_index__uv_3ds = context_uv_vert.get(uvkey)
-
-            if not offset_index__uv_3ds:
-                offset_index__uv_3ds = context_uv_vert[uvkey] = len(context_uv_vert), _3ds_point_uv(uvkey)
-
-            tri.offset[i] = offset_index__uv_3ds[0]
-
-    # At this point, each vertex has a UniqueList containing every uv coordinate that is associated with it
-    # only once.
+        corner_offsets[i] = offset
 
     # Now we need to duplicate every vertex as many times as it has uv coordinates and make sure the
     # faces refer to the new face indices:
     vert_index = 0
-    vert_array = _3ds_array()
-    uv_array = _3ds_array()
-    index_list = []
-    for i, vert in enumerate(verts):
-        index_list.append(vert_index)
-
-        pt = _3ds_point_3d(vert.co)  # reuse, should be ok
-        uvmap = [None] * len(unique_uvs[i])
-        for ii, uv_3ds in unique_uvs[i].values():
-            # add a vertex duplicate to the vertex_array for every uv associated with this vertex:
-            vert_array.add(pt)
-            # add the uv coordinate to the uv array:
-            # This for loop does not give uv's ordered by ii, so we create a new map
-            # and add the uv's later
-            # uv_array.add(uv_3ds)
-            uvmap[ii] = uv_3ds
-
-        # Add the uv's in the correct order
-        for uv_3ds in uvmap:
-            # add the uv coordinate to the uv array:
-            uv_array.add(uv_3ds)
-
-        vert_index += len(unique_uvs[i])
+    vert_array = array.array('f')
+    uv_array = array.array('f')
+    index_list = array.array('i', [0]) * len(unique_uvs)
+    for i, context_uv_vert in enumerate(unique_uvs):
+        index_list[i] = vert_index
+
+        co = vert_cos[i * 3:i * 3 + 3]
+        # The dict does not give uv's ordered by offset, so we create a new map
+        # and add the uv's later
+        uvmap = [None] * len(context_uv_vert)
+        for uvkey, ii in context_uv_vert.items():
+            uvmap[ii] = uvkey
+
+        # Add a vertex duplicate and the uv's in the correct order
+        for uvkey in uvmap:
+            vert_array.extend(co)
+            uv_array.extend(uvkey)
+
+        vert_index += len(uvmap)
 
     # Make sure the triangle vertex indices now refer to the new vertex list:
-    for tri in tri_list:
-        for i in range(3):
-            tri.offset[i] += index_list[tri.vertex_index[i]]
-        tri.vertex_index = tri.offset
+    tri_verts = [index_list[face_verts[c]] + offset for c, offset in zip(tri_corners, corner_offsets)]
 
-    return vert_array, uv_array, tri_list
+    return vert_array, uv_array, tri_verts
 
 
-def make_faces_chunk(tri_list, mesh, materialDict):
+def make_faces_chunk(tri_verts, tri_corners, mesh, face_images=None):
     """Make a chunk for the faces.
 
-    Also adds subchunks assigning materials to all faces."""
+    Also adds subchunks assigning materials to all faces.
+    `face_images` holds the image name of every tessface when the mesh has UVs."""
 
     materials = mesh.materials
-    if not materials:
-        mat = None
+    tot_tri = len(tri_verts) // 3
 
     face_chunk = _3ds_chunk(OBJECT_FACES)
-    face_list = _3ds_array()
-
-    if mesh.tessface_uv_textures:
-        # Gather materials used in this mesh - mat/image pairs
-        unique_mats = {}
-        for i, tri in enumerate(tri_list):
 
-            face_list.add(_3ds_face(tri.vertex_index))
+    # 4 ushorts per face, the last zero is only used by 3d studio
+    face_data = array.array('i', [0]) * (tot_tri * 4)
+    tri_verts = array.array('i', tri_verts)
+    for i in range(3):
+        face_data[i::4] = tri_verts[i::3]
+    face_chunk.add_variable("faces", _3ds_packed_array('H', _3ds_ushort_values(face_data), 4))
 
-            if materials:
-                mat = materials[tri.mat]
-                if mat:
-                    mat = mat.name
+    face_mats = array.array('i', [0]) * len(mesh.tessfaces)
+    mesh.tessfaces.foreach_get("material_index", face_mats)
+    mat_names = [(mat.name if mat else None) for mat in materials]
 
-            img = tri.image
+    mat_face_arrays = []
+    if face_images is not None:
+        # Gather materials used in this mesh - mat/image pairs
+        unique_mats = {}
+        for i in range(tot_tri):
+            f_index = tri_corners[i * 3] // 4
+            mat = mat_names[face_mats[f_index]] if mat_names else None
+            img = face_images[f_index]
 
-            try:
-                context_mat_face_array = unique_mats[mat, img][1]
-            except:
+            context_mat_face_array = unique_mats.get((mat, img))
+            if context_mat_face_array is None:
                 name_str = mat if mat else "None"
                 if img:
                     name_str += img
 
-                context_mat_face_array = _3ds_array()
-                unique_mats[mat, img] = _3ds_string(sane_name(name_str)), context_mat_face_array
-
-            context_mat_face_array.add(_3ds_ushort(i))
-            # obj_material_faces[tri.mat].add(_3ds_ushort(i))
+                context_mat_face_array = array.array('i')
+                unique_mats[mat, img] = context_mat_face_array
+                mat_face_arrays.append((name_str, context_mat_face_array))
 
-        face_chunk.add_variable("faces", face_list)
-        for mat_name, mat_faces in unique_mats.values():
-            obj_material_chunk = _3ds_chunk(OBJECT_MATERIAL)
-            obj_material_chunk.add_variable("name", mat_name)
-            obj_material_chunk.add_variable("face_list", mat_faces)
-            face_chunk.add_subchunk(obj_material_chunk)
+            context_mat_face_array.append(i)
 
     else:
-
         obj_material_faces = []
-        obj_material_names = []
-        for m in materials:
-            if m:
-                obj_material_names.append(_3ds_string(sane_name(m.name)))
-                obj_material_faces.append(_3ds_array())
-        n_materials = len(obj_material_names)
-
-        for i, tri in enumerate(tri_list):
-            face_list.add(_3ds_face(tri.vertex_index))
-            if (tri.mat < n_materials):
-                obj_material_faces[tri.mat].add(_3ds_ushort(i))
-
-        face_chunk.add_variable("faces", face_list)
-        for i in range(n_materials):
-            obj_material_chunk = _3ds_chunk(OBJECT_MATERIAL)
-            obj_material_chunk.add_variable("name", obj_material_names[i])
-            obj_material_chunk.add_variable("face_list", obj_material_faces[i])
-            face_chunk.add_subchunk(obj_material_chunk)
+        for mat in mat_names:
+            if mat:
+                obj_material_faces.append(array.array('i'))
+                mat_face_arrays.append((mat, obj_material_faces[-1]))
+            else:
+                obj_material_faces.append(None)
+        n_materials = len(obj_material_faces)
+
+        for i in range(tot_tri):
+            mat_index = face_mats[tri_corners[i * 3] // 4]
+            if mat_index < n_materials and obj_material_faces[mat_index] is not None:
+                obj_material_faces[mat_index].append(i)
+
+    for name_str, mat_faces in mat_face_arrays:
+        obj_material_chunk = _3ds_chunk(OBJECT_MATERIAL)
+        obj_material_chunk.add_variable("name", _3ds_string(sane_name(name_str)))
+        obj_material_chunk.add_variable("face_list", _3ds_packed_array('H', _3ds_ushort_values(mat_faces)))
+        face_chunk.add_subchunk(obj_material_chunk)
 
     return face_chunk
 
 
 def make_vert_chunk(vert_array):
-    """Make a vertex chunk out of an array of vertices."""
+    """Make a vertex chunk out of a flat array of vertex coordinates."""
     vert_chunk = _3ds_chunk(OBJECT_VERTICES)
-    vert_chunk.add_variable("vertices", vert_array)
+    vert_chunk.add_variable("vertices", _3ds_packed_array('f', vert_array, 3))
     return vert_chunk
 
 
 def make_uv_chunk(uv_array):
-    """Make a UV chunk out of an array of UVs."""
+    """Make a UV chunk out of a flat array of UVs."""
     uv_chunk = _3ds_chunk(OBJECT_UV)
-    uv_chunk.add_variable("uv coords", uv_array)
+    uv_chunk.add_variable("uv coords", _3ds_packed_array('f', uv_array, 2))
     return uv_chunk
 
 
@@ -821,16 +827,23 @@ def make_mesh_chunk(mesh, matrix, materialDict):
     """Make a chunk out of a Blender mesh."""
 
     # Extract the triangles from the mesh:
-    tri_list = extract_triangles(mesh)
+    face_verts, tri_corners = extract_triangles(mesh)
+
+    vert_cos = array.array('f', [0.0]) * (len(mesh.vertices) * 3)
+    mesh.vertices.foreach_get("co", vert_cos)
+
+    uv_layer = mesh.tessface_uv_textures.active
+    if uv_layer is not None:
+        face_uvs = array.array('f', [0.0]) * (len(mesh.tessfaces) * 8)
+        uv_layer.data.foreach_get("uv_raw", face_uvs)
+        face_images = [(uf.image.name if uf.image else None) for uf in uv_layer.data]
 
-    if mesh.tessface_uv_textures:
         # Remove the face UVs and convert it to vertex UV:
-        vert_array, uv_array, tri_list = remove_face_uv(mesh.vertices, tri_list)
+        vert_array, uv_array, tri_verts = remove_face_uv(vert_cos, face_verts, face_uvs, tri_corners)
     else:
-        # Add the vertices to the vertex array:
-        vert_array = _3ds_array()
-        for vert in mesh.vertices:
-            vert_array.add(_3ds_point_3d(vert.co))
+        vert_array = vert_cos
+        tri_verts = [face_verts[c] for c in tri_corners]
+        face_images = None
         # no UV at all:
         uv_array = None
 
@@ -841,7 +854,7 @@ def make_mesh_chunk(mesh, matrix, materialDict):
     mesh_chunk.add_subchunk(make_vert_chunk(vert_array))
     # add faces chunk:
 
-    mesh_chunk.add_subchunk(make_faces_chunk(tri_list, mesh, materialDict))
+    mesh_chunk.add_subchunk(make_faces_chunk(tri_verts, tri_corners, mesh, face_images))
 
     # if available, add uv chunk:
     if uv_array:
@@ -985,6 +998,7 @@ def save(operator,
     import bpy
     import mathutils
 
+    import io
     import time
     from bpy_extras.io_utils import create_derived_objects, free_derived_objects
 
@@ -1146,13 +1160,13 @@ def save(operator,
 
     # Check the size:
     primary.get_size()
-    # Open the file for writing:
-    file = open(filepath, 'wb')
 
-    # Recursively write the chunks to file:
-    primary.write(file)
+    # Recursively write the chunks into one buffer, then to file with a single write:
+    buf = io.BytesIO()
+    primary.write(buf)
 
-    # Close the file:
+    file = open(filepath, 'wb')
+    file.write(buf.getvalue())
     file.close()
 
     # Clear name mapping vars, could make locals too
@@ -48,6 +48,7 @@ import bpy
 from bpy.props import (StringProperty,
                        BoolProperty,
                        FloatProperty,
+                       IntProperty,
                        EnumProperty,
                        )
 
@@ -352,6 +353,13 @@ class ExportFBX(bpy.types.Operator, ExportHelper, OrientationHelper):
             min=0.0, max=10.0,  # No simplification to up to 0.05 slope/100 max_frame_step.
             default=1.0,  # default: min slope: 0.005, max frame step: 10.
             )
+    bake_anim_jobs = IntProperty(
+            name="Bake Jobs",
+            description="Number of background Blender processes baking animation stacks (NLA strips and actions) "
+                        "in parallel, 1 to bake everything in this Blender",
+            min=1, max=64,
+            default=1,
+            )
     # Anim - 6.1
     use_anim = BoolProperty(
             name="Animation",
@@ -440,6 +448,7 @@ class ExportFBX(bpy.types.Operator, ExportHelper, OrientationHelper):
             col.prop(self, "bake_anim_use_all_actions")
             col.prop(self, "bake_anim_step")
             col.prop(self, "bake_anim_simplify_factor")
+            col.prop(self, "bake_anim_jobs")
         else:
             layout.prop(self, "use_anim")
             col = layout.column()
@@ -29,11 +29,31 @@ from struct import pack
 import array
 import zlib
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 _BLOCK_SENTINEL_LENGTH = 13
 _BLOCK_SENTINEL_DATA = (b'\0' * _BLOCK_SENTINEL_LENGTH)
 _IS_BIG_ENDIAN = (__import__("sys").byteorder != 'little')
 _HEAD_MAGIC = b'Kaydara FBX Binary\x20\x20\x00\x1a\x00'
 
+# Types accepted as-is by the array properties, numpy arrays are converted
+# to the (little endian) type of the property in one go.
+if numpy is not None:
+    _ARRAY_TYPES = (array.array, numpy.ndarray)
+    _NUMPY_DTYPES = {
+        data_types.ARRAY_INT32: numpy.dtype('<i4'),
+        data_types.ARRAY_INT64: numpy.dtype('<i8'),
+        data_types.ARRAY_FLOAT32: numpy.dtype('<f4'),
+        data_types.ARRAY_FLOAT64: numpy.dtype('<f8'),
+        data_types.ARRAY_BOOL: numpy.dtype('<i1'),
+        data_types.ARRAY_BYTE: numpy.dtype('<u1'),
+    }
+else:
+    _ARRAY_TYPES = (array.array,)
+
 # fbx has very strict CRC rules, all based on file timestamp
 # until we figure these out, write files at a fixed time. (workaround!)
 
@@ -131,15 +151,19 @@ class FBXElem:
         self.props.append(data)
 
     def _add_array_helper(self, data, array_type, prop_type):
-        assert(isinstance(data, array.array))
-        assert(data.typecode == array_type)
+        if numpy is not None and isinstance(data, numpy.ndarray):
+            length = data.size
+            data = numpy.ascontiguousarray(data, dtype=_NUMPY_DTYPES[array_type]).tobytes()
+        else:
+            assert(isinstance(data, array.array))
+            assert(data.typecode == array_type)
 
-        length = len(data)
+            length = len(data)
 
-        if _IS_BIG_ENDIAN:
-            data = data[:]
-            data.byteswap()
-        data = data.tobytes()
+            if _IS_BIG_ENDIAN:
+                data = data[:]
+                data.byteswap()
+            data = data.tobytes()
 
         # mimic behavior of fbxconverter (also common sense)
         # we could make this configurable.
@@ -157,32 +181,32 @@ class FBXElem:
         self.props.append(data)
 
     def add_int32_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_INT32, data)
         self._add_array_helper(data, data_types.ARRAY_INT32, data_types.INT32_ARRAY)
 
     def add_int64_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_INT64, data)
         self._add_array_helper(data, data_types.ARRAY_INT64, data_types.INT64_ARRAY)
 
     def add_float32_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_FLOAT32, data)
         self._add_array_helper(data, data_types.ARRAY_FLOAT32, data_types.FLOAT32_ARRAY)
 
     def add_float64_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_FLOAT64, data)
         self._add_array_helper(data, data_types.ARRAY_FLOAT64, data_types.FLOAT64_ARRAY)
 
     def add_bool_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_BOOL, data)
         self._add_array_helper(data, data_types.ARRAY_BOOL, data_types.BOOL_ARRAY)
 
     def add_byte_array(self, data):
-        if not isinstance(data, array.array):
+        if not isinstance(data, _ARRAY_TYPES):
             data = array.array(data_types.ARRAY_BYTE, data)
         self._add_array_helper(data, data_types.ARRAY_BYTE, data_types.BYTE_ARRAY)
 
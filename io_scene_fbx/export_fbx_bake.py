@@ -0,0 +1,199 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+# Parallel baking of animation takes (FBX AnimStacks), in background Blender processes.
+#
+# Current .blend state is saved to a temp copy, which each worker loads. Workers rebuild the exported objects
+# from the same settings, list the same takes (see export_fbx_bin.fbx_animations_takes), bake their share of them
+# and pickle the resulting animation data (only made of keys strings and AnimationCurveKeys columns).
+# Main process merges them back in takes order, so UUIDs generated from keys remain deterministic.
+# Takes a worker failed to bake are baked in main process.
+#
+# Worker usage (done by bake_takes()):
+#
+#   blender --background --factory-startup tmp.blend \
+#       --python io_scene_fbx/export_fbx_bake.py -- job.pickle result.pickle
+
+
+import os
+import pickle
+import sys
+
+
+# Settings which are Matrix (or None), mathutils types cannot be pickled.
+SETTINGS_MATRICES = {
+    "global_matrix", "global_matrix_inv", "global_matrix_inv_transposed",
+    "bone_correction_matrix", "bone_correction_matrix_inv",
+}
+# Settings not needed (nor picklable) to bake animations.
+SETTINGS_IGNORED = {"report", "media_settings"}
+
+
+def _package_name():
+    # this file also runs as a script, so don't rely on '__package__'.
+    return os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+
+
+def settings_dump(settings):
+    """Return a picklable dict from given FBXExportSettings."""
+    data = {}
+    for key, value in settings._asdict().items():
+        if key in SETTINGS_IGNORED:
+            value = None
+        elif key == "context_objects":
+            value = [ob.name for ob in value]
+        elif key in SETTINGS_MATRICES and value is not None:
+            value = [tuple(row) for row in value]
+        data[key] = value
+    return data
+
+
+def settings_load(data, settings_type):
+    """Return FBXExportSettings from a dict generated by settings_dump(), in current Blender data."""
+    import bpy
+    from mathutils import Matrix
+
+    data = data.copy()
+    data["report"] = _report
+    data["context_objects"] = [bpy.data.objects[name] for name in data["context_objects"]]
+    for key in SETTINGS_MATRICES:
+        if data[key] is not None:
+            data[key] = Matrix(data[key])
+    return settings_type(**data)
+
+
+def _report(type, message):
+    print("%s: %s" % (", ".join(sorted(type)), message))
+
+
+# ----------------------------------------------------------------------------
+# Main (runs in exporting Blender)
+
+def bake_takes(scene_data, takes):
+    """
+    Bake given takes (as returned by fbx_animations_takes) using settings.bake_anim_jobs worker processes.
+    Return a list of animation data (or None), in same order as takes, like fbx_animations_bake().
+    """
+    import subprocess
+    import tempfile
+    import bpy
+    from . import export_fbx_bin
+
+    settings = scene_data.settings
+    jobs = max(1, min(settings.bake_anim_jobs, len(takes)))
+
+    fd, blend_tmp = tempfile.mkstemp(suffix=".blend")
+    os.close(fd)
+    bpy.ops.wm.save_as_mainfile(filepath=blend_tmp, check_existing=False, copy=True)
+
+    settings_data = settings_dump(settings)
+    procs = []
+    for i in range(jobs):
+        # Interleave takes between workers, neighbour takes (e.g. actions of a same object) tend to be alike.
+        todo = list(range(i, len(takes), jobs))
+        fd, job_tmp = tempfile.mkstemp(suffix=".pickle")
+        with open(fd, "wb") as fh:
+            pickle.dump({
+                "scene": scene_data.scene.name,
+                "settings": settings_data,
+                "nbr_takes": len(takes),
+                "todo": todo,
+            }, fh, pickle.HIGHEST_PROTOCOL)
+        fd, result_tmp = tempfile.mkstemp(suffix=".pickle")
+        os.close(fd)
+        cmd = [bpy.app.binary_path, "--background", "--factory-startup", blend_tmp,
+               "--python", os.path.abspath(__file__), "--", job_tmp, result_tmp]
+        procs.append((subprocess.Popen(cmd), job_tmp, result_tmp, todo))
+
+    animations = [None] * len(takes)
+    failed = set()
+    for proc, job_tmp, result_tmp, todo in procs:
+        proc.wait()
+        try:
+            with open(result_tmp, "rb") as fh:
+                result = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            failed.update(todo)
+        else:
+            for idx in todo:
+                animations[idx] = result[idx]
+        os.remove(job_tmp)
+        os.remove(result_tmp)
+    os.remove(blend_tmp)
+
+    if failed:
+        settings.report({'WARNING'}, "%d animation takes could not be baked in background, "
+                                     "baking them locally" % len(failed))
+        for idx, anim in enumerate(export_fbx_bin.fbx_animations_bake(scene_data, takes, failed)):
+            if idx in failed:
+                animations[idx] = anim
+
+    return animations
+
+
+# ----------------------------------------------------------------------------
+# Worker (runs inside background Blender)
+
+def bake_job(job):
+    """
+    Bake the takes of given job in current (freshly loaded) .blend, return a dict {take index: animation data}.
+    """
+    import importlib
+    import bpy
+    import addon_utils
+
+    addon_utils.enable(_package_name(), default_set=False)
+    export_fbx_bin = importlib.import_module(_package_name() + ".export_fbx_bin")
+
+    scene = bpy.data.scenes[job["scene"]]
+    settings = settings_load(job["settings"], export_fbx_bin.FBXExportSettings)
+
+    export_fbx_bin.ObjectWrapper.cache_clear()
+    # Only gather exported objects & co, animation is baked below.
+    scene_data = export_fbx_bin.fbx_data_from_scene(scene, settings._replace(bake_anim=False))
+
+    takes = export_fbx_bin.fbx_animations_takes(scene_data)
+    if len(takes) != job["nbr_takes"]:
+        raise RuntimeError("Found %d animation takes, expected %d" % (len(takes), job["nbr_takes"]))
+    todo = set(job["todo"])
+    animations = export_fbx_bin.fbx_animations_bake(scene_data, takes, todo)
+
+    export_fbx_bin.fbx_scene_data_cleanup(scene_data)
+    export_fbx_bin.ObjectWrapper.cache_clear()
+
+    return {idx: animations[idx] for idx in todo}
+
+
+def main(argv):
+    job_path, result_path = argv
+    with open(job_path, "rb") as fh:
+        job = pickle.load(fh)
+    result = bake_job(job)
+    with open(result_path, "wb") as fh:
+        pickle.dump(result, fh, pickle.HIGHEST_PROTOCOL)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        argv = sys.argv[sys.argv.index("--") + 1:]
+    except ValueError:
+        argv = sys.argv[1:]
+    sys.exit(main(argv))
@@ -30,6 +30,11 @@ import time
 from collections import OrderedDict
 from itertools import zip_longest, chain
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 if "bpy" in locals():
     import importlib
     if "encode_bin" in locals():
@@ -63,7 +68,7 @@ from .fbx_utils import (
     # Miscellaneous utils.
     units_convertor, units_convertor_iter, matrix4_to_array, similar_values, similar_values_iter,
     # Mesh transform helpers.
-    vcos_transformed_gen, nors_transformed_gen,
+    vcos_transformed_gen, nors_transformed_gen, vcos_transformed, nors_transformed, index_to_direct,
     # UUID from key.
     get_fbx_uuid_from_key,
     # Key generators.
@@ -800,11 +805,6 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     """
     Write the Mesh (Geometry) data block.
     """
-    # Ugly helper... :/
-    def _infinite_gen(val):
-        while 1:
-            yield val
-
     me_key, me, _free = scene_data.data_meshes[me_obj]
 
     # In case of multiple instances of same mesh, only write it once!
@@ -843,7 +843,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     # Vertex cos.
     t_co = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.vertices) * 3
     me.vertices.foreach_get("co", t_co)
-    elem_data_single_float64_array(geom, b"Vertices", chain(*vcos_transformed_gen(t_co, geom_mat_co)))
+    elem_data_single_float64_array(geom, b"Vertices", vcos_transformed(t_co, geom_mat_co))
     del t_co
 
     # Polygon indices.
@@ -851,20 +851,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     # We do loose edges as two-vertices faces, if enabled...
     #
     # Note we have to process Edges in the same time, as they are based on poly's loops...
-    loop_nbr = len(me.loops)
-    t_pvi = array.array(data_types.ARRAY_INT32, (0,)) * loop_nbr
-    t_ls = [None] * len(me.polygons)
-
-    me.loops.foreach_get("vertex_index", t_pvi)
-    me.polygons.foreach_get("loop_start", t_ls)
-
-    # Add "fake" faces for loose edges.
-    if scene_data.settings.use_mesh_edges:
-        t_le = tuple(e.vertices for e in me.edges if e.is_loose)
-        t_pvi.extend(chain(*t_le))
-        t_ls.extend(range(loop_nbr, loop_nbr + len(t_le), 2))
-        del t_le
-
+    #
     # Edges...
     # Note: Edges are represented as a loop here: each edge uses a single index, which refers to the polygon array.
     #       The edge is made by the vertex indexed py this polygon's point and the next one on the same polygon.
@@ -873,39 +860,95 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     #                 for loose edges).
     #       We also have to store a mapping from real edges to their indices in this array, for edge-mapped data
     #       (like e.g. crease).
-    t_eli = array.array(data_types.ARRAY_INT32)
-    edges_map = {}
-    edges_nbr = 0
-    if t_ls and t_pvi:
-        t_ls = set(t_ls)
-        todo_edges = [None] * len(me.edges) * 2
-        # Sigh, cannot access edge.key through foreach_get... :/
-        me.edges.foreach_get("vertices", todo_edges)
-        todo_edges = set((v1, v2) if v1 < v2 else (v2, v1) for v1, v2 in zip(*(iter(todo_edges),) * 2))
-
-        li = 0
-        vi = vi_start = t_pvi[0]
-        for li_next, vi_next in enumerate(t_pvi[1:] + t_pvi[:1], start=1):
-            if li_next in t_ls:  # End of a poly's loop.
-                vi2 = vi_start
-                vi_start = vi_next
-            else:
-                vi2 = vi_next
-
-            e_key = (vi, vi2) if vi < vi2 else (vi2, vi)
-            if e_key in todo_edges:
-                t_eli.append(li)
-                todo_edges.remove(e_key)
-                edges_map[e_key] = edges_nbr
-                edges_nbr += 1
-
-            vi = vi_next
-            li = li_next
-    # End of edges!
+    loop_nbr = len(me.loops)
+    if numpy is not None:
+        # Whole arrays version. Each loop's edge is known, so there is no need to search edges by key.
+        t_pvi = array.array(data_types.ARRAY_INT32, (0,)) * loop_nbr
+        t_ls = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
+        t_lei = array.array(data_types.ARRAY_INT32, (0,)) * loop_nbr
+        me.loops.foreach_get("vertex_index", t_pvi)
+        me.polygons.foreach_get("loop_start", t_ls)
+        me.loops.foreach_get("edge_index", t_lei)
+        t_pvi = numpy.array(t_pvi, dtype=numpy.int32)
+        t_ls = numpy.array(t_ls, dtype=numpy.int32)
+        t_lei = numpy.array(t_lei, dtype=numpy.int32)
+
+        # Add "fake" faces for loose edges, both of their loops use the loose edge.
+        if scene_data.settings.use_mesh_edges:
+            t_ev = array.array(data_types.ARRAY_INT32, (0,)) * len(me.edges) * 2
+            t_el = array.array(data_types.ARRAY_INT32, (0,)) * len(me.edges)
+            me.edges.foreach_get("vertices", t_ev)
+            me.edges.foreach_get("is_loose", t_el)
+            t_le = numpy.flatnonzero(numpy.array(t_el, dtype=bool))
+            t_pvi = numpy.concatenate((t_pvi, numpy.array(t_ev, dtype=numpy.int32).reshape(-1, 2)[t_le].ravel()))
+            t_ls = numpy.concatenate((t_ls, numpy.arange(loop_nbr, loop_nbr + len(t_le) * 2, 2, dtype=numpy.int32)))
+            t_lei = numpy.concatenate((t_lei, numpy.repeat(t_le, 2).astype(numpy.int32)))
+            del t_ev, t_el, t_le
+
+        # The first loop using an edge is the one written, in loop order.
+        # Here edges_map is the (Blender) edge index of each written edge.
+        if len(t_ls) and len(t_pvi):
+            edges_map, t_eli = numpy.unique(t_lei, return_index=True)
+            order = numpy.argsort(t_eli)
+            edges_map = edges_map[order]
+            t_eli = t_eli[order]
+            del order
+        else:
+            edges_map = numpy.zeros(0, dtype=numpy.int32)
+            t_eli = numpy.zeros(0, dtype=numpy.int32)
+        edges_nbr = len(t_eli)
+        t_lei = t_lei[:loop_nbr]
 
-    # We have to ^-1 last index of each loop.
-    for ls in t_ls:
-        t_pvi[ls - 1] ^= -1
+        # We have to ^-1 last index of each loop.
+        t_pvi[t_ls - 1] ^= -1
+    else:
+        t_pvi = array.array(data_types.ARRAY_INT32, (0,)) * loop_nbr
+        t_ls = [None] * len(me.polygons)
+
+        me.loops.foreach_get("vertex_index", t_pvi)
+        me.polygons.foreach_get("loop_start", t_ls)
+
+        # Add "fake" faces for loose edges.
+        if scene_data.settings.use_mesh_edges:
+            t_le = tuple(e.vertices for e in me.edges if e.is_loose)
+            t_pvi.extend(chain(*t_le))
+            t_ls.extend(range(loop_nbr, loop_nbr + len(t_le) * 2, 2))
+            del t_le
+
+
+        t_eli = array.array(data_types.ARRAY_INT32)
+        edges_map = {}
+        edges_nbr = 0
+        if t_ls and t_pvi:
+            t_ls = set(t_ls)
+            todo_edges = [None] * len(me.edges) * 2
+            # Sigh, cannot access edge.key through foreach_get... :/
+            me.edges.foreach_get("vertices", todo_edges)
+            todo_edges = set((v1, v2) if v1 < v2 else (v2, v1) for v1, v2 in zip(*(iter(todo_edges),) * 2))
+
+            li = 0
+            vi = vi_start = t_pvi[0]
+            for li_next, vi_next in enumerate(t_pvi[1:] + t_pvi[:1], start=1):
+                if li_next in t_ls or li_next == len(t_pvi):  # End of a poly's loop.
+                    vi2 = vi_start
+                    vi_start = vi_next
+                else:
+                    vi2 = vi_next
+
+                e_key = (vi, vi2) if vi < vi2 else (vi2, vi)
+                if e_key in todo_edges:
+                    t_eli.append(li)
+                    todo_edges.remove(e_key)
+                    edges_map[e_key] = edges_nbr
+                    edges_nbr += 1
+
+                vi = vi_next
+                li = li_next
+        # End of edges!
+
+        # We have to ^-1 last index of each loop.
+        for ls in t_ls:
+            t_pvi[ls - 1] ^= -1
 
     # And finally we can write data!
     elem_data_single_int32_array(geom, b"PolygonVertexIndex", t_pvi)
@@ -924,6 +967,21 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             t_ps = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
             me.polygons.foreach_get("use_smooth", t_ps)
             _map = b"ByPolygon"
+        elif numpy is not None:  # EDGE
+            # Same as below, counting (smooth) faces of each edge with whole arrays.
+            t_ps = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
+            t_lt = array.array(data_types.ARRAY_INT32, (0,)) * len(me.polygons)
+            t_es = array.array(data_types.ARRAY_INT32, (0,)) * len(me.edges)
+            me.polygons.foreach_get("use_smooth", t_ps)
+            me.polygons.foreach_get("loop_total", t_lt)
+            me.edges.foreach_get("use_edge_sharp", t_es)
+            t_ls_smooth = numpy.repeat(numpy.array(t_ps, dtype=bool), t_lt)
+            sharp_edges = numpy.array(t_es, dtype=bool)
+            sharp_edges[t_lei[~t_ls_smooth]] = True
+            sharp_edges |= numpy.bincount(t_lei[t_ls_smooth], minlength=len(me.edges)) > 2
+            t_ps = ~sharp_edges[edges_map]
+            del t_lt, t_es, t_ls_smooth, sharp_edges
+            _map = b"ByEdge"
         else:  # EDGE
             # Write Edge Smoothing.
             # Note edge is sharp also if it's used by more than two faces, or one of its faces is flat.
@@ -957,6 +1015,8 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
 
     # And we are done with edges!
     del edges_map
+    if numpy is not None:
+        del t_lei
 
     # Loop normals.
     tspacenumber = 0
@@ -968,8 +1028,8 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
 
         t_ln = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 3
         me.loops.foreach_get("normal", t_ln)
-        t_ln = nors_transformed_gen(t_ln, geom_mat_no)
         if 0:
+            t_ln = nors_transformed_gen(t_ln, geom_mat_no)
             t_ln = tuple(t_ln)  # No choice... :/
 
             lay_nor = elem_data_single_int32(geom, b"LayerElementNormal", 0)
@@ -995,7 +1055,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_nor, b"Name", b"")
             elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-            elem_data_single_float64_array(lay_nor, b"Normals", chain(*t_ln))
+            elem_data_single_float64_array(lay_nor, b"Normals", nors_transformed(t_ln, geom_mat_no))
             # Normal weights, no idea what it is.
             # t_ln = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops)
             # elem_data_single_float64_array(lay_nor, b"NormalsW", t_ln)
@@ -1018,8 +1078,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                     elem_data_single_string_unicode(lay_nor, b"Name", name)
                     elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
                     elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-                    elem_data_single_float64_array(lay_nor, b"Binormals",
-                                                   chain(*nors_transformed_gen(t_ln, geom_mat_no)))
+                    elem_data_single_float64_array(lay_nor, b"Binormals", nors_transformed(t_ln, geom_mat_no))
                     # Binormal weights, no idea what it is.
                     # elem_data_single_float64_array(lay_nor, b"BinormalsW", t_lnw)
 
@@ -1031,8 +1090,7 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                     elem_data_single_string_unicode(lay_nor, b"Name", name)
                     elem_data_single_string(lay_nor, b"MappingInformationType", b"ByPolygonVertex")
                     elem_data_single_string(lay_nor, b"ReferenceInformationType", b"Direct")
-                    elem_data_single_float64_array(lay_nor, b"Tangents",
-                                                   chain(*nors_transformed_gen(t_ln, geom_mat_no)))
+                    elem_data_single_float64_array(lay_nor, b"Tangents", nors_transformed(t_ln, geom_mat_no))
                     # Tangent weights, no idea what it is.
                     # elem_data_single_float64_array(lay_nor, b"TangentsW", t_lnw)
 
@@ -1045,9 +1103,6 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
     # Write VertexColor Layers.
     vcolnumber = len(me.vertex_colors)
     if vcolnumber:
-        def _coltuples_gen(raw_cols):
-            return zip(*(iter(raw_cols),) * 3 + (_infinite_gen(1.0),))  # We need a fake alpha...
-
         t_lc = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 3
         for colindex, collayer in enumerate(me.vertex_colors):
             collayer.data.foreach_get("color", t_lc)
@@ -1057,23 +1112,17 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_vcol, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_vcol, b"ReferenceInformationType", b"IndexToDirect")
 
-            col2idx = tuple(set(_coltuples_gen(t_lc)))
-            elem_data_single_float64_array(lay_vcol, b"Colors", chain(*col2idx))  # Flatten again...
-
-            col2idx = {col: idx for idx, col in enumerate(col2idx)}
-            elem_data_single_int32_array(lay_vcol, b"ColorIndex", (col2idx[c] for c in _coltuples_gen(t_lc)))
-            del col2idx
+            t_col, t_colidx = index_to_direct(t_lc, 3, (1.0,))  # We need a fake alpha...
+            elem_data_single_float64_array(lay_vcol, b"Colors", t_col)
+            elem_data_single_int32_array(lay_vcol, b"ColorIndex", t_colidx)
+            del t_col, t_colidx
         del t_lc
-        del _coltuples_gen
 
     # Write UV layers.
     # Note: LayerElementTexture is deprecated since FBX 2011 - luckily!
     #       Textures are now only related to materials, in FBX!
     uvnumber = len(me.uv_layers)
     if uvnumber:
-        def _uvtuples_gen(raw_uvs):
-            return zip(*(iter(raw_uvs),) * 2)
-
         t_luv = array.array(data_types.ARRAY_FLOAT64, (0.0,)) * len(me.loops) * 2
         for uvindex, uvlayer in enumerate(me.uv_layers):
             uvlayer.data.foreach_get("uv", t_luv)
@@ -1083,14 +1132,11 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
             elem_data_single_string(lay_uv, b"MappingInformationType", b"ByPolygonVertex")
             elem_data_single_string(lay_uv, b"ReferenceInformationType", b"IndexToDirect")
 
-            uv2idx = tuple(set(_uvtuples_gen(t_luv)))
-            elem_data_single_float64_array(lay_uv, b"UV", chain(*uv2idx))  # Flatten again...
-
-            uv2idx = {uv: idx for idx, uv in enumerate(uv2idx)}
-            elem_data_single_int32_array(lay_uv, b"UVIndex", (uv2idx[uv] for uv in _uvtuples_gen(t_luv)))
-            del uv2idx
+            t_uv, t_uvidx = index_to_direct(t_luv, 2)
+            elem_data_single_float64_array(lay_uv, b"UV", t_uv)
+            elem_data_single_int32_array(lay_uv, b"UVIndex", t_uvidx)
+            del t_uv, t_uvidx
         del t_luv
-        del _uvtuples_gen
 
     # Face's materials.
     me_fbxmats_idx = scene_data.mesh_mat_indices.get(me)
@@ -1110,8 +1156,14 @@ def fbx_data_mesh_elements(root, me_obj, scene_data, done_meshes):
                 blmats_to_fbxmats_idxs = [me_fbxmats_idx[m] for m in me_blmats if m in me_fbxmats_idx]
                 mat_idx_limit = len(blmats_to_fbxmats_idxs)
                 def_mat = blmats_to_fbxmats_idxs[0]
-                _gen = (blmats_to_fbxmats_idxs[m] if m < mat_idx_limit else def_mat for m in t_pm)
-                t_pm = array.array(data_types.ARRAY_INT32, _gen)
+                if numpy is not None:
+                    # Invalid indices all point to the extra default material at the end of the lookup table.
+                    _lut = numpy.array(blmats_to_fbxmats_idxs + [def_mat], dtype=numpy.int32)
+                    t_pm = _lut[numpy.minimum(numpy.array(t_pm, dtype=numpy.int32), mat_idx_limit)]
+                    del _lut
+                else:
+                    _gen = (blmats_to_fbxmats_idxs[m] if m < mat_idx_limit else def_mat for m in t_pm)
+                    t_pm = array.array(data_types.ARRAY_INT32, _gen)
 
                 elem_data_single_string(lay_mat, b"MappingInformationType", b"ByPolygon")
                 # XXX Logically, should be "Direct" reference type, since we do not have any index array, and have one
@@ -1600,7 +1652,9 @@ def fbx_data_animation_elements(root, scene_data):
     fps = scene.render.fps / scene.render.fps_base
 
     def keys_to_ktimes(keys):
-        return (int(v) for v in convert_sec_to_ktime_iter((f / fps for f, _v in keys)))
+        if numpy is not None:
+            return convert_sec_to_ktime(keys.frames / fps).astype(numpy.int64)
+        return (int(v) for v in convert_sec_to_ktime_iter((f / fps for f in keys.frames)))
 
     # Animation stacks.
     for astack_key, alayers, alayer_key, name, f_start, f_end in animations:
@@ -1667,7 +1721,7 @@ def fbx_data_animation_elements(root, scene_data):
                         elem_data_single_float64(acurve, b"Default", def_value)
                         elem_data_single_int32(acurve, b"KeyVer", FBX_ANIM_KEY_VERSION)
                         elem_data_single_int64_array(acurve, b"KeyTime", keys_to_ktimes(keys))
-                        elem_data_single_float32_array(acurve, b"KeyValueFloat", (v for _f, v in keys))
+                        elem_data_single_float32_array(acurve, b"KeyValueFloat", keys.values)
                         elem_data_single_int32_array(acurve, b"KeyAttrFlags", keyattr_flags)
                         elem_data_single_float32_array(acurve, b"KeyAttrDataFloat", keyattr_datafloat)
                         elem_data_single_int32_array(acurve, b"KeyAttrRefCount", (nbr_keys,))
@@ -1836,10 +1890,20 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     else:
         objects = scene_data.objects
 
+    # Number of sampled frames, to preallocate keys storage (same float stepping as the baking loop below).
+    nbr_keys = 0
+    currframe = f_start
+    while currframe <= f_end:
+        nbr_keys += 1
+        currframe += bake_step
+
     back_currframe = scene.frame_current
-    animdata_ob = OrderedDict((ob_obj, (AnimationCurveNodeWrapper(ob_obj.key, 'LCL_TRANSLATION', (0.0, 0.0, 0.0)),
-                                        AnimationCurveNodeWrapper(ob_obj.key, 'LCL_ROTATION', (0.0, 0.0, 0.0)),
-                                        AnimationCurveNodeWrapper(ob_obj.key, 'LCL_SCALING', (1.0, 1.0, 1.0))))
+    animdata_ob = OrderedDict((ob_obj, (AnimationCurveNodeWrapper(ob_obj.key, 'LCL_TRANSLATION', (0.0, 0.0, 0.0),
+                                                                  nbr_keys),
+                                        AnimationCurveNodeWrapper(ob_obj.key, 'LCL_ROTATION', (0.0, 0.0, 0.0),
+                                                                  nbr_keys),
+                                        AnimationCurveNodeWrapper(ob_obj.key, 'LCL_SCALING', (1.0, 1.0, 1.0),
+                                                                  nbr_keys)))
                               for ob_obj in objects)
 
     animdata_shapes = OrderedDict()
@@ -1848,7 +1912,7 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
         if not me.shape_keys.use_relative:
             continue
         for shape, (channel_key, geom_key, _shape_verts_co, _shape_verts_idx) in shapes.items():
-            acnode = AnimationCurveNodeWrapper(channel_key, 'SHAPE_KEY', (0.0,))
+            acnode = AnimationCurveNodeWrapper(channel_key, 'SHAPE_KEY', (0.0,), nbr_keys)
             # Sooooo happy to have to twist again like a mad snake... Yes, we need to write those curves twice. :/
             acnode.add_group(me_key, shape.name, shape.name, (shape.name,))
             animdata_shapes[channel_key] = (acnode, me, shape)
@@ -1881,11 +1945,16 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     animations = OrderedDict()
     simplify_fac = scene_data.settings.bake_anim_simplify_factor
 
+    # All curves share the same sampled frames, simplify them all at once.
+    AnimationCurveNodeWrapper.simplify_group(
+        [anim for anims in animdata_ob.values() for anim in anims] +
+        [anim_shape for anim_shape, _me, _shape in animdata_shapes.values()],
+        simplify_fac, bake_step, force_keep)
+
     # And now, produce final data (usable by FBX export code)
     # Objects-like loc/rot/scale...
     for ob_obj, anims in animdata_ob.items():
         for anim in anims:
-            anim.simplify(simplify_fac, bake_step, force_keep)
             if not anim:
                 continue
             for obj_key, group_key, group, fbx_group, fbx_gname in anim.get_final_data(scene, ref_id, force_keep):
@@ -1897,7 +1966,6 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     # And meshes' shape keys.
     for channel_key, (anim_shape, me, shape) in animdata_shapes.items():
         final_keys = OrderedDict()
-        anim_shape.simplify(simplify_fac, bake_step, force_keep)
         if not anim_shape:
             continue
         for elem_key, group_key, group, fbx_group, fbx_gname in anim_shape.get_final_data(scene, ref_id, force_keep):
@@ -1917,28 +1985,16 @@ def fbx_animations_do(scene_data, ref_id, f_start, f_end, start_zero, objects=No
     return (astack_key, animations, alayer_key, name, f_start, f_end) if animations else None
 
 
-def fbx_animations(scene_data):
+def fbx_animations_takes(scene_data):
     """
-    Generate global animation data from objects.
+    List all takes (FBX AnimStacks) to bake, in export order, without baking anything.
+    Each take is a tuple (kind, ob_obj, ref_id), kind being 'STRIP' (ref_id is an NLA strip),
+    'ACTION' (ref_id is an action) or 'SCENE' (global animstack, ob_obj and ref_id are None).
     """
-    scene = scene_data.scene
-    animations = []
-    frame_start = 1e100
-    frame_end = -1e100
-
-    def add_anim(animations, anim):
-        nonlocal frame_start, frame_end
-        if anim is not None:
-            animations.append(anim)
-            f_start, f_end = anim[4:6]
-            if f_start < frame_start:
-                frame_start = f_start
-            if f_end > frame_end:
-                frame_end = f_end
+    takes = []
 
     # Per-NLA strip animstacks.
     if scene_data.settings.bake_anim_use_nla_strips:
-        strips = []
         for ob_obj in scene_data.objects:
             # NLA tracks only for objects, not bones!
             if not ob_obj.is_object:
@@ -1952,16 +2008,7 @@ def fbx_animations(scene_data):
                 for strip in track.strips:
                     if strip.mute:
                         continue
-                    strips.append(strip)
-                    strip.mute = True
-
-        for strip in strips:
-            strip.mute = False
-            add_anim(animations, fbx_animations_do(scene_data, strip, strip.frame_start, strip.frame_end, True))
-            strip.mute = True
-
-        for strip in strips:
-            strip.mute = False
+                    takes.append(('STRIP', ob_obj, strip))
 
     # All actions.
     if scene_data.settings.bake_anim_use_all_actions:
@@ -1976,43 +2023,13 @@ def fbx_animations(scene_data):
                     return False  # Invalid.
             return True  # Valid.
 
-        def restore_object(ob_to, ob_from):
-            # Restore org state of object (ugh :/ ).
-            props = (
-                'location', 'rotation_quaternion', 'rotation_axis_angle', 'rotation_euler', 'rotation_mode', 'scale',
-                'delta_location', 'delta_rotation_euler', 'delta_rotation_quaternion', 'delta_scale',
-                'lock_location', 'lock_rotation', 'lock_rotation_w', 'lock_rotations_4d', 'lock_scale',
-                'tag', 'layers', 'select', 'track_axis', 'up_axis', 'active_material', 'active_material_index',
-                'matrix_parent_inverse', 'empty_draw_type', 'empty_draw_size', 'empty_image_offset', 'pass_index',
-                'color', 'hide', 'hide_select', 'hide_render', 'use_slow_parent', 'slow_parent_offset',
-                'use_extra_recalc_object', 'use_extra_recalc_data', 'dupli_type', 'use_dupli_frames_speed',
-                'use_dupli_vertices_rotation', 'use_dupli_faces_scale', 'dupli_faces_scale', 'dupli_group',
-                'dupli_frames_start', 'dupli_frames_end', 'dupli_frames_on', 'dupli_frames_off',
-                'draw_type', 'show_bounds', 'draw_bounds_type', 'show_name', 'show_axis', 'show_texture_space',
-                'show_wire', 'show_all_edges', 'show_transparent', 'show_x_ray',
-                'show_only_shape_key', 'use_shape_key_edit_mode', 'active_shape_key_index',
-            )
-            for p in props:
-                setattr(ob_to, p, getattr(ob_from, p))
-
         for ob_obj in scene_data.objects:
             # Actions only for objects, not bones!
             if not ob_obj.is_object:
                 continue
 
             ob = ob_obj.bdata  # Back to real Blender Object.
-
-            # We can't play with animdata and actions and get back to org state easily.
-            # So we have to add a temp copy of the object to the scene, animate it, and remove it... :/
-            ob_copy = ob.copy()
-            # Great, have to handle bones as well if needed...
-            pbones_matrices = [pbo.matrix_basis.copy() for pbo in ob.pose.bones] if ob.type == 'ARMATURE' else ...
-
-            if ob.animation_data:
-                org_act = ob.animation_data.action
-            else:
-                org_act = ...
-                ob.animation_data_create()
+            org_act = ob.animation_data.action if ob.animation_data else None
             path_resolve = ob.path_resolve
 
             for act in bpy.data.actions:
@@ -2020,30 +2037,135 @@ def fbx_animations(scene_data):
                 # Unless that action was already assigned to the object!
                 if act != org_act and not validate_actions(act, path_resolve):
                     continue
-                ob.animation_data.action = act
-                frame_start, frame_end = act.frame_range  # sic!
-                add_anim(animations,
-                         fbx_animations_do(scene_data, (ob, act), frame_start, frame_end, True, {ob_obj}, True))
-                # Ugly! :/
-                if pbones_matrices is not ...:
-                    for pbo, mat in zip(ob.pose.bones, pbones_matrices):
-                        pbo.matrix_basis = mat.copy()
-                ob.animation_data.action = None if org_act is ... else org_act
-                restore_object(ob, ob_copy)
+                takes.append(('ACTION', ob_obj, act))
 
+    # Global (containing everything) animstack, only if not exporting NLA strips and/or all actions.
+    if not scene_data.settings.bake_anim_use_nla_strips and not scene_data.settings.bake_anim_use_all_actions:
+        takes.append(('SCENE', None, None))
+
+    return takes
+
+
+def fbx_animations_bake(scene_data, takes, todo=None):
+    """
+    Bake given takes (as returned by fbx_animations_takes), or only those which indices are in todo set.
+    Return a list of animation data (or None), in same order as takes.
+    """
+    scene = scene_data.scene
+    animations = [None] * len(takes)
+
+    # Per-NLA strip animstacks.
+    # All strips have to be muted, even those we do not bake here, to only get one of them at a time.
+    strips = [strip for kind, _ob_obj, strip in takes if kind == 'STRIP']
+    for strip in strips:
+        strip.mute = True
+
+    for idx, (kind, _ob_obj, strip) in enumerate(takes):
+        if kind != 'STRIP' or (todo is not None and idx not in todo):
+            continue
+        strip.mute = False
+        animations[idx] = fbx_animations_do(scene_data, strip, strip.frame_start, strip.frame_end, True)
+        strip.mute = True
+
+    for strip in strips:
+        strip.mute = False
+
+    # All actions.
+    def restore_object(ob_to, ob_from):
+        # Restore org state of object (ugh :/ ).
+        props = (
+            'location', 'rotation_quaternion', 'rotation_axis_angle', 'rotation_euler', 'rotation_mode', 'scale',
+            'delta_location', 'delta_rotation_euler', 'delta_rotation_quaternion', 'delta_scale',
+            'lock_location', 'lock_rotation', 'lock_rotation_w', 'lock_rotations_4d', 'lock_scale',
+            'tag', 'layers', 'select', 'track_axis', 'up_axis', 'active_material', 'active_material_index',
+            'matrix_parent_inverse', 'empty_draw_type', 'empty_draw_size', 'empty_image_offset', 'pass_index',
+            'color', 'hide', 'hide_select', 'hide_render', 'use_slow_parent', 'slow_parent_offset',
+            'use_extra_recalc_object', 'use_extra_recalc_data', 'dupli_type', 'use_dupli_frames_speed',
+            'use_dupli_vertices_rotation', 'use_dupli_faces_scale', 'dupli_faces_scale', 'dupli_group',
+            'dupli_frames_start', 'dupli_frames_end', 'dupli_frames_on', 'dupli_frames_off',
+            'draw_type', 'show_bounds', 'draw_bounds_type', 'show_name', 'show_axis', 'show_texture_space',
+            'show_wire', 'show_all_edges', 'show_transparent', 'show_x_ray',
+            'show_only_shape_key', 'use_shape_key_edit_mode', 'active_shape_key_index',
+        )
+        for p in props:
+            setattr(ob_to, p, getattr(ob_from, p))
+
+    actions = OrderedDict()
+    for idx, (kind, ob_obj, act) in enumerate(takes):
+        if kind != 'ACTION' or (todo is not None and idx not in todo):
+            continue
+        actions.setdefault(ob_obj, []).append((idx, act))
+
+    for ob_obj, acts in actions.items():
+        ob = ob_obj.bdata  # Back to real Blender Object.
+
+        # We can't play with animdata and actions and get back to org state easily.
+        # So we have to add a temp copy of the object to the scene, animate it, and remove it... :/
+        ob_copy = ob.copy()
+        # Great, have to handle bones as well if needed...
+        pbones_matrices = [pbo.matrix_basis.copy() for pbo in ob.pose.bones] if ob.type == 'ARMATURE' else ...
+
+        if ob.animation_data:
+            org_act = ob.animation_data.action
+        else:
+            org_act = ...
+            ob.animation_data_create()
+
+        for idx, act in acts:
+            ob.animation_data.action = act
+            frame_start, frame_end = act.frame_range  # sic!
+            animations[idx] = fbx_animations_do(scene_data, (ob, act), frame_start, frame_end, True, {ob_obj}, True)
+            # Ugly! :/
             if pbones_matrices is not ...:
                 for pbo, mat in zip(ob.pose.bones, pbones_matrices):
                     pbo.matrix_basis = mat.copy()
-            if org_act is ...:
-                ob.animation_data_clear()
-            else:
-                ob.animation_data.action = org_act
+            ob.animation_data.action = None if org_act is ... else org_act
+            restore_object(ob, ob_copy)
+
+        if pbones_matrices is not ...:
+            for pbo, mat in zip(ob.pose.bones, pbones_matrices):
+                pbo.matrix_basis = mat.copy()
+        if org_act is ...:
+            ob.animation_data_clear()
+        else:
+            ob.animation_data.action = org_act
 
-            bpy.data.objects.remove(ob_copy)
+        bpy.data.objects.remove(ob_copy)
 
-    # Global (containing everything) animstack, only if not exporting NLA strips and/or all actions.
-    if not scene_data.settings.bake_anim_use_nla_strips and not scene_data.settings.bake_anim_use_all_actions:
-        add_anim(animations, fbx_animations_do(scene_data, None, scene.frame_start, scene.frame_end, False))
+    # Global (containing everything) animstack.
+    for idx, (kind, _ob_obj, _ref_id) in enumerate(takes):
+        if kind != 'SCENE' or (todo is not None and idx not in todo):
+            continue
+        animations[idx] = fbx_animations_do(scene_data, None, scene.frame_start, scene.frame_end, False)
+
+    return animations
+
+
+def fbx_animations(scene_data):
+    """
+    Generate global animation data from objects.
+    """
+    scene = scene_data.scene
+    animations = []
+    frame_start = 1e100
+    frame_end = -1e100
+
+    takes = fbx_animations_takes(scene_data)
+    if scene_data.settings.bake_anim_jobs > 1 and len(takes) > 1:
+        # Bake takes in background Blender processes.
+        from . import export_fbx_bake
+        anims = export_fbx_bake.bake_takes(scene_data, takes)
+    else:
+        anims = fbx_animations_bake(scene_data, takes)
+
+    for anim in anims:
+        if anim is not None:
+            animations.append(anim)
+            f_start, f_end = anim[4:6]
+            if f_start < frame_start:
+                frame_start = f_start
+            if f_end > frame_end:
+                frame_end = f_end
 
     # Be sure to update all matrices back to org state!
     scene.frame_set(scene.frame_current, 0.0)
@@ -2725,6 +2847,7 @@ def save_single(operator, scene, filepath="",
                 bake_anim_use_all_actions=True,
                 bake_anim_step=1.0,
                 bake_anim_simplify_factor=1.0,
+                bake_anim_jobs=1,
                 add_leaf_bones=False,
                 primary_bone_axis='Y',
                 secondary_bone_axis='X',
@@ -2791,7 +2914,7 @@ def save_single(operator, scene, filepath="",
         mesh_smooth_type, use_mesh_edges, use_tspace,
         use_armature_deform_only, add_leaf_bones, bone_correction_matrix, bone_correction_matrix_inv,
         bake_anim, bake_anim_use_nla_strips, bake_anim_use_all_actions, bake_anim_step, bake_anim_simplify_factor,
-        False, media_settings, use_custom_props,
+        bake_anim_jobs, False, media_settings, use_custom_props,
     )
 
     import bpy_extras.io_utils
@@ -2867,6 +2990,7 @@ def defaults_unity3d():
         "bake_anim": True,
         "bake_anim_simplify_factor": 1.0,
         "bake_anim_step": 1.0,
+        "bake_anim_jobs": 1,
         "bake_anim_use_nla_strips": True,
         "bake_anim_use_all_actions": True,
         "add_leaf_bones": False,  # Avoid memory/performance cost for something only useful for modelling
@@ -21,11 +21,12 @@
 # Script copyright (C) Campbell Barton, Bastien Montagne
 
 
+import array
 import math
 
 from collections import namedtuple, OrderedDict
 from collections.abc import Iterable
-from itertools import zip_longest, chain
+from itertools import zip_longest, chain, compress
 
 import bpy
 import bpy_extras
@@ -34,6 +35,11 @@ from mathutils import Vector, Matrix
 
 from . import encode_bin, data_types
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 # "Constants"
 FBX_VERSION = 7400
@@ -209,7 +215,6 @@ def similar_values_iter(v1, v2, e=1e-6):
     return True
 
 def vcos_transformed_gen(raw_cos, m=None):
-    # Note: we could most likely get much better performances with numpy, but will leave this as TODO for now.
     gen = zip(*(iter(raw_cos),) * 3)
     return gen if m is None else (m * Vector(v) for v in gen)
 
@@ -220,6 +225,48 @@ def nors_transformed_gen(raw_nors, m=None):
     gen = zip(*(iter(raw_nors),) * 3)
     return gen if m is None else (m * Vector(v) for v in gen)
 
+def _array_transformed(raw, m):
+    data = numpy.array(raw, dtype=numpy.float64).reshape(-1, 3)
+    if m is not None:
+        # Same as m * Vector(v), with an implicit w of 1.0.
+        m = numpy.array(m, dtype=numpy.float64)
+        data = numpy.dot(data, m[:3, :3].T) + m[:3, 3]
+    return data.ravel()
+
+def vcos_transformed(raw_cos, m=None):
+    """Return flat (transformed) coordinates, ready to be written as a float64 array."""
+    if numpy is None:
+        return chain(*vcos_transformed_gen(raw_cos, m))
+    return _array_transformed(raw_cos, m)
+
+def nors_transformed(raw_nors, m=None):
+    """Return flat (transformed) normals, ready to be written as a float64 array."""
+    if numpy is None:
+        return chain(*nors_transformed_gen(raw_nors, m))
+    return _array_transformed(raw_nors, m)
+
+def index_to_direct(raw_values, size, fill=()):
+    """
+    Deduplicate raw_values (flat, size items per value), for IndexToDirect layers.
+    Return the flat unique values (each followed by fill items) and the index of each original value.
+    """
+    if numpy is None:
+        def _tuples_gen():
+            return zip(*(iter(raw_values),) * size)
+        values = tuple(set(_tuples_gen()))
+        val2idx = {val: idx for idx, val in enumerate(values)}
+        indices = array.array(data_types.ARRAY_INT32, (val2idx[val] for val in _tuples_gen()))
+        return chain.from_iterable(val + fill for val in values), indices
+
+    # Adding 0.0 turns -0.0 into 0.0, so that both are the same value, like in python.
+    values = numpy.array(raw_values, dtype=numpy.float64).reshape(-1, size) + 0.0
+    rows = numpy.ascontiguousarray(values).view(numpy.dtype((numpy.void, values.dtype.itemsize * size))).ravel()
+    _rows, first, indices = numpy.unique(rows, return_index=True, return_inverse=True)
+    values = values[first]
+    if fill:
+        values = numpy.hstack((values, numpy.tile(numpy.array(fill, dtype=numpy.float64), (len(values), 1))))
+    return values.ravel(), indices.astype(numpy.int32)
+
 
 # ##### UIDs code. #####
 
@@ -638,12 +685,31 @@ def fbx_templates_generate(root, fbx_templates):
 # ##### FBX animation helpers. #####
 
 
+class AnimationCurveKeys:
+    """
+    Keyframes of a single AnimationCurve, as two same-length sequences (numpy arrays if available).
+    """
+    __slots__ = ('frames', 'values')
+
+    def __init__(self, frames, values):
+        self.frames = frames
+        self.values = values
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return zip(self.frames, self.values)
+
+
 class AnimationCurveNodeWrapper:
     """
     This class provides a same common interface for all (FBX-wise) AnimationCurveNode and AnimationCurve elements,
     and easy API to handle those.
+    Sampled keys are stored as columns (one array of frames, and a frames x values array), with numpy if available.
     """
-    __slots__ = ('elem_keys', '_keys', 'default_values', 'fbx_group', 'fbx_gname', 'fbx_props')
+    __slots__ = ('elem_keys', '_frames', '_values', '_write', '_nbr_keys',
+                 'default_values', 'fbx_group', 'fbx_gname', 'fbx_props')
 
     kinds = {
         'LCL_TRANSLATION': ("Lcl Translation", "T", ("X", "Y", "Z")),
@@ -652,17 +718,25 @@ class AnimationCurveNodeWrapper:
         'SHAPE_KEY': ("DeformPercent", "DeformPercent", ("DeformPercent",)),
     }
 
-    def __init__(self, elem_key, kind, default_values=...):
+    def __init__(self, elem_key, kind, default_values=..., nbr_keys=0):
         """
         bdata might be an Object, DupliObject, Bone or PoseBone.
         If Bone or PoseBone, armature Object must be provided.
+        nbr_keys is the expected number of keyframes, used to preallocate the arrays.
         """
         self.elem_keys = [elem_key]
         assert(kind in self.kinds)
         self.fbx_group = [self.kinds[kind][0]]
         self.fbx_gname = [self.kinds[kind][1]]
         self.fbx_props = [self.kinds[kind][2]]
-        self._keys = []  # (frame, values, write_flags)
+        self._nbr_keys = 0
+        self._write = None  # Write flags (frames x values), None until simplified (i.e. write everything).
+        if numpy is not None:
+            self._frames = numpy.empty(nbr_keys, dtype=numpy.float64)
+            self._values = numpy.empty((nbr_keys, len(self.fbx_props[0])), dtype=numpy.float64)
+        else:
+            self._frames = array.array('d')
+            self._values = array.array('d')  # Flat, frame after frame.
         if default_values is not ...:
             assert(len(default_values) == len(self.fbx_props[0]))
             self.default_values = default_values
@@ -671,7 +745,11 @@ class AnimationCurveNodeWrapper:
 
     def __bool__(self):
         # We are 'True' if we do have some validated keyframes...
-        return bool(self._keys) and (True in ((True in k[2]) for k in self._keys))
+        if self._write is None:
+            return self._nbr_keys > 0
+        if numpy is not None:
+            return bool(self._write.any())
+        return 1 in self._write
 
     def add_group(self, elem_key, fbx_group, fbx_gname, fbx_props):
         """
@@ -689,7 +767,19 @@ class AnimationCurveNodeWrapper:
         Add a new keyframe to all curves of the group.
         """
         assert(len(values) == len(self.fbx_props[0]))
-        self._keys.append((frame, values, [True] * len(values)))  # write everything by default.
+        if numpy is not None:
+            if self._nbr_keys == len(self._frames):
+                # More keys than expected, grow the arrays.
+                nbr_new = max(self._nbr_keys, 16)
+                self._frames = numpy.concatenate((self._frames, numpy.empty(nbr_new)))
+                self._values = numpy.concatenate((self._values, numpy.empty((nbr_new, len(values)))))
+            self._frames[self._nbr_keys] = frame
+            self._values[self._nbr_keys] = values
+        else:
+            self._frames.append(frame)
+            self._values.extend(values)
+        self._nbr_keys += 1
+        self._write = None  # write everything by default.
 
     def simplify(self, fac, step, force_keep=False):
         """
@@ -698,32 +788,99 @@ class AnimationCurveNodeWrapper:
             * their values differ significantly from the previous validated sample ones, or
             * the previous validated samples are far enough from current ones in time.
         """
-        if not self._keys:
+        self.simplify_group((self,), fac, step, force_keep)
+
+    @staticmethod
+    def simplify_group(anims, fac, step, force_keep=False):
+        """
+        Same as simplify(), for several wrappers sampled at the same frames.
+        With numpy, all their curves are handled together, as columns of a single array.
+        """
+        anims = [anim for anim in anims if anim._nbr_keys]
+        if not anims:
             return
 
         # So that, with default factor and step values (1), we get:
         max_frame_diff = step * fac * 10  # max step of 10 frames.
         value_diff_fac = fac / 1000  # min value evolution: 0.1% of whole range.
         min_significant_diff = 1.0e-6
-        keys = self._keys
 
-        extremums = tuple((min(values), max(values)) for values in zip(*(k[1] for k in keys)))
+        if numpy is None:
+            for anim in anims:
+                anim._simplify_no_numpy(max_frame_diff, value_diff_fac, min_significant_diff, force_keep)
+            return
+
+        nbr_keys = anims[0]._nbr_keys
+        assert(all(anim._nbr_keys == nbr_keys for anim in anims))
+        frames = anims[0]._frames[:nbr_keys]
+        values = numpy.hstack([anim._values[:nbr_keys] for anim in anims])
+
+        min_diffs = numpy.maximum((values.max(axis=0) - values.min(axis=0)) * value_diff_fac, min_significant_diff)
+
+        # Never write keyframe when value is exactly the same as prev one!
+        # If enough difference from previous sampled value, key this value *and* the previous one!
+        changed = values[1:] != values[:-1]
+        big_diffs = changed & (numpy.abs(values[1:] - values[:-1]) >= min_diffs)
+        todo = changed & ~big_diffs
+        write = numpy.zeros(values.shape, dtype=bool)
+        write[1:] |= big_diffs
+        write[:-1] |= big_diffs
+
+        # Else, if enough difference from previous keyed value (or any significant difference and max gap between
+        # keys is reached), key this value only! This depends on previous keyed values, so goes frame by frame,
+        # but only over frames where something may be keyed.
+        p_keyedframes = numpy.full(values.shape[1], frames[0] - max_frame_diff)
+        p_keyedvals = values[0].copy()
+        for idx in numpy.flatnonzero((big_diffs | todo).any(axis=1)):
+            currframe = frames[idx + 1]
+            vals = values[idx + 1]
+            val_diffs = numpy.abs(vals - p_keyedvals)
+            keyed = todo[idx] & ((val_diffs >= min_diffs) |
+                                 ((val_diffs >= min_significant_diff) &
+                                  (currframe - p_keyedframes >= max_frame_diff)))
+            write[idx + 1] |= keyed
+            keyed |= big_diffs[idx]
+            p_keyedframes[keyed] = currframe
+            p_keyedvals[keyed] = vals[keyed]
+
+        are_keyed = write.any(axis=0)
+        offset = 0
+        for anim in anims:
+            nbr_values = anim._values.shape[1]
+            anim_keyed = are_keyed[offset:offset + nbr_values]
+            # If we write nothing (action doing nothing) and are in 'force_keep' mode, we key everything! :P
+            # See T41766.
+            if force_keep and not anim_keyed.any():
+                anim_keyed[:] = True
+            # If we did key something, ensure first and last sampled values are keyed as well.
+            anim_write = write[:, offset:offset + nbr_values]
+            anim_write[0, anim_keyed] = anim_write[-1, anim_keyed] = True
+            anim._write = anim_write
+            offset += nbr_values
+
+    def _simplify_no_numpy(self, max_frame_diff, value_diff_fac, min_significant_diff, force_keep):
+        nbr_values = len(self.fbx_props[0])
+        frames = self._frames
+        values = self._values
+        write = bytearray(len(values))
+
+        extremums = tuple((min(values[idx::nbr_values]), max(values[idx::nbr_values])) for idx in range(nbr_values))
         min_diffs = tuple(max((mx - mn) * value_diff_fac, min_significant_diff) for mn, mx in extremums)
 
-        p_currframe, p_key, p_key_write = keys[0]
-        p_keyed = [(p_currframe - max_frame_diff, val) for val in p_key]
-        are_keyed = [False] * len(p_key)
-        for currframe, key, key_write in keys:
-            for idx, (val, p_val) in enumerate(zip(key, p_key)):
-                key_write[idx] = False
+        p_keyed = [(frames[0] - max_frame_diff, val) for val in values[:nbr_values]]
+        are_keyed = [False] * nbr_values
+        for i in range(1, self._nbr_keys):
+            currframe = frames[i]
+            for idx in range(nbr_values):
+                val = values[i * nbr_values + idx]
+                p_val = values[(i - 1) * nbr_values + idx]
                 p_keyedframe, p_keyedval = p_keyed[idx]
                 if val == p_val:
                     # Never write keyframe when value is exactly the same as prev one!
                     continue
                 if abs(val - p_val) >= min_diffs[idx]:
                     # If enough difference from previous sampled value, key this value *and* the previous one!
-                    key_write[idx] = True
-                    p_key_write[idx] = True
+                    write[i * nbr_values + idx] = write[(i - 1) * nbr_values + idx] = 1
                     p_keyed[idx] = (currframe, val)
                     are_keyed[idx] = True
                 else:
@@ -734,31 +891,42 @@ class AnimationCurveNodeWrapper:
                         # Else, if enough difference from previous keyed value
                         # (or any significant difference and max gap between keys is reached),
                         # key this value only!
-                        key_write[idx] = True
+                        write[i * nbr_values + idx] = 1
                         p_keyed[idx] = (currframe, val)
                         are_keyed[idx] = True
-            p_currframe, p_key, p_key_write = currframe, key, key_write
 
         # If we write nothing (action doing nothing) and are in 'force_keep' mode, we key everything! :P
         # See T41766.
-        if (force_keep and not self):
+        if force_keep and 1 not in write:
             are_keyed[:] = [True] * len(are_keyed)
 
         # If we did key something, ensure first and last sampled values are keyed as well.
         for idx, is_keyed in enumerate(are_keyed):
             if is_keyed:
-                keys[0][2][idx] = keys[-1][2][idx] = True
+                write[idx] = write[len(write) - nbr_values + idx] = 1
+        self._write = write
 
     def get_final_data(self, scene, ref_id, force_keep=False):
         """
         Yield final anim data for this 'curvenode' (for all curvenodes defined).
         force_keep is to force to keep a curve even if it only has one valid keyframe.
         """
-        curves = [[] for k in self._keys[0][1]]
-        for currframe, key, key_write in self._keys:
-            for curve, val, wrt in zip(curves, key, key_write):
-                if wrt:
-                    curve.append((currframe, val))
+        nbr_keys = self._nbr_keys
+        nbr_values = len(self.fbx_props[0])
+        if numpy is not None:
+            frames = self._frames[:nbr_keys]
+            values = self._values[:nbr_keys]
+            if self._write is None:
+                curves = [AnimationCurveKeys(frames, values[:, idx]) for idx in range(nbr_values)]
+            else:
+                curves = [AnimationCurveKeys(frames[wrt], values[wrt, idx]) for idx, wrt in enumerate(self._write.T)]
+        else:
+            frames = self._frames
+            values = self._values
+            write = self._write if self._write is not None else bytearray(b"\x01") * len(values)
+            curves = [AnimationCurveKeys(list(compress(frames, write[idx::nbr_values])),
+                                         list(compress(values[idx::nbr_values], write[idx::nbr_values])))
+                      for idx in range(nbr_values)]
 
         for elem_key, fbx_group, fbx_gname, fbx_props in \
             zip(self.elem_keys, self.fbx_group, self.fbx_gname, self.fbx_props):
@@ -1122,7 +1290,7 @@ FBXExportSettings = namedtuple("FBXExportSettings", (
     "mesh_smooth_type", "use_mesh_edges", "use_tspace",
     "use_armature_deform_only", "add_leaf_bones", "bone_correction_matrix", "bone_correction_matrix_inv",
     "bake_anim", "bake_anim_use_nla_strips", "bake_anim_use_all_actions", "bake_anim_step", "bake_anim_simplify_factor",
-    "use_metadata", "media_settings", "use_custom_props",
+    "bake_anim_jobs", "use_metadata", "media_settings", "use_custom_props",
 ))
 
 # Helper container gathering some data we need multiple times:
@@ -33,6 +33,7 @@
 from struct import (
         pack,
         unpack,
+        Struct,
         )
 from sys import (
         exc_info,
@@ -271,6 +272,33 @@ class Ms3dIo:
             Ms3dIo.write_array(raw_io, itemWriter, count2, itemValue)
 
 
+    @staticmethod
+    def read_struct(raw_io, record):
+        """ read a single record of a compiled Struct from raw_io """
+        buffer = raw_io.read(record.size)
+        if len(buffer) < record.size:
+            raise EOFError()
+        return record.unpack(buffer)
+
+    @staticmethod
+    def read_struct_array(raw_io, record, count):
+        """ read an array[count] of records of a compiled Struct from raw_io,
+            with a single read of the whole block """
+        if count <= 0:
+            return ()
+        size = record.size * count
+        buffer = raw_io.read(size)
+        if len(buffer) < size:
+            raise EOFError()
+        return record.iter_unpack(buffer)
+
+    @staticmethod
+    def write_struct_array(raw_io, items):
+        """ write an array of objects to raw_io, with a single write of
+            the joined packed records """
+        raw_io.write(b''.join([item.pack() for item in items]))
+
+
     @staticmethod
     def ms3d_replace(exc):
         """ http://www.python.org/dev/peps/pep-0293/ """
@@ -292,20 +320,21 @@ class Ms3dIo:
         eol = buffer.find(Ms3dSpec.STRING_TERMINATION)
         if eol < 0:
             eol = len(buffer)
-        register_error(Ms3dSpec.STRING_MS3D_REPLACE, Ms3dIo.ms3d_replace)
         s = buffer[:eol].decode(encoding=Ms3dSpec.STRING_ENCODING, errors=Ms3dSpec.STRING_ERROR)
         return s
 
     @staticmethod
     def write_string(raw_io, length, value):
         """ write a string of a specific length to raw_io """
-        register_error(Ms3dSpec.STRING_MS3D_REPLACE, Ms3dIo.ms3d_replace)
         buffer = value.encode(encoding=Ms3dSpec.STRING_ENCODING, errors=Ms3dSpec.STRING_ERROR)
         if not buffer:
             buffer = bytes()
         raw_io.write(pack('<{}s'.format(length), buffer))
         return
 
+# the error handler only needs to be registered once
+register_error(Ms3dSpec.STRING_MS3D_REPLACE, Ms3dIo.ms3d_replace)
+
 
 ###############################################################################
 #
@@ -426,18 +455,28 @@ class Ms3dVertex:
         return self._vertex_ex_object
 
 
-    def read(self, raw_io):
-        self.flags = Ms3dIo.read_byte(raw_io)
-        self._vertex = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
-        self.bone_id = Ms3dIo.read_sbyte(raw_io)
-        self.reference_count = Ms3dIo.read_byte(raw_io)
+    # flags, vertex[3], bone_id, reference_count
+    STRUCT = Struct('<B3fbB')
+
+    def unpack(self, values):
+        self.flags = values[0]
+        self._vertex = values[1:4]
+        self.bone_id = values[4]
+        self.reference_count = values[5]
         return self
 
+    def pack(self):
+        return Ms3dVertex.STRUCT.pack(
+                self.flags,
+                self.vertex[0], self.vertex[1], self.vertex[2],
+                self.bone_id,
+                self.reference_count)
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dVertex.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_byte(raw_io, self.flags)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.vertex)
-        Ms3dIo.write_sbyte(raw_io, self.bone_id)
-        Ms3dIo.write_byte(raw_io, self.reference_count)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -524,24 +563,35 @@ class Ms3dTriangle:
         return self._t
 
 
-    def read(self, raw_io):
-        self.flags = Ms3dIo.read_word(raw_io)
-        self._vertex_indices = Ms3dIo.read_array(raw_io, Ms3dIo.read_word, 3)
-        self._vertex_normals = Ms3dIo.read_array2(raw_io, Ms3dIo.read_float, 3, 3)
-        self._s = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
-        self._t = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
-        self.smoothing_group = Ms3dIo.read_byte(raw_io)
-        self.group_index = Ms3dIo.read_byte(raw_io)
+    # flags, vertex_indices[3], vertex_normals[3][3], s[3], t[3],
+    # smoothing_group, group_index
+    STRUCT = Struct('<H3H9f3f3fBB')
+
+    def unpack(self, values):
+        self.flags = values[0]
+        self._vertex_indices = values[1:4]
+        self._vertex_normals = [values[4:7], values[7:10], values[10:13]]
+        self._s = values[13:16]
+        self._t = values[16:19]
+        self.smoothing_group = values[19]
+        self.group_index = values[20]
         return self
 
+    def pack(self):
+        n = self.vertex_normals
+        return Ms3dTriangle.STRUCT.pack(*(
+                (self.flags, )
+                + tuple(self.vertex_indices[:3])
+                + tuple(n[0][:3]) + tuple(n[1][:3]) + tuple(n[2][:3])
+                + tuple(self.s[:3])
+                + tuple(self.t[:3])
+                + (self.smoothing_group, self.group_index)))
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dTriangle.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_word(raw_io, self.flags)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_word, 3, self.vertex_indices)
-        Ms3dIo.write_array2(raw_io, Ms3dIo.write_float, 3, 3, self.vertex_normals)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.s)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.t)
-        Ms3dIo.write_byte(raw_io, self.smoothing_group)
-        Ms3dIo.write_byte(raw_io, self.group_index)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -828,14 +878,24 @@ class Ms3dRotationKeyframe:
         return self._rotation
 
 
-    def read(self, raw_io):
-        self.time = Ms3dIo.read_float(raw_io)
-        self._rotation = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
+    # time, rotation[3]
+    STRUCT = Struct('<4f')
+
+    def unpack(self, values):
+        self.time = values[0]
+        self._rotation = values[1:4]
         return self
 
+    def pack(self):
+        return Ms3dRotationKeyframe.STRUCT.pack(
+                self.time,
+                self.rotation[0], self.rotation[1], self.rotation[2])
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dRotationKeyframe.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_float(raw_io, self.time)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.rotation)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -869,14 +929,24 @@ class Ms3dTranslationKeyframe:
         return self._position
 
 
-    def read(self, raw_io):
-        self.time = Ms3dIo.read_float(raw_io)
-        self._position = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
+    # time, position[3]
+    STRUCT = Struct('<4f')
+
+    def unpack(self, values):
+        self.time = values[0]
+        self._position = values[1:4]
         return self
 
+    def pack(self):
+        return Ms3dTranslationKeyframe.STRUCT.pack(
+                self.time,
+                self.position[0], self.position[1], self.position[2])
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dTranslationKeyframe.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_float(raw_io, self.time)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.position)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -1007,13 +1077,16 @@ class Ms3dJoint:
         self._position = Ms3dIo.read_array(raw_io, Ms3dIo.read_float, 3)
         _number_rotation_keyframes = Ms3dIo.read_word(raw_io)
         _number_translation_keyframes = Ms3dIo.read_word(raw_io)
-        self._rotation_keyframes = []
-        for i in range(_number_rotation_keyframes):
-            self.rotation_key_frames.append(Ms3dRotationKeyframe().read(raw_io))
-        self._translation_keyframes = []
-        for i in range(_number_translation_keyframes):
-            self.translation_key_frames.append(
-                    Ms3dTranslationKeyframe().read(raw_io))
+        self._rotation_keyframes = [
+                Ms3dRotationKeyframe().unpack(values)
+                for values in Ms3dIo.read_struct_array(
+                        raw_io, Ms3dRotationKeyframe.STRUCT,
+                        _number_rotation_keyframes)]
+        self._translation_keyframes = [
+                Ms3dTranslationKeyframe().unpack(values)
+                for values in Ms3dIo.read_struct_array(
+                        raw_io, Ms3dTranslationKeyframe.STRUCT,
+                        _number_translation_keyframes)]
         return self
 
     def write(self, raw_io):
@@ -1024,10 +1097,10 @@ class Ms3dJoint:
         Ms3dIo.write_array(raw_io, Ms3dIo.write_float, 3, self.position)
         Ms3dIo.write_word(raw_io, self.number_rotation_keyframes)
         Ms3dIo.write_word(raw_io, self.number_translation_keyframes)
-        for i in range(self.number_rotation_keyframes):
-            self.rotation_key_frames[i].write(raw_io)
-        for i in range(self.number_translation_keyframes):
-            self.translation_key_frames[i].write(raw_io)
+        Ms3dIo.write_struct_array(raw_io,
+                self.rotation_key_frames[:self.number_rotation_keyframes])
+        Ms3dIo.write_struct_array(raw_io,
+                self.translation_key_frames[:self.number_translation_keyframes])
 
 
 ###############################################################################
@@ -1177,14 +1250,23 @@ class Ms3dVertexEx1:
         return 0
 
 
-    def read(self, raw_io):
-        self._bone_ids = Ms3dIo.read_array(raw_io, Ms3dIo.read_sbyte, 3)
-        self._weights = Ms3dIo.read_array(raw_io, Ms3dIo.read_byte, 3)
+    # bone_ids[3], weights[3]
+    STRUCT = Struct('<3b3B')
+
+    def unpack(self, values):
+        self._bone_ids = values[0:3]
+        self._weights = values[3:6]
         return self
 
+    def pack(self):
+        return Ms3dVertexEx1.STRUCT.pack(*(
+                tuple(self.bone_ids[:3]) + tuple(self.weights[:3])))
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dVertexEx1.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_sbyte, 3, self.bone_ids)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_byte, 3, self.weights)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -1252,16 +1334,25 @@ class Ms3dVertexEx2:
         return 0
 
 
-    def read(self, raw_io):
-        self._bone_ids = Ms3dIo.read_array(raw_io, Ms3dIo.read_sbyte, 3)
-        self._weights = Ms3dIo.read_array(raw_io, Ms3dIo.read_byte, 3)
-        self.extra = Ms3dIo.read_dword(raw_io)
+    # bone_ids[3], weights[3], extra
+    STRUCT = Struct('<3b3BI')
+
+    def unpack(self, values):
+        self._bone_ids = values[0:3]
+        self._weights = values[3:6]
+        self.extra = values[6]
         return self
 
+    def pack(self):
+        return Ms3dVertexEx2.STRUCT.pack(*(
+                tuple(self.bone_ids[:3]) + tuple(self.weights[:3])
+                + (self.extra, )))
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dVertexEx2.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_sbyte, 3, self.bone_ids)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_byte, 3, self.weights)
-        Ms3dIo.write_dword(raw_io, self.extra)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -1339,16 +1430,25 @@ class Ms3dVertexEx3:
         return 0
 
 
-    def read(self, raw_io):
-        self._bone_ids = Ms3dIo.read_array(raw_io, Ms3dIo.read_sbyte, 3)
-        self._weights = Ms3dIo.read_array(raw_io, Ms3dIo.read_byte, 3)
-        self.extra = Ms3dIo.read_dword(raw_io)
+    # bone_ids[3], weights[3], extra
+    STRUCT = Struct('<3b3BI')
+
+    def unpack(self, values):
+        self._bone_ids = values[0:3]
+        self._weights = values[3:6]
+        self.extra = values[6]
         return self
 
+    def pack(self):
+        return Ms3dVertexEx3.STRUCT.pack(*(
+                tuple(self.bone_ids[:3]) + tuple(self.weights[:3])
+                + (self.extra, )))
+
+    def read(self, raw_io):
+        return self.unpack(Ms3dIo.read_struct(raw_io, Ms3dVertexEx3.STRUCT))
+
     def write(self, raw_io):
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_sbyte, 3, self.bone_ids)
-        Ms3dIo.write_array(raw_io, Ms3dIo.write_byte, 3, self.weights)
-        Ms3dIo.write_dword(raw_io, self.extra)
+        raw_io.write(self.pack())
 
 
 ###############################################################################
@@ -1750,17 +1850,19 @@ class Ms3dModel:
         if (_number_vertices > Ms3dSpec.MAX_VERTICES):
             debug_out.append("\nwarning, invalid count: number_vertices: {}\n".format(
                     _number_vertices))
-        self._vertices = []
-        for i in range(_number_vertices):
-            self.vertices.append(Ms3dVertex().read(raw_io))
+        self._vertices = [
+                Ms3dVertex().unpack(values)
+                for values in Ms3dIo.read_struct_array(
+                        raw_io, Ms3dVertex.STRUCT, _number_vertices)]
 
         _number_triangles = Ms3dIo.read_word(raw_io)
         if (_number_triangles > Ms3dSpec.MAX_TRIANGLES):
             debug_out.append("\nwarning, invalid count: number_triangles: {}\n".format(
                     _number_triangles))
-        self._triangles = []
-        for i in range(_number_triangles):
-            self.triangles.append(Ms3dTriangle().read(raw_io))
+        self._triangles = [
+                Ms3dTriangle().unpack(values)
+                for values in Ms3dIo.read_struct_array(
+                        raw_io, Ms3dTriangle.STRUCT, _number_triangles)]
 
         _number_groups = Ms3dIo.read_word(raw_io)
         if (_number_groups > Ms3dSpec.MAX_GROUPS):
@@ -1872,20 +1974,23 @@ class Ms3dModel:
             self.sub_version_vertex_extra = Ms3dIo.read_dword(raw_io)
             _progress.add('SUB_VERSION_VERTEX_EXTRA')
             if self.sub_version_vertex_extra > 0:
-                length = len(self.joints)
-                for i in range(_number_vertices):
-                    if self.sub_version_vertex_extra == 1:
-                        item = Ms3dVertexEx1()
-                    elif self.sub_version_vertex_extra == 2:
-                        item = Ms3dVertexEx2()
-                    elif self.sub_version_vertex_extra == 3:
-                        item = Ms3dVertexEx3()
-                    else:
-                        debug_out.append("\nwarning, invalid version:"\
-                                " sub_version_vertex_extra: {}\n".format(
-                                sub_version_vertex_extra))
-                        continue
-                    self.vertices[i]._vertex_ex_object = item.read(raw_io)
+                if self.sub_version_vertex_extra == 1:
+                    item_type = Ms3dVertexEx1
+                elif self.sub_version_vertex_extra == 2:
+                    item_type = Ms3dVertexEx2
+                elif self.sub_version_vertex_extra == 3:
+                    item_type = Ms3dVertexEx3
+                else:
+                    debug_out.append("\nwarning, invalid version:"\
+                            " sub_version_vertex_extra: {}\n".format(
+                            self.sub_version_vertex_extra))
+                    item_type = None
+                if item_type is not None:
+                    for vertex, values in zip(self.vertices,
+                            Ms3dIo.read_struct_array(
+                                    raw_io, item_type.STRUCT,
+                                    _number_vertices)):
+                        vertex._vertex_ex_object = item_type().unpack(values)
             _progress.add('VERTEX_EXTRA')
 
             self.sub_version_joint_extra = Ms3dIo.read_dword(raw_io)
@@ -1958,12 +2063,10 @@ class Ms3dModel:
         self.header.write(raw_io)
 
         Ms3dIo.write_word(raw_io, self.number_vertices)
-        for i in range(self.number_vertices):
-            self.vertices[i].write(raw_io)
+        Ms3dIo.write_struct_array(raw_io, self.vertices)
 
         Ms3dIo.write_word(raw_io, self.number_triangles)
-        for i in range(self.number_triangles):
-            self.triangles[i].write(raw_io)
+        Ms3dIo.write_struct_array(raw_io, self.triangles)
 
         Ms3dIo.write_word(raw_io, self.number_groups)
         for i in range(self.number_groups):
@@ -2004,8 +2107,7 @@ class Ms3dModel:
 
             Ms3dIo.write_dword(raw_io, self.sub_version_vertex_extra)
             if (self.sub_version_vertex_extra in {1, 2, 3}):
-                for i in range(self.number_vertices):
-                    self.vertex_ex[i].write(raw_io)
+                Ms3dIo.write_struct_array(raw_io, self.vertex_ex)
 
             Ms3dIo.write_dword(raw_io, self.sub_version_joint_extra)
             for i in range(self.number_joints):
@@ -22,7 +22,9 @@ DEBUG = False
 
 # This should work without a blender at all
 import os
+import re
 import shlex
+import array
 
 
 def imageConvertCompat(path):
@@ -55,120 +57,74 @@ def imageConvertCompat(path):
 
 # =============================== VRML Spesific
 
+# Single pass tokenizer for vrmlFormat, in priority order:
+# plain text up to the next special char, a string (possibly unterminated or multiline),
+# a comment, a brace, a newline.
+vrml_token_re = re.compile(r'([^{}\[\]"#\n]+)|("[^"]*(?:"|\Z))|(#[^\n]*)|([{}\[\]])|(\n)')
+
+
 def vrmlFormat(data):
     """
     Keep this as a valid vrml file, but format in a way we can predict.
-    """
-    # Strip all commends - # not in strings - warning multiline strings are ignored.
-    def strip_comment(l):
-        #l = ' '.join(l.split())
-        l = l.strip()
-
-        if l.startswith('#'):
-            return ''
-
-        i = l.find('#')
-
-        if i == -1:
-            return l
-
-        # Most cases accounted for! if we have a comment at the end of the line do this...
-        #j = l.find('url "')
-        j = l.find('"')
-
-        if j == -1:  # simple no strings
-            return l[:i].strip()
-
-        q = False
-        for i, c in enumerate(l):
-            if c == '"':
-                q = not q  # invert
-
-            elif c == '#':
-                if q is False:
-                    return l[:i - 1]
-
-        return l
-
-    data = '\n'.join([strip_comment(l) for l in data.split('\n')])  # remove all whitespace
-
-    EXTRACT_STRINGS = True  # only needed when strings or filesnames containe ,[]{} chars :/
-
-    if EXTRACT_STRINGS:
-
-        # We need this so we can detect URL's
-        data = '\n'.join([' '.join(l.split()) for l in data.split('\n')])  # remove all whitespace
-
-        string_ls = []
-
-        #search = 'url "'
-        search = '"'
-
-        ok = True
-        last_i = 0
-        while ok:
-            ok = False
-            i = data.find(search, last_i)
-            if i != -1:
-
-                start = i + len(search)  # first char after end of search
-                end = data.find('"', start)
-                if end != -1:
-                    item = data[start:end]
-                    string_ls.append(item)
-                    data = data[:start] + data[end:]
-                    ok = True  # keep looking
 
-                    last_i = (end - len(item)) + 1
-                    # print(last_i, item, '|' + data[last_i] + '|')
-
-    # done with messy extracting strings part
-
-    # Bad, dont take strings into account
-    '''
-    data = data.replace('#', '\n#')
-    data = '\n'.join([ll for l in data.split('\n') for ll in (l.strip(),) if not ll.startswith('#')]) # remove all whitespace
-    '''
-    data = data.replace('{', '\n{\n')
-    data = data.replace('}', '\n}\n')
-    data = data.replace('[', '\n[\n')
-    data = data.replace(']', '\n]\n')
-    data = data.replace(',', ' , ')  # make sure comma's separate
-
-    if EXTRACT_STRINGS:
-        # add strings back in
-
-        search = '"'  # fill in these empty strings
-
-        ok = True
-        last_i = 0
-        while ok:
-            ok = False
-            i = data.find(search + '"', last_i)
-            # print(i)
-            if i != -1:
-                start = i + len(search)  # first char after end of search
-                item = string_ls.pop(0)
-                # print(item)
-                data = data[:start] + item + data[start:]
-
-                last_i = start + len(item) + 1
-
-                ok = True
-
-    # More annoying obscure cases where USE or DEF are placed on a newline
-    # data = data.replace('\nDEF ', ' DEF ')
-    # data = data.replace('\nUSE ', ' USE ')
-
-    data = '\n'.join([' '.join(l.split()) for l in data.split('\n')])  # remove all whitespace
+    Comments are stripped (# not in strings), braces and brackets are placed on their own line,
+    comma's are separated by spaces and all whitespace is collapsed.
+    This is done while scanning the data once, so strings are never extracted and re-inserted.
+    """
+    lines = []
+    line = []  # parts of the current line
+
+    for plain, string, comment, brace, newline in vrml_token_re.findall(data):
+        if plain:
+            if ',' in plain:
+                plain = plain.replace(',', ' , ')  # make sure comma's separate
+            plain = ' '.join(plain.split())
+            if plain:
+                line.append(plain)
+        elif string:
+            # Multiline strings are kept over multiple lines, the parser joins them.
+            string_lines = string.split('\n')
+            for l in string_lines[:-1]:
+                line.append(' '.join(l.split()))
+                lines.append(' '.join(line))
+                line = []
+            line.append(' '.join(string_lines[-1].split()))
+        elif brace:
+            if line:
+                lines.append(' '.join(line))
+                line = []
+            lines.append(brace)
+        elif newline:
+            if line:
+                lines.append(' '.join(line))
+                line = []
+        # else a comment, skip
+
+    if line:
+        lines.append(' '.join(line))
+
+    return [l for l in lines if l]
+
+
+def vrml_number_array(words):
+    """
+    Parse a sequence of number strings (comma's allowed as separators) into a typed array.
 
-    # Better to parse the file accounting for multiline arrays
-    '''
-    data = data.replace(',\n', ' , ') # remove line endings with commas
-    data = data.replace(']', '\n]\n') # very very annoying - but some comma's are at the end of the list, must run this again.
-    '''
+    Returns an array of ints if all values are ints, else an array of floats,
+    or None when the values are not all numbers.
+    """
+    words = ' '.join(words)
+    if ',' in words:
+        words = words.replace(',', ' ')
+    words = words.split()
 
-    return [l for l in data.split('\n') if l]
+    try:
+        return array.array('q', [int(val) for val in words])
+    except (ValueError, OverflowError):
+        try:
+            return array.array('d', [float(val) for val in words])
+        except ValueError:
+            return None
 
 NODE_NORMAL = 1  # {}
 NODE_ARRAY = 2  # []
@@ -726,14 +682,10 @@ class vrmlNode(object):
         """
 
         def array_as_number(array_string):
-            array_data = []
-            try:
-                array_data = [int(val) for val in array_string]
-            except:
-                try:
-                    array_data = [float(val) for val in array_string]
-                except:
-                    print('\tWarning, could not parse array data from field')
+            array_data = vrml_number_array(array_string)
+            if array_data is None:
+                print('\tWarning, could not parse array data from field')
+                array_data = []
 
             return array_data
 
@@ -765,12 +717,13 @@ class vrmlNode(object):
         if group == -1 or len(array_data) == 0:
             return array_data
 
-        # We want a flat list
+        # We want a flat list, typed arrays always are.
         flat = True
-        for item in array_data:
-            if type(item) == list:
-                flat = False
-                break
+        if type(array_data) != array.array:
+            for item in array_data:
+                if type(item) == list:
+                    flat = False
+                    break
 
         # make a flat array
         if flat:
@@ -791,17 +744,14 @@ class vrmlNode(object):
         if group == 0:
             return flat_array
 
-        new_array = []
-        sub_array = []
+        if type(flat_array) == array.array:
+            flat_array = flat_array.tolist()
 
-        for item in flat_array:
-            sub_array.append(item)
-            if len(sub_array) == group:
-                new_array.append(sub_array)
-                sub_array = []
+        tot_aligned = len(flat_array) - (len(flat_array) % group)
+        new_array = [flat_array[i:i + group] for i in range(0, tot_aligned, group)]
 
-        if sub_array:
-            print('\twarning, array was not aligned to requested grouping', group, 'remaining value', sub_array)
+        if tot_aligned != len(flat_array):
+            print('\twarning, array was not aligned to requested grouping', group, 'remaining value', flat_array[tot_aligned:])
 
         return new_array
 
@@ -890,6 +840,55 @@ class vrmlNode(object):
 
         return text
 
+    def parse_numline(self, l):
+        """
+        Parse a single line of numbers, a list of numbers or a list of lists
+        (one per comma separated segment). When the line can't be parsed its segments are returned as strings.
+        """
+        l_split = l.split(',')
+
+        values = None
+        # See if each item is a float?
+
+        for num_type in (int, float):
+            try:
+                values = [num_type(v) for v in l_split]
+                break
+            except:
+                pass
+
+            try:
+                values = [[num_type(v) for v in segment.split()] for segment in l_split]
+                break
+            except:
+                pass
+
+        if values is None:  # dont parse
+            values = l_split
+
+        return values
+
+    def array_data_extend(self, values):
+        """
+        Add values to the array data, keeping it a typed array while values come as typed arrays of one type.
+        """
+        # This should not extend over multiple lines however it is possible
+        if not values:
+            return
+        if not self.array_data:
+            if type(values) == array.array:
+                self.array_data = values
+            else:
+                self.array_data = list(values)
+        elif type(self.array_data) == array.array:
+            if type(values) == array.array and values.typecode == self.array_data.typecode:
+                self.array_data.extend(values)
+            else:
+                self.array_data = self.array_data.tolist()
+                self.array_data.extend(values)
+        else:
+            self.array_data.extend(values)
+
     def parse(self, i, IS_PROTO_DATA=False):
         new_i = self.__parse(i, IS_PROTO_DATA)
 
@@ -1111,32 +1110,24 @@ class vrmlNode(object):
                 child = vrmlNode(self, NODE_ARRAY, i)
                 i = child.parse(i)
 
-            elif is_numline(i):
-                l_split = l.split(',')
-
-                values = None
-                # See if each item is a float?
+            elif self.node_type == NODE_ARRAY and is_numline(i):
+                # Fast path for large coordIndex/point arrays,
+                # parse all following number lines at once into a typed array.
+                j = i + 1
+                while j < len(lines) and lines[j] not in {']', '}', '[', '{'} and is_numline(j):
+                    j += 1
 
-                for num_type in (int, float):
-                    try:
-                        values = [num_type(v) for v in l_split]
-                        break
-                    except:
-                        pass
-
-                    try:
-                        values = [[num_type(v) for v in segment.split()] for segment in l_split]
-                        break
-                    except:
-                        pass
+                values = vrml_number_array(lines[i:j])
+                if values is None:
+                    # Not only numbers, parse line by line.
+                    values = self.parse_numline(l)
+                    j = i + 1
 
-                if values is None:  # dont parse
-                    values = l_split
+                self.array_data_extend(values)
+                i = j
 
-                # This should not extend over multiple lines however it is possible
-                # print(self.array_data)
-                if values:
-                    self.array_data.extend(values)
+            elif is_numline(i):
+                self.array_data_extend(self.parse_numline(l))
                 i += 1
             else:
                 words = l.split()
@@ -39,7 +39,7 @@ if "bpy" in locals():
 
 
 import bpy
-from bpy.props import StringProperty, IntProperty, FloatProperty
+from bpy.props import StringProperty, IntProperty, FloatProperty, EnumProperty
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
 
@@ -66,6 +66,14 @@ class ImportMDD(bpy.types.Operator, ImportHelper):
             min=1, max=1000,
             default=1,
             )
+    mode = EnumProperty(
+            name="Mode",
+            items=(('SHAPE_KEYS', "Shape Keys", "Import each frame as an animated shape key"),
+                   ('PLAYBACK', "Playback", "Keep reading the file, updating the mesh on frame change "
+                                            "(file must stay available, mesh vertex count must match)"),
+                   ),
+            default='SHAPE_KEYS',
+            )
 
     @classmethod
     def poll(cls, context):
@@ -120,6 +128,12 @@ class ExportMDD(bpy.types.Operator, ExportHelper):
             min=minframe, max=maxframe,
             default=250,
             )
+    sampling = FloatProperty(
+            name="Sampling",
+            description="Frames per sample (0.1 yields 10 samples per frame)",
+            min=0.01, max=10.0,
+            default=1.0,
+            )
 
     @classmethod
     def poll(cls, context):
@@ -154,17 +168,26 @@ def menu_func_export(self, context):
 
 
 def register():
+    from . import import_mdd
+
     bpy.utils.register_module(__name__)
 
     bpy.types.INFO_MT_file_import.append(menu_func_import)
     bpy.types.INFO_MT_file_export.append(menu_func_export)
 
+    bpy.app.handlers.frame_change_pre.append(import_mdd.frame_change_handler)
+
 
 def unregister():
+    from . import import_mdd
+
     bpy.utils.unregister_module(__name__)
 
     bpy.types.INFO_MT_file_import.remove(menu_func_import)
     bpy.types.INFO_MT_file_export.remove(menu_func_export)
 
+    bpy.app.handlers.frame_change_pre.remove(import_mdd.frame_change_handler)
+    import_mdd.cache_clear()
+
 if __name__ == "__main__":
     register()
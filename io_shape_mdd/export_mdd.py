@@ -33,6 +33,8 @@ import bpy
 import mathutils
 from struct import pack
 
+from point_cache_utils import PointCacheWriter, sample_frames
+
 
 def zero_file(filepath):
     """
@@ -43,15 +45,7 @@ def zero_file(filepath):
     file.close()
 
 
-def check_vertcount(mesh, vertcount):
-    """
-    check and make sure the vertcount is consistent throughout the frame range
-    """
-    if len(mesh.vertices) != vertcount:
-        raise Exception('Error, number of verts has changed during animation, cannot export')
-
-
-def save(operator, context, filepath="", frame_start=1, frame_end=300, fps=25.0):
+def save(operator, context, filepath="", frame_start=1, frame_end=300, fps=25.0, sampling=1.0):
     """
     Blender.Window.WaitCursor(1)
 
@@ -67,7 +61,6 @@ def save(operator, context, filepath="", frame_start=1, frame_end=300, fps=25.0)
 
     orig_frame = scene.frame_current
     scene.frame_set(frame_start)
-    me = obj.to_mesh(scene, True, 'PREVIEW')
 
     #Flip y and z
     '''
@@ -79,30 +72,31 @@ def save(operator, context, filepath="", frame_start=1, frame_end=300, fps=25.0)
     '''
     mat_flip = mathutils.Matrix()
 
-    numverts = len(me.vertices)
-
-    numframes = frame_end - frame_start + 1
+    sampletimes = sample_frames(frame_start, frame_end, sampling)
+    numframes = len(sampletimes)
     f = open(filepath, 'wb')  # no Errors yet:Safe to create file
+    writer = PointCacheWriter(f, scene, obj, 'big', matrix=mat_flip)
+    numverts = writer.vertex_count
 
     # Write the header
     f.write(pack(">2i", numframes, numverts))
 
     # Write the frame times (should we use the time IPO??)
-    f.write(pack(">%df" % (numframes), *[frame / fps for frame in range(numframes)]))  # seconds
-
-    #rest frame needed to keep frames in sync
-    check_vertcount(me, numverts)
-    me.transform(mat_flip * obj.matrix_world)
-    f.write(pack(">%df" % (numverts * 3), *[axis for v in me.vertices for axis in v.co]))
-
-    for frame in range(frame_start, frame_end + 1):  # in order to start at desired frame
-        scene.frame_set(frame)
-        me = obj.to_mesh(scene, True, 'PREVIEW')
-        check_vertcount(me, numverts)
-        me.transform(mat_flip * obj.matrix_world)
-
-        # Write the vertex data
-        f.write(pack(">%df" % (numverts * 3), *[axis for v in me.vertices for axis in v.co]))
+    f.write(pack(">%df" % (numframes), *[i * sampling / fps for i in range(numframes)]))  # seconds
+
+    try:
+        #rest frame needed to keep frames in sync
+        writer.write_sample()
+
+        for frame, subframe in sampletimes:  # in order to start at desired frame
+            # Write the vertex data
+            writer.write_sample(frame, subframe)
+    except ValueError as e:
+        f.close()
+        zero_file(filepath)
+        scene.frame_set(orig_frame)
+        operator.report({'ERROR'}, str(e))
+        return {'CANCELLED'}
 
     f.close()
 
@@ -32,7 +32,18 @@
 # Bill Niewuendorp
 
 import bpy
-from struct import unpack
+from bpy.app.handlers import persistent
+from struct import unpack, error
+import array
+import bisect
+import mmap
+import os
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 def set_linear_interpolation(obj, shapekey):
     anim_data = obj.data.shape_keys.animation_data
@@ -80,7 +91,151 @@ def obj_update_frame(file, scene, obj, start, fr, step):
     obj.data.update()
 
 
-def load(operator, context, filepath, frame_start=0, frame_step=1):
+class MDDCache:
+    """
+    Memory-mapped MDD file, giving the vertex coordinates of any (sub)frame.
+    """
+    __slots__ = ("filepath", "stat", "file", "data", "frames", "points", "times")
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.file = open(filepath, 'rb')
+        try:
+            self.stat = os.fstat(self.file.fileno())[6:9]
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except:
+            self.file.close()
+            raise
+
+        try:
+            frames, self.points = unpack(">2i", self.data[:8])
+            self.times = unpack(">%df" % frames, self.data[8:8 + frames * 4])
+        except:
+            self.close()
+            raise
+        # don't read past the end of a truncated file
+        self.frames = min(frames, (len(self.data) - 8 - frames * 4) // max(1, self.points * 12))
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def sample_frames(self, start, step, fps):
+        """
+        Scene frame of each sample, from stored frame times when they are usable.
+        """
+        times = self.times[:self.frames]
+        if all(t_next > t for t, t_next in zip(times, times[1:])):
+            return [start + (t - times[0]) * fps * step for t in times]
+        return [start + i * step for i in range(self.frames)]
+
+    def block(self, index):
+        """
+        Flat coordinates of a sample, as native floats.
+        """
+        size = self.points * 3
+        offset = 8 + len(self.times) * 4 + index * size * 4
+        if numpy is not None:
+            return numpy.frombuffer(self.data, dtype='>f4', count=size, offset=offset).astype(numpy.float32)
+        coords = array.array('f')
+        coords.frombytes(self.data[offset:offset + size * 4])
+        if sys.byteorder == 'little':
+            coords.byteswap()
+        return coords
+
+    def coords(self, frame, start, step, fps):
+        """
+        Flat coordinates at given scene frame, linearly interpolated between samples.
+        """
+        sample_frames = self.sample_frames(start, step, fps)
+        index = bisect.bisect_right(sample_frames, frame) - 1
+        if index < 0:
+            return self.block(0)
+        if index >= self.frames - 1:
+            return self.block(self.frames - 1)
+
+        fac = (frame - sample_frames[index]) / (sample_frames[index + 1] - sample_frames[index])
+        coords = self.block(index)
+        if fac == 0.0:
+            return coords
+        coords_next = self.block(index + 1)
+        if numpy is not None:
+            coords += (coords_next - coords) * fac
+            return coords
+        return array.array('f', [co + (co_next - co) * fac for co, co_next in zip(coords, coords_next)])
+
+
+_caches = {}
+
+
+def cache_get(filepath):
+    filepath = bpy.path.abspath(filepath)
+    cache = _caches.get(filepath)
+    if cache is not None:
+        # reload when the file changed
+        try:
+            if os.stat(filepath)[6:9] == cache.stat:
+                return cache
+        except OSError:
+            pass
+        cache.close()
+        del _caches[filepath]
+    try:
+        cache = _caches[filepath] = MDDCache(filepath)
+    except (OSError, ValueError, error) as e:
+        print("MDD playback: cannot read %r (%s)" % (filepath, e))
+        return None
+    return cache
+
+
+def cache_clear():
+    for cache in _caches.values():
+        cache.close()
+    _caches.clear()
+
+
+def obj_playback_update(scene, obj):
+    cache = cache_get(obj["mdd_filepath"])
+    me = obj.data
+    if cache is None or cache.frames == 0 or cache.points != len(me.vertices):
+        return
+    fps = scene.render.fps / scene.render.fps_base
+    coords = cache.coords(scene.frame_current_final, obj["mdd_frame_start"], obj["mdd_frame_step"], fps)
+    me.vertices.foreach_set("co", coords)
+    me.update()
+
+
+@persistent
+def frame_change_handler(scene):
+    for obj in scene.objects:
+        if obj.type == 'MESH' and "mdd_filepath" in obj:
+            obj_playback_update(scene, obj)
+
+
+def load_playback(operator, context, filepath, frame_start, frame_step):
+    scene = context.scene
+    obj = context.object
+
+    cache = cache_get(filepath)
+    if cache is None:
+        operator.report({'ERROR'}, "Cannot read %r" % filepath)
+        return {'CANCELLED'}
+    if cache.points != len(obj.data.vertices):
+        operator.report({'ERROR'}, "MDD has %d points, mesh has %d vertices" % (cache.points, len(obj.data.vertices)))
+        return {'CANCELLED'}
+
+    print('\tpoints:%d frames:%d' % (cache.points, cache.frames))
+    print('\tstart frame:%d step:%d' % (frame_start, frame_step))
+
+    obj["mdd_filepath"] = filepath
+    obj["mdd_frame_start"] = frame_start
+    obj["mdd_frame_step"] = frame_step
+    obj_playback_update(scene, obj)
+
+    return {'FINISHED'}
+
+
+def load(operator, context, filepath, frame_start=0, frame_step=1, mode='SHAPE_KEYS'):
 
     scene = context.scene
     obj = context.object
@@ -90,6 +245,9 @@ def load(operator, context, filepath, frame_start=0, frame_step=1):
     if bpy.ops.object.mode_set.poll():
         bpy.ops.object.mode_set(mode='OBJECT')
 
+    if mode == 'PLAYBACK':
+        return load_playback(operator, context, filepath, frame_start, frame_step)
+
     file = open(filepath, 'rb')
     frames, points = unpack(">2i", file.read(8))
     time = unpack((">%df" % frames), file.read(frames * 4))
@@ -37,6 +37,11 @@ import mathutils
 import math
 from bpy_extras import view3d_utils
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 ##########################################
 ####### General functions ################
@@ -77,7 +82,7 @@ def cache_read(tool, object, bm, input_method, boundaries):
         and mod.type == 'MIRROR']
     if modifiers != looptools_cache[tool]["modifiers"]:
         return(False, False, False, False, False)
-    input = [v.index for v in bm.verts if v.select and not v.hide]
+    input = cache_selection_hash(bm)
     if input != looptools_cache[tool]["input"]:
         return(False, False, False, False, False)
     # reading values
@@ -89,6 +94,18 @@ def cache_read(tool, object, bm, input_method, boundaries):
     return(True, single_loops, loops, derived, mapping)
 
 
+# fingerprint of the selected vertices, to check if the cache is valid
+# without storing (and comparing) a full list of indices
+def cache_selection_hash(bm):
+    total = 0
+    hash_value = 0
+    for v in bm.verts:
+        if v.select and not v.hide:
+            total += 1
+            hash_value = hash((hash_value, v.index))
+    return((len(bm.verts), total, hash_value))
+
+
 # store information in the cache
 def cache_write(tool, object, bm, input_method, boundaries, single_loops,
 loops, derived, mapping):
@@ -96,7 +113,7 @@ loops, derived, mapping):
     if tool in looptools_cache:
         del looptools_cache[tool]
     # prepare values to be saved to cache
-    input = [v.index for v in bm.verts if v.select and not v.hide]
+    input = cache_selection_hash(bm)
     modifiers = [mod.name for mod in object.modifiers if mod.show_viewport \
         and mod.type == 'MIRROR']
     # update cache
@@ -108,44 +125,7 @@ loops, derived, mapping):
 
 # calculates natural cubic splines through all given knots
 def calculate_cubic_splines(bm_mod, tknots, knots):
-    # hack for circular loops
-    if knots[0] == knots[-1] and len(knots) > 1:
-        circular = True
-        k_new1 = []
-        for k in range(-1, -5, -1):
-            if k - 1 < -len(knots):
-                k += len(knots)
-            k_new1.append(knots[k-1])
-        k_new2 = []
-        for k in range(4):
-            if k + 1 > len(knots) - 1:
-                k -= len(knots)
-            k_new2.append(knots[k+1])
-        for k in k_new1:
-            knots.insert(0, k)
-        for k in k_new2:
-            knots.append(k)
-        t_new1 = []
-        total1 = 0
-        for t in range(-1, -5, -1):
-            if t - 1 < -len(tknots):
-                t += len(tknots)
-            total1 += tknots[t] - tknots[t-1]
-            t_new1.append(tknots[0] - total1)
-        t_new2 = []
-        total2 = 0
-        for t in range(4):
-            if t + 1 > len(tknots) - 1:
-                t -= len(tknots)
-            total2 += tknots[t+1] - tknots[t]
-            t_new2.append(tknots[-1] + total2)
-        for t in t_new1:
-            tknots.insert(0, t)
-        for t in t_new2:
-            tknots.append(t)
-    else:
-        circular = False
-    # end of hack
+    circular = calculate_cubic_splines_circular(tknots, knots)
 
     n = len(knots)
     if n < 2:
@@ -197,6 +177,47 @@ def calculate_cubic_splines(bm_mod, tknots, knots):
     return(splines)
 
 
+# hack for circular loops, extends the knots (in place) with four knots on
+# both sides so the splines are smooth at the start of the loop
+def calculate_cubic_splines_circular(tknots, knots):
+    if knots[0] != knots[-1] or len(knots) < 2:
+        return(False)
+    k_new1 = []
+    for k in range(-1, -5, -1):
+        if k - 1 < -len(knots):
+            k += len(knots)
+        k_new1.append(knots[k-1])
+    k_new2 = []
+    for k in range(4):
+        if k + 1 > len(knots) - 1:
+            k -= len(knots)
+        k_new2.append(knots[k+1])
+    for k in k_new1:
+        knots.insert(0, k)
+    for k in k_new2:
+        knots.append(k)
+    t_new1 = []
+    total1 = 0
+    for t in range(-1, -5, -1):
+        if t - 1 < -len(tknots):
+            t += len(tknots)
+        total1 += tknots[t] - tknots[t-1]
+        t_new1.append(tknots[0] - total1)
+    t_new2 = []
+    total2 = 0
+    for t in range(4):
+        if t + 1 > len(tknots) - 1:
+            t -= len(tknots)
+        total2 += tknots[t+1] - tknots[t]
+        t_new2.append(tknots[-1] + total2)
+    for t in t_new1:
+        tknots.insert(0, t)
+    for t in t_new2:
+        tknots.append(t)
+
+    return(True)
+
+
 # calculates linear splines through all given knots
 def calculate_linear_splines(bm_mod, tknots, knots):
     splines = []
@@ -304,6 +325,133 @@ def calculate_splines(interpolation, bm_mod, tknots, knots):
     return(splines)
 
 
+# calculate splines through the knots of many loops at once (numpy version
+# of calculate_splines), co is an array with the coordinates of the knots,
+# knots are row indices into co and tknots the matching relative positions
+# returns the knot positions, coefficients per knot and the knot offset of
+# every loop. The cubic splines of all loops share a single system
+def calculate_splines_array(interpolation, co, tknots, knots):
+    all_tknots = []
+    all_knots = []
+    offsets = [0]
+    for i in range(len(knots)):
+        t = list(tknots[i])
+        k = list(knots[i])
+        if interpolation == 'cubic':
+            calculate_cubic_splines_circular(t, k)
+        all_tknots += t
+        all_knots += k
+        offsets.append(len(all_knots))
+    x = numpy.array(all_tknots, dtype=numpy.float64)
+    a = co[numpy.array(all_knots, dtype=numpy.intp)].reshape(-1, 3)
+    n = len(x)
+    coefficients = numpy.zeros((n, 4, 3))
+    coefficients[:, 0] = a
+    if n < 2:
+        return(x, coefficients, offsets)
+
+    # segments run from each knot to the next, except for the last knot of
+    # each loop
+    last = numpy.zeros(n, dtype=bool)
+    last[numpy.array(offsets[1:], dtype=numpy.intp) - 1] = True
+    h = numpy.ones(n)
+    h[:-1] = x[1:] - x[:-1]
+    h[last] = 1.0
+    h[h == 0] = 1e-8
+    seg = numpy.flatnonzero(~last)
+    da = numpy.zeros((n, 3))
+    da[seg] = (a[seg + 1] - a[seg]) / h[seg, None]
+
+    if interpolation == 'linear':
+        coefficients[seg, 1] = da[seg]
+        return(x, coefficients, offsets)
+
+    # natural cubic splines, the first and last knot of each loop have no
+    # curvature, which decouples the loops
+    first = numpy.zeros(n, dtype=bool)
+    first[numpy.array(offsets[:-1], dtype=numpy.intp)] = True
+    inner = numpy.flatnonzero(~(first | last))
+    sub = numpy.zeros(n)
+    diag = numpy.ones(n)
+    sup = numpy.zeros(n)
+    rhs = numpy.zeros((n, 3))
+    sub[inner] = h[inner - 1]
+    diag[inner] = 2 * (h[inner - 1] + h[inner])
+    sup[inner] = h[inner]
+    rhs[inner] = 3 * (da[inner] - da[inner - 1])
+    c = calculate_tridiagonal_array(sub, diag, sup, rhs)
+
+    hs = h[seg, None]
+    coefficients[seg, 1] = da[seg] - hs * (c[seg + 1] + 2 * c[seg]) / 3
+    coefficients[seg, 2] = c[seg]
+    coefficients[seg, 3] = (c[seg + 1] - c[seg]) / (3 * hs)
+
+    return(x, coefficients, offsets)
+
+
+# evaluate splines from calculate_splines_array() at the given relative
+# positions (one list of positions per loop), returns all locations
+def calculate_splines_array_locs(splines, tpoints):
+    x, coefficients, offsets = splines
+    segments = []
+    for i in range(len(offsets) - 1):
+        m = numpy.asarray(tpoints[i], dtype=numpy.float64)
+        start = offsets[i]
+        knots = x[start:offsets[i+1]]
+        if len(knots) < 2:
+            segments.append(numpy.full(len(m), start, dtype=numpy.intp))
+            continue
+        # same segment as found by searching for m in the (sorted) tknots
+        n = numpy.searchsorted(knots, m)
+        exact = knots[numpy.minimum(n, len(knots) - 1)] == m
+        n = numpy.clip(numpy.where(exact, n, n - 1), 0, len(knots) - 2)
+        segments.append(n + start)
+    if not segments:
+        return(numpy.zeros((0, 3)))
+    segments = numpy.concatenate(segments)
+    m = numpy.concatenate([numpy.asarray(t, dtype=numpy.float64) for t in
+        tpoints[:len(offsets) - 1]])
+    dt = (m - x[segments])[:, None]
+    a, b, c, d = numpy.rollaxis(coefficients[segments], 1)
+
+    return(a + dt * (b + dt * (c + dt * d)))
+
+
+# solve tridiagonal systems for all rows at once, using parallel cyclic
+# reduction. rhs can have multiple columns, which are solved together
+def calculate_tridiagonal_array(sub, diag, sup, rhs):
+    n = len(diag)
+    step = 1
+    while step < n:
+        # rows outside of the system are identity rows
+        sub_prev = numpy.zeros(n)
+        diag_prev = numpy.ones(n)
+        sup_prev = numpy.zeros(n)
+        rhs_prev = numpy.zeros(rhs.shape)
+        sub_prev[step:] = sub[:-step]
+        diag_prev[step:] = diag[:-step]
+        sup_prev[step:] = sup[:-step]
+        rhs_prev[step:] = rhs[:-step]
+        sub_next = numpy.zeros(n)
+        diag_next = numpy.ones(n)
+        sup_next = numpy.zeros(n)
+        rhs_next = numpy.zeros(rhs.shape)
+        sub_next[:-step] = sub[step:]
+        diag_next[:-step] = diag[step:]
+        sup_next[:-step] = sup[step:]
+        rhs_next[:-step] = rhs[step:]
+
+        alpha = -sub / diag_prev
+        gamma = -sup / diag_next
+        diag = diag + alpha * sup_prev + gamma * sub_next
+        rhs = rhs + alpha[:, None] * rhs_prev + gamma[:, None] * rhs_next
+        sub = alpha * sub_prev
+        sup = gamma * sup_next
+        step *= 2
+
+    return(rhs / diag[:, None])
+
+
 # check loops and only return valid ones
 def check_loops(loops, mapping, bm_mod):
     valid_loops = []
@@ -444,6 +592,8 @@ def get_connected_selections(edge_keys):
     loops = []
     while len(vert_verts) > 0:
         loop = [iter(vert_verts.keys()).__next__()]
+        # same vertices as loop, for fast lookups
+        loop_verts = set(loop)
         growing = True
         flipped = False
 
@@ -459,7 +609,7 @@ def get_connected_selections(edge_keys):
             else:
                 extended = False
                 for i, next_vert in enumerate(vert_verts[loop[-1]]):
-                    if next_vert not in loop:
+                    if next_vert not in loop_verts:
                         vert_verts[loop[-1]].pop(i)
                         if len(vert_verts[loop[-1]]) == 0:
                             del vert_verts[loop[-1]]
@@ -470,6 +620,7 @@ def get_connected_selections(edge_keys):
                             else:
                                 vert_verts[next_vert].remove(loop[-1])
                         loop.append(next_vert)
+                        loop_verts.add(next_vert)
                         extended = True
                         break
                 if not extended:
@@ -550,23 +701,24 @@ def get_mapping(derived, bm, bm_mod, single_vertices, full_search, loops):
     # non-selected vertices around single vertices also need to be mapped
     if single_vertices:
         mapping = dict([[vert, -1] for vert in single_vertices])
-        verts_mod = [bm_mod.verts[vert] for vert in single_vertices]
+        verts_mod = get_mapping_hash([bm_mod.verts[vert] for vert in \
+            single_vertices])
         for v in verts:
-            for v_mod in verts_mod:
-                if (v.co - v_mod.co).length < 1e-6:
-                    mapping[v_mod.index] = v.index
-                    break
-        real_singles = [v_real for v_real in mapping.values() if v_real>-1]
+            v_mod = get_mapping_find(verts_mod, v.co)
+            if v_mod:
+                mapping[v_mod[1].index] = v.index
+        real_singles = set(v_real for v_real in mapping.values() if \
+            v_real>-1)
 
-        verts_indices = [vert.index for vert in verts]
+        verts_indices = set(vert.index for vert in verts)
         for face in [face for face in bm.faces if not face.select \
         and not face.hide]:
             for vert in face.verts:
                 if vert.index in real_singles:
                     for v in face.verts:
                         if not v.index in verts_indices:
-                            if v not in verts:
-                                verts.append(v)
+                            verts_indices.add(v.index)
+                            verts.append(v)
                     break
 
     # create mapping of derived indices to indices
@@ -574,17 +726,46 @@ def get_mapping(derived, bm, bm_mod, single_vertices, full_search, loops):
     if single_vertices:
         for single in single_vertices:
             mapping[single] = -1
-    verts_mod = [bm_mod.verts[i] for i in mapping.keys()]
+    verts_mod = get_mapping_hash([bm_mod.verts[i] for i in mapping.keys()])
     for v in verts:
-        for v_mod in verts_mod:
-            if (v.co - v_mod.co).length < 1e-6:
-                mapping[v_mod.index] = v.index
-                verts_mod.remove(v_mod)
-                break
+        v_mod = get_mapping_find(verts_mod, v.co, remove=True)
+        if v_mod:
+            mapping[v_mod[1].index] = v.index
 
     return(mapping)
 
 
+# spatial hash of vertices for get_mapping_find(), cells are as big as the
+# distance at which vertices match, so only neighbouring cells are searched
+def get_mapping_hash(verts, distance=1e-6):
+    cells = {}
+    for order, v in enumerate(verts):
+        key = tuple(int(math.floor(c / distance)) for c in v.co)
+        if key in cells:
+            cells[key].append((order, v))
+        else:
+            cells[key] = [(order, v)]
+    return(cells)
+
+
+# find the first vertex (in the order given to get_mapping_hash) closer than
+# distance to co, returns (order, vertex) or False
+def get_mapping_find(cells, co, remove=False, distance=1e-6):
+    x, y, z = [int(math.floor(c / distance)) for c in co]
+    found = False
+    for key in [(x + i, y + j, z + k) for i in (-1, 0, 1) for j in (-1, 0, 1)
+    for k in (-1, 0, 1)]:
+        for item in cells.get(key, ()):
+            if found and item[0] > found[0]:
+                continue
+            if (co - item[1].co).length < distance:
+                found = item
+                found_key = key
+    if found and remove:
+        cells[found_key].remove(found)
+    return(found)
+
+
 # calculate the determinant of a matrix
 def matrix_determinant(m):
     determinant = m[0][0] * m[1][1] * m[2][2] + m[0][1] * m[1][2] * m[2][0] \
@@ -759,17 +940,7 @@ def initialise():
 def move_verts(object, bm, mapping, move, lock, influence):
     if lock:
         lock_x, lock_y, lock_z = lock
-        orientation = bpy.context.space_data.transform_orientation
-        custom = bpy.context.space_data.current_orientation
-        if custom:
-            mat = custom.matrix.to_4x4().inverted() * object.matrix_world.copy()
-        elif orientation == 'LOCAL':
-            mat = mathutils.Matrix.Identity(4)
-        elif orientation == 'VIEW':
-            mat = bpy.context.region_data.view_matrix.copy() * \
-                object.matrix_world.copy()
-        else: # orientation == 'GLOBAL'
-            mat = object.matrix_world.copy()
+        mat = move_verts_lock_matrix(object)
         mat_inv = mat.inverted()
 
     for loop in move:
@@ -803,6 +974,57 @@ def move_verts(object, bm, mapping, move, lock, influence):
     bm.faces.ensure_lookup_table()
 
 
+# move the vertices to their new locations (numpy version of move_verts),
+# indices and locs are arrays, all vertices are written in a single pass
+def move_verts_array(object, bm, mapping, indices, locs, lock, influence):
+    if mapping:
+        indices = numpy.array([mapping[index] for index in indices.tolist()],
+            dtype=numpy.intp)
+        valid = indices != -1
+        indices = indices[valid]
+        locs = locs[valid]
+    verts = [bm.verts[index] for index in indices.tolist()]
+    if lock or influence >= 0:
+        co = numpy.array([v.co[:] for v in verts]).reshape(-1, 3)
+
+    if lock:
+        mat = move_verts_lock_matrix(object)
+        # vector * matrix, same as used by move_verts()
+        delta = numpy.dot(locs - co, numpy.array(mat.inverted().to_3x3()))
+        for axis in range(3):
+            if lock[axis]:
+                delta[:, axis] = 0
+        locs = co + numpy.dot(delta, numpy.array(mat.to_3x3()))
+    if influence >= 0:
+        locs = locs*(influence/100) + co*((100-influence)/100)
+
+    for v, loc in zip(verts, locs.tolist()):
+        v.co = loc
+    bm.normal_update()
+    object.data.update()
+
+    bm.verts.ensure_lookup_table()
+    bm.edges.ensure_lookup_table()
+    bm.faces.ensure_lookup_table()
+
+
+# matrix of the transform orientation in which axes are locked
+def move_verts_lock_matrix(object):
+    orientation = bpy.context.space_data.transform_orientation
+    custom = bpy.context.space_data.current_orientation
+    if custom:
+        mat = custom.matrix.to_4x4().inverted() * object.matrix_world.copy()
+    elif orientation == 'LOCAL':
+        mat = mathutils.Matrix.Identity(4)
+    elif orientation == 'VIEW':
+        mat = bpy.context.region_data.view_matrix.copy() * \
+            object.matrix_world.copy()
+    else: # orientation == 'GLOBAL'
+        mat = object.matrix_world.copy()
+
+    return(mat)
+
+
 # load custom tool settings
 def settings_load(self):
     lt = bpy.context.window_manager.looptools
@@ -3075,6 +3297,72 @@ points, splines):
     return(move)
 
 
+# numpy version of relax_calculate_t and relax_calculate_verts, runs all
+# iterations on an array of coordinates and returns the indices and new
+# locations of the points
+def relax_calculate_verts_array(bm_mod, interpolation, knots, points, regular,
+iterations):
+    valid = [i for i in range(len(knots)) if len(knots[i]) > 1]
+    knots = [knots[i] for i in valid]
+    points = [points[i] for i in valid]
+    verts = sorted(set(v for k in knots for v in k) |
+        set(v for p in points for v in p))
+    rows = dict([[v, i] for i, v in enumerate(verts)])
+    co = numpy.array([bm_mod.verts[v].co[:] for v in verts]).reshape(-1, 3)
+
+    # order of knots and points along the loops, see relax_calculate_t
+    mix = []
+    mix_knot = []
+    mix_starts = []
+    for i in range(len(knots)):
+        mix_starts.append(len(mix))
+        amount = len(knots[i]) + len(points[i])
+        for j in range(amount):
+            if j%2 == 0:
+                mix.append(knots[i][round(j/2)])
+                mix_knot.append(True)
+            elif j == amount-1:
+                mix.append(knots[i][-1])
+                mix_knot.append(True)
+            else:
+                mix.append(points[i][int(j/2)])
+                mix_knot.append(False)
+    mix = numpy.array([rows[v] for v in mix], dtype=numpy.intp)
+    mix_knot = numpy.array(mix_knot, dtype=bool)
+    mix_starts = numpy.array(mix_starts, dtype=numpy.intp)
+    mix_lengths = numpy.diff(numpy.append(mix_starts, len(mix)))
+    knots_split = numpy.cumsum([len(k) for k in knots])[:-1]
+    points_split = numpy.cumsum([len(p) for p in points])[:-1]
+    knots_rows = [[rows[v] for v in k] for k in knots]
+    points_rows = numpy.array([rows[v] for p in points for v in p],
+        dtype=numpy.intp)
+
+    for iteration in range(iterations):
+        if not len(mix):
+            break
+        locs = co[mix]
+        lengths = numpy.zeros(len(mix))
+        lengths[1:] = numpy.sqrt(((locs[1:] - locs[:-1])**2).sum(axis=1))
+        lengths[mix_starts] = 0
+        t = numpy.cumsum(lengths)
+        t -= numpy.repeat(t[mix_starts], mix_lengths)
+        tknots = numpy.split(t[mix_knot], knots_split)
+        if regular:
+            tpoints = [(tk[:len(p)] + tk[1:len(p)+1]) / 2 for tk, p in
+                zip(tknots, points)]
+        else:
+            tpoints = numpy.split(t[~mix_knot], points_split)
+        splines = calculate_splines_array(interpolation, co, tknots,
+            knots_rows)
+        locs = calculate_splines_array_locs(splines, tpoints)
+        co[points_rows] = (co[points_rows] + locs) / 2
+
+    points_rows = numpy.unique(points_rows)
+
+    return(numpy.array(verts, dtype=numpy.intp)[points_rows],
+        co[points_rows])
+
+
 ##########################################
 ####### Space functions ##################
 ##########################################
@@ -3131,6 +3419,38 @@ splines):
     return(move)
 
 
+# numpy version of space_calculate_t and space_calculate_verts for all loops,
+# returns the indices and new locations of the vertices
+def space_calculate_verts_array(bm_mod, interpolation, loops):
+    knots = []
+    for loop, circular in loops:
+        if circular:
+            knots.append(loop + [loop[0]])
+        else:
+            knots.append(loop[:])
+    knots = [k for k in knots if len(k) > 1]
+    verts = sorted(set(v for k in knots for v in k))
+    rows = dict([[v, i] for i, v in enumerate(verts)])
+    co = numpy.array([bm_mod.verts[v].co[:] for v in verts]).reshape(-1, 3)
+    knots_rows = [[rows[v] for v in k] for k in knots]
+
+    tknots = []
+    tpoints = []
+    for k in knots_rows:
+        locs = co[k]
+        t = numpy.zeros(len(k))
+        t[1:] = numpy.cumsum(numpy.sqrt(((locs[1:] - locs[:-1])**2).sum(
+            axis=1)))
+        tknots.append(t)
+        tpoints.append(numpy.arange(len(k) - 1) * (t[-1] / (len(k) - 1)))
+    splines = calculate_splines_array(interpolation, co, tknots, knots_rows)
+    locs = calculate_splines_array_locs(splines, tpoints)
+    indices = numpy.array([v for k in knots for v in k[:-1]],
+        dtype=numpy.intp)
+
+    return(indices, locs)
+
+
 ##########################################
 ####### Operators ########################
 ##########################################
@@ -4022,17 +4342,24 @@ class Relax(bpy.types.Operator):
             cache_write("Relax", object, bm, self.input, False, False, loops,
                 derived, mapping)
 
-        for iteration in range(int(self.iterations)):
-            # calculate splines and new positions
-            tknots, tpoints = relax_calculate_t(bm_mod, knots, points,
-                self.regular)
-            splines = []
-            for i in range(len(knots)):
-                splines.append(calculate_splines(self.interpolation, bm_mod,
-                    tknots[i], knots[i]))
-            move = [relax_calculate_verts(bm_mod, self.interpolation,
-                tknots, knots, tpoints, points, splines)]
-            move_verts(object, bm, mapping, move, False, -1)
+        if numpy is not None:
+            # a derived mesh isn't updated, so iterations give the same result
+            indices, locs = relax_calculate_verts_array(bm_mod,
+                self.interpolation, knots, points, self.regular,
+                1 if derived else int(self.iterations))
+            move_verts_array(object, bm, mapping, indices, locs, False, -1)
+        else:
+            for iteration in range(int(self.iterations)):
+                # calculate splines and new positions
+                tknots, tpoints = relax_calculate_t(bm_mod, knots, points,
+                    self.regular)
+                splines = []
+                for i in range(len(knots)):
+                    splines.append(calculate_splines(self.interpolation,
+                        bm_mod, tknots[i], knots[i]))
+                move = [relax_calculate_verts(bm_mod, self.interpolation,
+                    tknots, knots, tpoints, points, splines)]
+                move_verts(object, bm, mapping, move, False, -1)
 
         # cleaning up
         if derived:
@@ -4132,22 +4459,28 @@ class Space(bpy.types.Operator):
             cache_write("Space", object, bm, self.input, False, False, loops,
                 derived, mapping)
 
-        move = []
-        for loop in loops:
-            # calculate splines and new positions
-            if loop[1]: # circular
-                loop[0].append(loop[0][0])
-            tknots, tpoints = space_calculate_t(bm_mod, loop[0][:])
-            splines = calculate_splines(self.interpolation, bm_mod,
-                tknots, loop[0][:])
-            move.append(space_calculate_verts(bm_mod, self.interpolation,
-                tknots, tpoints, loop[0][:-1], splines))
-        # move vertices to new locations
         if self.lock_x or self.lock_y or self.lock_z:
             lock = [self.lock_x, self.lock_y, self.lock_z]
         else:
             lock = False
-        move_verts(object, bm, mapping, move, lock, self.influence)
+        if numpy is not None:
+            indices, locs = space_calculate_verts_array(bm_mod,
+                self.interpolation, loops)
+            move_verts_array(object, bm, mapping, indices, locs, lock,
+                self.influence)
+        else:
+            move = []
+            for loop in loops:
+                # calculate splines and new positions
+                if loop[1]: # circular
+                    loop[0].append(loop[0][0])
+                tknots, tpoints = space_calculate_t(bm_mod, loop[0][:])
+                splines = calculate_splines(self.interpolation, bm_mod,
+                    tknots, loop[0][:])
+                move.append(space_calculate_verts(bm_mod, self.interpolation,
+                    tknots, tpoints, loop[0][:-1], splines))
+            # move vertices to new locations
+            move_verts(object, bm, mapping, move, lock, self.influence)
 
         # cleaning up
         if derived:
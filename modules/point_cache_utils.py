@@ -0,0 +1,104 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8 compliant>
+
+"""
+Streaming writer of vertex point caches, shared by the PC2 and MDD exporters.
+
+Each sample evaluates the object into a temporary mesh (removed right away),
+reads all coordinates with a single foreach_get into a reused float buffer,
+and writes it with a single write() call, in the byte order of the format.
+"""
+
+import array
+import math
+import sys
+
+import bpy
+import mathutils
+
+
+def sample_frames(start, end, sampling=1.0):
+    """
+    Return (frame, subframe) pairs from start to end (included),
+    every 'sampling' frames (0.1 gives 10 samples per frame).
+    """
+    count = int((end - start) / sampling + 1e-6) + 1
+    frames = []
+    for i in range(count):
+        subframe, frame = math.modf(start + i * sampling)
+        if subframe < 0.0:
+            subframe += 1.0
+            frame -= 1.0
+        frames.append((int(frame), subframe))
+    return frames
+
+
+class PointCacheWriter:
+    """
+    Write the evaluated vertex coordinates of an object, one sample at a time.
+
+    - matrix: applied to coordinates (after world matrix if use_world_space).
+    - byteorder: 'little' or 'big', as in sys.byteorder.
+    """
+    __slots__ = ("file", "scene", "obj", "matrix", "use_world_space", "apply_modifiers",
+                 "byteswap", "vertex_count", "buffer")
+
+    def __init__(self, file, scene, obj, byteorder, matrix=None, use_world_space=True, apply_modifiers=True):
+        self.file = file
+        self.scene = scene
+        self.obj = obj
+        self.matrix = mathutils.Matrix() if matrix is None else matrix
+        self.use_world_space = use_world_space
+        self.apply_modifiers = apply_modifiers
+        self.byteswap = (byteorder != sys.byteorder)
+
+        me = self._mesh_get()
+        self.vertex_count = len(me.vertices)
+        bpy.data.meshes.remove(me)
+
+        self.buffer = array.array('f', (0.0,)) * (self.vertex_count * 3)
+
+    def _mesh_get(self):
+        return self.obj.to_mesh(self.scene, self.apply_modifiers, 'PREVIEW')
+
+    def write_sample(self, frame=None, subframe=0.0):
+        """
+        Write coordinates at given frame (current one if None).
+        Raise a ValueError if the vertex count changed.
+        """
+        if frame is not None:
+            self.scene.frame_set(frame, subframe)
+
+        me = self._mesh_get()
+        try:
+            if len(me.vertices) != self.vertex_count:
+                raise ValueError("Number of vertices has changed during animation (%d instead of %d), "
+                                 "cannot export" % (len(me.vertices), self.vertex_count))
+            if self.use_world_space:
+                me.transform(self.matrix * self.obj.matrix_world)
+            else:
+                me.transform(self.matrix)
+            me.vertices.foreach_get("co", self.buffer)
+        finally:
+            bpy.data.meshes.remove(me)
+
+        if self.byteswap:
+            self.buffer.byteswap()
+        self.file.write(self.buffer)
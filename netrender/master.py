@@ -384,13 +384,11 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         elif frame.status == netrender.model.FRAME_DONE:
                             filename = job.getResultPath(frame.getRenderFilename())
 
-                            thumbname = thumbnail.generate(filename)
+                            data = self.server.thumbnails.get(filename)
 
-                            if thumbname:
-                                f = open(thumbname, 'rb')
+                            if data:
                                 self.send_head(content = "image/jpeg")
-                                shutil.copyfileobj(f, self.wfile)
-                                f.close()
+                                self.wfile.write(data)
                             else: # thumbnail couldn't be generated
                                 self.send_head(http.client.PARTIAL_CONTENT)
                                 return
@@ -840,7 +838,10 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         if job.hasRenderResult():
                             if job_result == netrender.model.FRAME_DONE:
                                 frame.addDefaultRenderResult()
-                                self.write_file(job.getResultPath(frame.getRenderFilename()))
+                                filename = job.getResultPath(frame.getRenderFilename())
+                                self.write_file(filename)
+                                # eagerly make the thumbnail for the web interface
+                                self.server.thumbnails.resultUpdated(filename)
 
                             elif job_result == netrender.model.FRAME_ERROR:
                                 # blacklist slave on this job on error
@@ -927,7 +928,9 @@ class RenderHandler(http.server.BaseHTTPRequestHandler):
                         self.send_head(content = None)
                         
                         if job.hasRenderResult():
-                            self.write_file(os.path.join(os.path.join(job.save_path, "%06d.jpg" % job_frame)))
+                            length = int(self.headers['content-length'])
+                            filename = job.getResultPath(frame.getRenderFilename())
+                            self.server.thumbnails.upload(filename, self.rfile.read(length))
 
                     else: # frame not found
                         self.send_head(http.client.NO_CONTENT)
@@ -991,6 +994,8 @@ class RenderMasterServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
         self.balancer.addPriority(netrender.balancing.NewJobPriority())
         self.balancer.addPriority(netrender.balancing.MinimumTimeBetweenDispatchPriority(limit = 2))
 
+        self.thumbnails = thumbnail.ThumbnailService()
+
         super().__init__(address, handler_class)
 
     def restore(self, jobs, slaves, balancer = None):
@@ -1187,6 +1192,7 @@ def runMaster(address, broadcast, clear, force, path, update_stats, test_break,u
                 start_time = time.time()
 
     httpd.server_close()
+    httpd.thumbnails.stop()
     if clear:
         clearMaster(httpd.path)
     else:
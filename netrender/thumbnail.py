@@ -18,28 +18,23 @@
 
 import sys, os
 import subprocess
+import threading
+import queue
+from collections import OrderedDict
 
-import bpy
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+THUMB_SIZE = 300
+
+# answer prefix of server mode workers, the rest of their output is ignored
+REPLY_PREFIX = "NETRENDER_THUMB:"
 
 def generate(filename, external=True):
     if external:
-        process = subprocess.Popen(
-            [bpy.app.binary_path,
-             "-b",
-             "-y",
-             "-noaudio",
-             "-P", __file__,
-             "--",
-             filename,
-             ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            )
-        while process.poll() is None:
-            process.stdout.read(1024) # empty buffer to be sure
-        process.stdout.read()
-        
-        return _thumbname(filename)
+        return service().generate(filename)
     else:
         return _internal(filename)
 
@@ -47,11 +42,18 @@ def _thumbname(filename):
     root = os.path.splitext(filename)[0]
     return root + ".jpg"
 
+def _uptodate(filename):
+    # thumbnail exists and is not older than the result
+    try:
+        return os.path.getmtime(_thumbname(filename)) >= os.path.getmtime(filename)
+    except OSError:
+        return False
+
 def _internal(filename):
     imagename = os.path.split(filename)[1]
     thumbname = _thumbname(filename)
 
-    if os.path.exists(thumbname):
+    if _uptodate(filename):
         return thumbname
 
     if bpy:
@@ -64,28 +66,219 @@ def _internal(filename):
             img = bpy.data.images[imagename]
             bpy.data.images.remove(img)
 
-        bpy.ops.image.open(filepath=filename)
-        img = bpy.data.images[imagename]
-            
+        try:
+            img = bpy.data.images.load(filename)
+        except RuntimeError as exp:
+            print("Error while generating thumbnail")
+            print(exp)
+            return None
+
+        # downsample in process, keeping aspect ratio
+        width, height = img.size
+        if width > THUMB_SIZE or height > THUMB_SIZE:
+            factor = THUMB_SIZE / max(width, height)
+            img.scale(max(1, round(width * factor)), max(1, round(height * factor)))
+
         img.save_render(thumbname, scene=scene)
         
         img.user_clear()
         bpy.data.images.remove(img)
 
+        return thumbname
+
+    return None
+
+def _server():
+    # long lived worker, one result filename per line on stdin, answer the thumbnail path
+    for line in sys.stdin:
+        filename = line.rstrip("\n")
+        if not filename:
+            continue
         try:
-            process = subprocess.Popen(["convert", thumbname, "-resize", "300x300", thumbname])
-            process.wait()
-            return thumbname
+            thumbname = _internal(filename)
         except Exception as exp:
             print("Error while generating thumbnail")
             print(exp)
+            thumbname = None
+        sys.stdout.write(REPLY_PREFIX + (thumbname or "") + "\n")
+        sys.stdout.flush()
 
-    return None
+class ThumbnailWorker:
+    def __init__(self):
+        self.process = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            [bpy.app.binary_path,
+             "-b",
+             "-y",
+             "-noaudio",
+             "-P", __file__,
+             "--",
+             "--server",
+             ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            )
+
+    def stop(self):
+        if self.process:
+            try:
+                self.process.stdin.close()
+                self.process.wait()
+            except (OSError, ValueError):
+                pass
+            self.process = None
+
+    def generate(self, filename):
+        for attempt in range(2):
+            try:
+                if self.process is None or self.process.poll() is not None:
+                    self.start()
+                self.process.stdin.write(filename + "\n")
+                self.process.stdin.flush()
+                for line in self.process.stdout:
+                    if line.startswith(REPLY_PREFIX):
+                        return line[len(REPLY_PREFIX):].rstrip("\n") or None
+            except (OSError, ValueError):
+                pass
+            # worker couldn't start or died, restart it once
+            self.stop()
+        return None
+
+class ThumbnailService:
+    """
+    Thumbnails from render results, made by a pool of long lived background Blender workers
+    and kept in a size bounded LRU in memory, keyed by result path and modification time.
+    Thumbnails are also stored next to the results on disk, where they are reused while newer than the result.
+    """
+    def __init__(self, workers=2, cache_size=32 * 1024 * 1024):
+        self.cache = OrderedDict() # (result path, mtime) -> jpeg data
+        self.cache_size = cache_size
+        self.cache_used = 0
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.pending = {} # result path -> event set when its thumbnail is done
+        self.uploaded = set() # result paths which thumbnail was uploaded before the result itself
+        self.workers = [ThumbnailWorker() for i in range(workers)]
+        self.threads = []
+
+        for worker in self.workers:
+            thread = threading.Thread(target=self._run, args=(worker,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _run(self, worker):
+        while True:
+            filename = self.jobs.get()
+            if filename is None:
+                worker.stop()
+                break
+            try:
+                if not _uptodate(filename):
+                    worker.generate(filename)
+            finally:
+                with self.lock:
+                    event = self.pending.pop(filename)
+                event.set()
+
+    def _cacheAdd(self, key, data):
+        with self.lock:
+            if key in self.cache:
+                return
+            self.cache[key] = data
+            self.cache_used += len(data)
+            while self.cache_used > self.cache_size and len(self.cache) > 1:
+                _key, old_data = self.cache.popitem(last=False)
+                self.cache_used -= len(old_data)
+
+    def request(self, filename):
+        """Queue thumbnail generation, returns an event set when done"""
+        with self.lock:
+            event = self.pending.get(filename)
+            if event is None:
+                event = self.pending[filename] = threading.Event()
+                self.jobs.put(filename)
+        return event
+
+    def generate(self, filename):
+        """Return the thumbnail path for a result (None on failure), generating it if needed"""
+        if not _uptodate(filename):
+            self.request(filename).wait()
+        return _thumbname(filename) if _uptodate(filename) else None
+
+    def get(self, filename):
+        """Return the jpeg data of the thumbnail for a result, None on failure"""
+        try:
+            key = (filename, os.path.getmtime(filename))
+        except OSError:
+            return None
+
+        with self.lock:
+            data = self.cache.get(key)
+            if data is not None:
+                self.cache.move_to_end(key)
+                return data
+
+        thumbname = self.generate(filename)
+        if thumbname is None:
+            return None
+
+        with open(thumbname, 'rb') as f:
+            data = f.read()
+        self._cacheAdd(key, data)
+        return data
+
+    def upload(self, filename, data):
+        """Store a thumbnail made elsewhere (slaves) for a result which will be received later"""
+        with open(_thumbname(filename), 'wb') as f:
+            f.write(data)
+        with self.lock:
+            self.uploaded.add(filename)
+
+    def resultUpdated(self, filename):
+        """A new result was written, reuse its uploaded thumbnail or generate one in the background"""
+        with self.lock:
+            uploaded = filename in self.uploaded
+            self.uploaded.discard(filename)
+
+        if uploaded:
+            # thumbnail was written before the result, mark it as up to date
+            try:
+                os.utime(_thumbname(filename))
+                return
+            except OSError:
+                pass
+
+        self.request(filename)
+
+    def stop(self):
+        for thread in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        with self.lock:
+            self.cache.clear()
+            self.cache_used = 0
+
+_service = None
+
+def service():
+    global _service
+    if _service is None:
+        _service = ThumbnailService()
+    return _service
 
 if __name__ == "__main__":
     try:
         start = sys.argv.index("--") + 1
     except ValueError:
         start = 0
-    for filename in sys.argv[start:]:
-        generate(filename, external=False)
+    if sys.argv[start:] == ["--server"]:
+        _server()
+    else:
+        for filename in sys.argv[start:]:
+            generate(filename, external=False)
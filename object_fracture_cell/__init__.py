@@ -284,6 +284,14 @@ class FractureCell(Operator):
             default=(1.0, 1.0, 1.0),
             )
 
+    processes = IntProperty(
+            name="Processes",
+            description=("Number of worker processes used to calculate cells, "
+                         "1 to calculate them in Blender's process"),
+            min=1, max=64,
+            default=1,
+            )
+
     # -------------------------------------------------------------------------
     # Recursion
 
@@ -481,6 +489,8 @@ class FractureCell(Operator):
         rowsub.prop(self, "source_noise")
         rowsub = col.row()
         rowsub.prop(self, "cell_scale")
+        rowsub = col.row()
+        rowsub.prop(self, "processes")
 
         box = layout.box()
         col = box.column()
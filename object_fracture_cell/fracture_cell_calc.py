@@ -21,56 +21,77 @@
 # Script copyright (C) Blender Foundation 2012
 
 
-def points_as_bmesh_cells(verts,
-                          points,
-                          points_scale=None,
-                          margin_bounds=0.05,
-                          margin_cell=0.0):
-    from math import sqrt
-    import mathutils
-    from mathutils import Vector
+# number of planes added between calls to 'points_in_planes',
+# clipping is the expensive part so we avoid running it per plane.
+CELL_PLANE_BATCH = 8
+# initial number of neighbours requested from the KD-tree,
+# doubled each time a cell needs more.
+CELL_NEIGHBOUR_INIT = 16
 
-    cells = []
 
-    points_sorted_current = [p for p in points]
-    plane_indices = []
-    vertices = []
+def _points_kdtree(points):
+    from mathutils.kdtree import KDTree
 
-    if points_scale is not None:
-        points_scale = tuple(points_scale)
-    if points_scale == (1.0, 1.0, 1.0):
-        points_scale = None
+    kd = KDTree(len(points))
+    for i, p in enumerate(points):
+        kd.insert(p, i)
+    kd.balance()
+    return kd
 
-    # there are many ways we could get planes - convex hull for eg
-    # but it ends up fastest if we just use bounding box
-    if 1:
-        xa = [v[0] for v in verts]
-        ya = [v[1] for v in verts]
-        za = [v[2] for v in verts]
 
-        xmin, xmax = min(xa) - margin_bounds, max(xa) + margin_bounds
-        ymin, ymax = min(ya) - margin_bounds, max(ya) + margin_bounds
-        zmin, zmax = min(za) - margin_bounds, max(za) + margin_bounds
-        convexPlanes = [
-            Vector((+1.0, 0.0, 0.0, -xmax)),
-            Vector((-1.0, 0.0, 0.0, +xmin)),
-            Vector((0.0, +1.0, 0.0, -ymax)),
-            Vector((0.0, -1.0, 0.0, +ymin)),
-            Vector((0.0, 0.0, +1.0, -zmax)),
-            Vector((0.0, 0.0, -1.0, +zmin)),
-            ]
+def _cell_planes_clip(planes):
+    import mathutils
 
-    for i, point_cell_current in enumerate(points):
-        planes = [None] * len(convexPlanes)
-        for j in range(len(convexPlanes)):
-            planes[j] = convexPlanes[j].copy()
-            planes[j][3] += planes[j].xyz.dot(point_cell_current)
-        distance_max = 10000000000.0  # a big value!
+    vertices, plane_indices = mathutils.geometry.points_in_planes(planes)
+    if vertices and len(plane_indices) != len(planes):
+        planes[:] = [planes[k] for k in plane_indices]
+    return vertices
 
-        points_sorted_current.sort(key=lambda p: (p - point_cell_current).length_squared)
 
-        for j in range(1, len(points)):
-            normal = points_sorted_current[j] - point_cell_current
+def _cell_radius_max(vertices):
+    from math import sqrt
+
+    # for comparisons use length_squared and delay
+    # converting to a real length until the end.
+    distance_max = 0.0
+    for v in vertices:
+        distance = v.length_squared
+        if distance_max < distance:
+            distance_max = distance
+    return sqrt(distance_max) * 2.0  # make real length
+
+
+def _point_cell_vertices(kd, points_len, point_cell_current, convexPlanes,
+                         points_scale, margin_cell):
+    """
+    Return the vertices of a single cell (relative to its point),
+    an empty list when the cell is clipped away entirely.
+    """
+    planes = [None] * len(convexPlanes)
+    for j in range(len(convexPlanes)):
+        planes[j] = convexPlanes[j].copy()
+        planes[j][3] += planes[j].xyz.dot(point_cell_current)
+    distance_max = 10000000000.0  # a big value!
+
+    vertices = []
+    planes_pending = 0
+
+    # expand the neighbourhood nearest first, the first neighbour is
+    # the point its self. Stop once a neighbour is further than twice the
+    # cell radius since it can't clip the cell any further.
+    # equidistant neighbours aren't returned in a stable order between
+    # queries, so keep track of the ones already used rather than positions.
+    k = min(points_len, CELL_NEIGHBOUR_INIT)
+    neighbours = kd.find_n(point_cell_current, k)
+    indices_done = {neighbours[0][1]}
+    done = False
+    while not done:
+        for co, index, _dist in neighbours:
+            if index in indices_done:
+                continue
+            indices_done.add(index)
+
+            normal = co - point_cell_current
             nlength = normal.length
 
             if points_scale is not None:
@@ -87,34 +108,141 @@ def points_as_bmesh_cells(verts,
                 normal = normal_alt
 
             if nlength > distance_max:
+                done = True
                 break
 
             plane = normal.normalized()
             plane.resize_4d()
             plane[3] = (-nlength / 2.0) + margin_cell
             planes.append(plane)
+            planes_pending += 1
+
+            if planes_pending == CELL_PLANE_BATCH:
+                planes_pending = 0
+                vertices = _cell_planes_clip(planes)
+                if len(vertices) == 0:
+                    return vertices
+                distance_max = _cell_radius_max(vertices)
+
+        if k == points_len:
+            done = True
+        if not done:
+            k = min(points_len, k * 2)
+            neighbours = kd.find_n(point_cell_current, k)
+
+    if planes_pending:
+        vertices = _cell_planes_clip(planes)
+
+    return vertices
+
+
+# state shared with forked worker processes (see 'map_fork').
+_fork_shared = None
 
-            vertices[:], plane_indices[:] = mathutils.geometry.points_in_planes(planes)
-            if len(vertices) == 0:
-                break
 
-            if len(plane_indices) != len(planes):
-                planes[:] = [planes[k] for k in plane_indices]
+def _fork_worker(args):
+    func, index_range = args
+    return func(_fork_shared, index_range)
 
-            # for comparisons use length_squared and delay
-            # converting to a real length until the end.
-            distance_max = 10000000000.0  # a big value!
-            for v in vertices:
-                distance = v.length_squared
-                if distance_max < distance:
-                    distance_max = distance
-            distance_max = sqrt(distance_max)  # make real length
-            distance_max *= 2.0
 
+def map_fork(func, shared, count, processes):
+    """
+    Run ``func(shared, index_range)`` over ``range(count)`` split into chunks
+    in worker processes, returning the concatenated results.
+
+    This relies on 'fork' so workers inherit the already imported Blender
+    modules and ``shared`` (which doesn't need to be picklable),
+    returns None when this isn't supported.
+    """
+    import multiprocessing
+    global _fork_shared
+
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+
+    ctx = multiprocessing.get_context("fork")
+    chunk = max(1, (count + (processes * 4) - 1) // (processes * 4))
+    ranges = [(func, range(i, min(i + chunk, count)))
+              for i in range(0, count, chunk)]
+
+    _fork_shared = shared
+    try:
+        with ctx.Pool(processes) as pool:
+            results = pool.map(_fork_worker, ranges)
+    finally:
+        _fork_shared = None
+
+    return [item for result in results for item in result]
+
+
+def _points_cells_worker(shared, index_range):
+    kd, points, convexPlanes, points_scale, margin_cell = shared
+    points_len = len(points)
+    # 'mathutils.Vector' can't be pickled, pass tuples back.
+    return [
+        (i, [v.to_tuple() for v in
+             _point_cell_vertices(kd, points_len, points[i], convexPlanes,
+                                  points_scale, margin_cell)])
+        for i in index_range]
+
+
+def points_as_bmesh_cells(verts,
+                          points,
+                          points_scale=None,
+                          margin_bounds=0.05,
+                          margin_cell=0.0,
+                          processes=1):
+    from mathutils import Vector
+
+    cells = []
+
+    if points_scale is not None:
+        points_scale = tuple(points_scale)
+    if points_scale == (1.0, 1.0, 1.0):
+        points_scale = None
+
+    # there are many ways we could get planes - convex hull for eg
+    # but it ends up fastest if we just use bounding box
+    if 1:
+        xa = [v[0] for v in verts]
+        ya = [v[1] for v in verts]
+        za = [v[2] for v in verts]
+
+        xmin, xmax = min(xa) - margin_bounds, max(xa) + margin_bounds
+        ymin, ymax = min(ya) - margin_bounds, max(ya) + margin_bounds
+        zmin, zmax = min(za) - margin_bounds, max(za) + margin_bounds
+        convexPlanes = [
+            Vector((+1.0, 0.0, 0.0, -xmax)),
+            Vector((-1.0, 0.0, 0.0, +xmin)),
+            Vector((0.0, +1.0, 0.0, -ymax)),
+            Vector((0.0, -1.0, 0.0, +ymin)),
+            Vector((0.0, 0.0, +1.0, -zmax)),
+            Vector((0.0, 0.0, -1.0, +zmin)),
+            ]
+
+    points = [Vector(p) for p in points]
+    if not points:
+        return cells
+
+    kd = _points_kdtree(points)
+
+    if processes > 1 and len(points) > processes:
+        results = map_fork(_points_cells_worker,
+                           (kd, points, convexPlanes, points_scale,
+                            margin_cell),
+                           len(points), processes)
+        if results is not None:
+            return [(points[i], [Vector(v) for v in vertices])
+                    for i, vertices in results if vertices]
+
+    points_len = len(points)
+    for point_cell_current in points:
+        vertices = _point_cell_vertices(kd, points_len, point_cell_current,
+                                        convexPlanes, points_scale,
+                                        margin_cell)
         if len(vertices) == 0:
             continue
 
-        cells.append((point_cell_current, vertices[:]))
-        del vertices[:]
+        cells.append((point_cell_current, vertices))
 
     return cells
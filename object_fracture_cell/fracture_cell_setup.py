@@ -121,6 +121,135 @@ def _points_from_object(obj, source):
     return points
 
 
+# convex hull mesh data per fracture, keyed by everything the hulls depend on
+# so re-running with different material/data options skips the calculation.
+_cell_mesh_cache = {}
+_cell_mesh_cache_order = []
+CELL_MESH_CACHE_MAX = 4
+
+
+def _cell_mesh_data(cell_points, clean):
+    """
+    Return the convex hull of a cell as (verts, faces) tuples,
+    this only uses bmesh so it can run in worker processes.
+    """
+    from mathutils import Vector
+
+    # create the convex hulls
+    bm = bmesh.new()
+
+    # WORKAROUND FOR CONVEX HULL BUG/LIMIT
+    # XXX small noise
+    import random
+    def R():
+        return (random.random() - 0.5) * 0.001
+    # XXX small noise
+
+    for co in cell_points:
+        co = Vector(co)
+
+        # XXX small noise
+        co.x += R()
+        co.y += R()
+        co.z += R()
+        # XXX small noise
+
+        bm.verts.new(co)
+
+    bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.005)
+    try:
+        bmesh.ops.convex_hull(bm, input=bm.verts)
+    except RuntimeError:
+        import traceback
+        traceback.print_exc()
+
+    if clean:
+        bm.normal_update()
+        try:
+            bmesh.ops.dissolve_limit(bm, verts=bm.verts, angle_limit=0.001)
+        except RuntimeError:
+            import traceback
+            traceback.print_exc()
+
+    bm.verts.index_update()
+    verts = tuple(v.co.to_tuple() for v in bm.verts)
+    faces = tuple(tuple(v.index for v in f.verts) for f in bm.faces)
+    bm.free()
+
+    return verts, faces
+
+
+def _cell_mesh_worker(shared, index_range):
+    cells, clean = shared
+    return [_cell_mesh_data(cells[i][1], clean) for i in index_range]
+
+
+def _cell_meshes_calc(verts, points, cell_scale, margin, clean, processes):
+    from . import fracture_cell_calc
+
+    key = (hash(tuple(v.to_tuple() for v in verts)),
+           tuple(p.to_tuple() for p in points),
+           tuple(cell_scale), margin, clean)
+    cell_meshes = _cell_mesh_cache.get(key)
+    if cell_meshes is not None:
+        return cell_meshes
+
+    cells = fracture_cell_calc.points_as_bmesh_cells(verts,
+                                                     points,
+                                                     cell_scale,
+                                                     margin_cell=margin,
+                                                     processes=processes)
+
+    cells = [(center_point.to_tuple(), tuple(v.to_tuple() for v in cell_points))
+             for center_point, cell_points in cells]
+
+    cell_meshes = None
+    if processes > 1 and len(cells) > processes:
+        cell_meshes = fracture_cell_calc.map_fork(_cell_mesh_worker,
+                                                  (cells, clean),
+                                                  len(cells), processes)
+    if cell_meshes is None:
+        cell_meshes = [_cell_mesh_data(cell_points, clean)
+                       for center_point, cell_points in cells]
+
+    cell_meshes = [(center_point, verts, faces)
+                   for (center_point, _), (verts, faces) in zip(cells, cell_meshes)]
+
+    _cell_mesh_cache[key] = cell_meshes
+    _cell_mesh_cache_order.append(key)
+    while len(_cell_mesh_cache_order) > CELL_MESH_CACHE_MAX:
+        del _cell_mesh_cache[_cell_mesh_cache_order.pop(0)]
+
+    return cell_meshes
+
+
+def _cell_mesh_from_data(name, verts, faces, use_smooth_faces, material_index):
+    mesh = bpy.data.meshes.new(name=name)
+
+    mesh.vertices.add(len(verts))
+    mesh.vertices.foreach_set("co", [c for co in verts for c in co])
+
+    loop_total = [len(f) for f in faces]
+    mesh.loops.add(sum(loop_total))
+    mesh.loops.foreach_set("vertex_index", [i for f in faces for i in f])
+
+    mesh.polygons.add(len(faces))
+    loop_start = [0] * len(faces)
+    for i in range(1, len(faces)):
+        loop_start[i] = loop_start[i - 1] + loop_total[i - 1]
+    mesh.polygons.foreach_set("loop_start", loop_start)
+    mesh.polygons.foreach_set("loop_total", loop_total)
+
+    if use_smooth_faces:
+        mesh.polygons.foreach_set("use_smooth", [True] * len(faces))
+
+    if material_index != 0:
+        mesh.polygons.foreach_set("material_index", [material_index] * len(faces))
+
+    mesh.update(calc_edges=True)
+    return mesh
+
+
 def cell_fracture_objects(scene, obj,
                           source={'PARTICLE_OWN'},
                           source_limit=0,
@@ -134,10 +263,9 @@ def cell_fracture_objects(scene, obj,
                           material_index=0,
                           use_debug_redraw=False,
                           cell_scale=(1.0, 1.0, 1.0),
+                          processes=1,
                           ):
 
-    from . import fracture_cell_calc
-
     # -------------------------------------------------------------------------
     # GET POINTS
 
@@ -194,73 +322,22 @@ def cell_fracture_objects(scene, obj,
     matrix = obj.matrix_world.copy()
     verts = [matrix * v.co for v in mesh.vertices]
 
-    cells = fracture_cell_calc.points_as_bmesh_cells(verts,
-                                                     points,
-                                                     cell_scale,
-                                                     margin_cell=margin)
-
     # some hacks here :S
     cell_name = obj.name + "_cell"
 
     objects = []
 
-    for center_point, cell_points in cells:
-
-        # ---------------------------------------------------------------------
-        # BMESH
-
-        # create the convex hulls
-        bm = bmesh.new()
-
-        # WORKAROUND FOR CONVEX HULL BUG/LIMIT
-        # XXX small noise
-        import random
-        def R():
-            return (random.random() - 0.5) * 0.001
-        # XXX small noise
-
-        for i, co in enumerate(cell_points):
-
-            # XXX small noise
-            co.x += R()
-            co.y += R()
-            co.z += R()
-            # XXX small noise
-
-            bm_vert = bm.verts.new(co)
-
-        import mathutils
-        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.005)
-        try:
-            bmesh.ops.convex_hull(bm, input=bm.verts)
-        except RuntimeError:
-            import traceback
-            traceback.print_exc()
-
-        if clean:
-            bm.normal_update()
-            try:
-                bmesh.ops.dissolve_limit(bm, verts=bm.verts, angle_limit=0.001)
-            except RuntimeError:
-                import traceback
-                traceback.print_exc()
-
-        if use_smooth_faces:
-            for bm_face in bm.faces:
-                bm_face.smooth = True
-
-        if material_index != 0:
-            for bm_face in bm.faces:
-                bm_face.material_index = material_index
+    # cells and their convex hulls are calculated up front (optionally in
+    # worker processes), only datablock creation needs to happen here.
+    cell_meshes = _cell_meshes_calc(verts, points, cell_scale, margin, clean,
+                                    processes)
 
+    for center_point, cell_verts, cell_faces in cell_meshes:
 
         # ---------------------------------------------------------------------
         # MESH
-        mesh_dst = bpy.data.meshes.new(name=cell_name)
-
-        bm.to_mesh(mesh_dst)
-        bm.free()
-        del bm
+        mesh_dst = _cell_mesh_from_data(cell_name, cell_verts, cell_faces,
+                                        use_smooth_faces, material_index)
 
         if use_data_match:
             # match materials and data layers so boolean displays them
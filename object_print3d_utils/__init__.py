@@ -34,6 +34,7 @@ bl_info = {
 if "bpy" in locals():
     import importlib
     importlib.reload(ui)
+    importlib.reload(cache)
     importlib.reload(operators)
 else:
     import bpy
@@ -49,7 +50,9 @@ else:
                            AddonPreferences,
                            PropertyGroup,
                            )
+    from bpy.app.handlers import persistent
     from . import ui
+    from . import cache
     from . import operators
 
 import math
@@ -146,15 +149,28 @@ classes = (
     )
 
 
+# cached check results are keyed by object name,
+# don't let them leak into another file.
+@persistent
+def load_post_handler(dummy):
+    cache.clear()
+
+
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
 
     bpy.types.Scene.print_3d = PointerProperty(type=Print3DSettings)
 
+    bpy.app.handlers.load_post.append(load_post_handler)
+
 
 def unregister():
+    bpy.app.handlers.load_post.remove(load_post_handler)
+
     for cls in classes:
         bpy.utils.unregister_class(cls)
 
     del bpy.types.Scene.print_3d
+
+    cache.clear()
@@ -0,0 +1,321 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+# Headless batch validation, runs the print3d checks on a directory of files
+# and writes a JSON report, eg:
+#
+#   blender --background --factory-startup \
+#       --python object_print3d_utils/batch.py -- \
+#       --jobs 4 --output report.json /path/to/parts
+#
+# Files are split between worker Blender processes, each worker
+# imports its files one at a time and runs every check on each mesh.
+#
+# The exit code is 1 when any check reports elements, 2 on errors.
+
+import os
+import sys
+
+EXTENSIONS = {
+    ".stl": ("import_mesh.stl", "io_mesh_stl"),
+    ".obj": ("import_scene.obj", "io_scene_obj"),
+    ".ply": ("import_mesh.ply", "io_mesh_ply"),
+    }
+
+# scene.print_3d settings which can be set from the command line.
+SETTINGS = (
+    "thickness_min",
+    "threshold_zero",
+    "angle_distort",
+    "angle_sharp",
+    "angle_overhang",
+    )
+
+
+def files_from_paths(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    if os.path.splitext(filename)[1].lower() in EXTENSIONS:
+                        files.append(os.path.join(dirpath, filename))
+        else:
+            files.append(path)
+    return files
+
+
+# ----------------------------------------------------------------------------
+# Worker (runs inside Blender)
+
+def _ensure_addons(module_names):
+    import bpy
+    import addon_utils
+
+    if not hasattr(bpy.types.Scene, "print_3d"):
+        addon_utils.enable(_package_name(), default_set=False)
+
+    for module_name in module_names:
+        addon_utils.enable(module_name, default_set=False)
+
+
+def _package_name():
+    # this file also runs as a script, so don't rely on '__package__'.
+    return os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _import_file(filepath):
+    import bpy
+
+    ext = os.path.splitext(filepath)[1].lower()
+    op_id, module_name = EXTENSIONS[ext]
+    op_mod, op_name = op_id.split(".")
+    op = getattr(getattr(bpy.ops, op_mod), op_name)
+    if "FINISHED" not in op(filepath=filepath):
+        raise RuntimeError("Import failed")
+
+
+def _scene_clear(scene):
+    import bpy
+
+    for obj in scene.objects[:]:
+        scene.objects.unlink(obj)
+        bpy.data.objects.remove(obj)
+    for me in bpy.data.meshes[:]:
+        if not me.users:
+            bpy.data.meshes.remove(me)
+
+
+def _check_id(cls):
+    return cls.bl_idname.rsplit("_", 1)[-1]
+
+
+def check_object(obj, check_cls):
+    """
+    Run checks on ``obj``, returns a dict of check results
+    with timings and offending element indices.
+    """
+    import time
+    import bmesh
+
+    elem_types = {
+        bmesh.types.BMVert: 'VERT',
+        bmesh.types.BMEdge: 'EDGE',
+        bmesh.types.BMFace: 'FACE',
+        }
+
+    checks = {}
+    for cls in check_cls:
+        info = []
+        time_start = time.time()
+        cls.main_check(obj, info)
+        time_check = time.time() - time_start
+
+        results = []
+        for text, data in info:
+            if data:
+                elem_type, indices = data
+                results.append({
+                    "label": text,
+                    "type": elem_types.get(elem_type, elem_type.__name__),
+                    "indices": list(indices),
+                    })
+            else:
+                results.append({"label": text})
+
+        checks[_check_id(cls)] = {
+            "time": time_check,
+            "results": results,
+            }
+    return checks
+
+
+def check_files(files, settings, check_ids=None):
+    import time
+    import bpy
+
+    _ensure_addons({EXTENSIONS[os.path.splitext(f)[1].lower()][1]
+                    for f in files
+                    if os.path.splitext(f)[1].lower() in EXTENSIONS})
+
+    package = sys.modules[_package_name()]
+    check_cls = package.operators.Print3DCheckAll.check_cls
+    if check_ids:
+        check_cls = [cls for cls in check_cls if _check_id(cls) in check_ids]
+
+    scene = bpy.context.scene
+    print_3d = scene.print_3d
+    for key, value in settings.items():
+        setattr(print_3d, key, value)
+
+    report_files = []
+    for filepath in files:
+        report_file = {"path": filepath, "objects": []}
+        time_start = time.time()
+        _scene_clear(scene)
+        try:
+            _import_file(filepath)
+            for obj in scene.objects:
+                if obj.type != 'MESH':
+                    continue
+                report_file["objects"].append({
+                    "name": obj.name,
+                    "checks": check_object(obj, check_cls),
+                    })
+        except Exception as ex:
+            import traceback
+            traceback.print_exc()
+            report_file["error"] = str(ex)
+        report_file["time"] = time.time() - time_start
+        report_files.append(report_file)
+
+    _scene_clear(scene)
+    return report_files
+
+
+# ----------------------------------------------------------------------------
+# Main (runs in Blender or any Python)
+
+def run_workers(blender_bin, files, jobs, args_extra):
+    import json
+    import subprocess
+    import tempfile
+
+    if not files:
+        return []
+
+    jobs = max(1, min(jobs, len(files)))
+    procs = []
+    for i in range(jobs):
+        fd, report_tmp = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        cmd = [blender_bin, "--background", "--factory-startup",
+               "--python", os.path.abspath(__file__), "--",
+               "--worker", report_tmp] + args_extra + files[i::jobs]
+        procs.append((subprocess.Popen(cmd), report_tmp, files[i::jobs]))
+
+    report_files = []
+    for proc, report_tmp, files_job in procs:
+        proc.wait()
+        try:
+            with open(report_tmp, "r", encoding="utf-8") as fh:
+                report_files.extend(json.load(fh))
+        except ValueError:
+            report_files.extend({"path": f, "objects": [],
+                                 "error": "Worker failed (%d)" % proc.returncode}
+                                for f in files_job)
+        os.remove(report_tmp)
+
+    # keep the input order, workers take interleaved files.
+    order = {f: i for i, f in enumerate(files)}
+    report_files.sort(key=lambda r: order.get(r["path"], len(order)))
+    return report_files
+
+
+def report_status(report_files):
+    """
+    Return 0 when all files passed, 1 for check failures, 2 for errors.
+    """
+    status = 0
+    for report_file in report_files:
+        if "error" in report_file:
+            return 2
+        for report_obj in report_file["objects"]:
+            for check in report_obj["checks"].values():
+                if any(r.get("indices") for r in check["results"]):
+                    status = 1
+    return status
+
+
+def main(argv):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(
+            description="Run 3D print checks on mesh files")
+    parser.add_argument("paths", nargs="+",
+                        help="Files or directories (STL/OBJ/PLY)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="JSON report path, '-' for stdout")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Number of worker Blender processes")
+    parser.add_argument("--blender", default=None,
+                        help="Blender binary (defaults to the running one)")
+    parser.add_argument("--checks", default=None,
+                        help="Comma separated checks to run "
+                             "(solid,intersect,degenerate,distort,"
+                             "thick,sharp,overhang)")
+    for key in SETTINGS:
+        parser.add_argument("--" + key.replace("_", "-"),
+                            dest=key, type=float, default=None)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    settings = {key: getattr(args, key) for key in SETTINGS
+                if getattr(args, key) is not None}
+    check_ids = set(args.checks.split(",")) if args.checks else None
+
+    if args.worker:
+        report_files = check_files(args.paths, settings, check_ids)
+        with open(args.worker, "w", encoding="utf-8") as fh:
+            json.dump(report_files, fh)
+        return 0
+
+    files = files_from_paths(args.paths)
+
+    blender_bin = args.blender
+    if blender_bin is None:
+        try:
+            import bpy
+        except ImportError:
+            parser.error("--blender is required outside of Blender")
+        blender_bin = bpy.app.binary_path
+
+    args_extra = []
+    for key, value in sorted(settings.items()):
+        args_extra += ["--" + key.replace("_", "-"), repr(value)]
+    if args.checks:
+        args_extra += ["--checks", args.checks]
+
+    report_files = run_workers(blender_bin, files, args.jobs, args_extra)
+    report = {
+        "settings": settings,
+        "files": report_files,
+        }
+    status = report_status(report_files)
+    report["status"] = status
+
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=1)
+
+    return status
+
+
+if __name__ == "__main__":
+    try:
+        argv = sys.argv[sys.argv.index("--") + 1:]
+    except ValueError:
+        argv = sys.argv[1:]
+    sys.exit(main(argv))
@@ -0,0 +1,223 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+# <pep8-80 compliant>
+
+# Cache check results per object.
+#
+# Results are stored with the check settings and the vertex coordinates
+# they were calculated from. When only coordinates change (the topology and
+# object matrix are the same) checks which support it only re-check
+# the elements the edit could have changed, see 'check_dirty':
+#
+# - 'TOPOLOGY': results only depend on topology, always reused.
+# - 'LOCAL': elements using moved vertices are re-checked.
+# - 'BOUNDS': faces overlapping the bounds of the edit are re-checked,
+#   grown by the 'check_margin' setting.
+
+import array
+
+# re-check everything when more than this fraction of faces are dirty.
+DIRTY_LIMIT = 0.25
+
+_data = {}
+
+
+def clear():
+    _data.clear()
+
+
+class _MeshState:
+    __slots__ = (
+        "topology",
+        "coords",
+        "loop_verts",
+        "loop_edges",
+        "poly_loops",
+        "edge_verts",
+        "scale_min",
+        )
+
+    def __init__(self, obj):
+        me = obj.data
+        if obj.mode == 'EDIT':
+            obj.update_from_editmode()
+
+        def foreach_get(seq, attr, typecode, size=1):
+            values = array.array(typecode, (0,)) * (len(seq) * size)
+            seq.foreach_get(attr, values)
+            return values
+
+        self.coords = foreach_get(me.vertices, "co", 'f', 3)
+        self.loop_verts = foreach_get(me.loops, "vertex_index", 'i')
+        self.loop_edges = foreach_get(me.loops, "edge_index", 'i')
+        self.edge_verts = foreach_get(me.edges, "vertices", 'i', 2)
+        loop_start = foreach_get(me.polygons, "loop_start", 'i')
+        loop_total = foreach_get(me.polygons, "loop_total", 'i')
+        self.poly_loops = [range(i, i + n)
+                           for i, n in zip(loop_start, loop_total)]
+
+        matrix = obj.matrix_world
+        self.scale_min = min(abs(s) for s in matrix.to_scale()) or 1.0
+        self.topology = hash((
+                len(self.coords),
+                self.loop_verts.tobytes(),
+                self.edge_verts.tobytes(),
+                loop_total.tobytes(),
+                tuple(tuple(row) for row in matrix),
+                ))
+
+    def verts_moved(self, coords_old):
+        coords = self.coords
+        return {i // 3 for i in range(len(coords))
+                if coords[i] != coords_old[i]}
+
+    def faces_using(self, verts):
+        loop_verts = self.loop_verts
+        return {i for i, loops in enumerate(self.poly_loops)
+                if any(loop_verts[l] in verts for l in loops)}
+
+    def edges_using(self, verts, faces):
+        loop_edges = self.loop_edges
+        edge_verts = self.edge_verts
+        edges = {loop_edges[l] for i in faces for l in self.poly_loops[i]}
+        edges.update(i for i in range(len(edge_verts) // 2)
+                     if edge_verts[i * 2] in verts or
+                        edge_verts[i * 2 + 1] in verts)
+        return edges
+
+    def faces_in_bounds(self, faces, coords_old, margin):
+        coords = self.coords
+        loop_verts = self.loop_verts
+        poly_loops = self.poly_loops
+
+        # bounds of the dirty faces, before and after the edit.
+        co_min = [float("inf")] * 3
+        co_max = [float("-inf")] * 3
+        for i in faces:
+            for l in poly_loops[i]:
+                v = loop_verts[l] * 3
+                for co_array in (coords, coords_old):
+                    for j in range(3):
+                        co = co_array[v + j]
+                        if co < co_min[j]:
+                            co_min[j] = co
+                        if co > co_max[j]:
+                            co_max[j] = co
+        for j in range(3):
+            co_min[j] -= margin
+            co_max[j] += margin
+
+        faces_bounds = set()
+        for i, loops in enumerate(poly_loops):
+            for j in range(3):
+                values = [coords[loop_verts[l] * 3 + j] for l in loops]
+                if min(values) > co_max[j] or max(values) < co_min[j]:
+                    break
+            else:
+                faces_bounds.add(i)
+        return faces_bounds
+
+
+def _info_merge(info_old, info_new, elems_dirty):
+    info = []
+    for (text_old, data_old), (text_new, data_new) in zip(info_old, info_new):
+        if not data_new:
+            info.append((text_new, data_new))
+            continue
+        elem_type, indices_new = data_new
+        indices = set(data_old[1])
+        indices.difference_update(elems_dirty[elem_type])
+        indices.update(indices_new)
+        indices = array.array('i', sorted(indices))
+        text = "%s: %d" % (text_new.rsplit(":", 1)[0], len(indices))
+        info.append((text, (elem_type, indices)))
+    return info
+
+
+def _elems_dirty(cls, state, coords_old, verts):
+    import bmesh
+    import bpy
+
+    faces = state.faces_using(verts)
+    if len(faces) > len(state.poly_loops) * DIRTY_LIMIT:
+        return None
+
+    if cls.check_dirty == 'BOUNDS':
+        margin = 0.0
+        check_margin = getattr(cls, "check_margin", None)
+        if check_margin:
+            print_3d = bpy.context.scene.print_3d
+            margin = getattr(print_3d, check_margin) / state.scale_min
+        faces = state.faces_in_bounds(faces, coords_old, margin)
+        if len(faces) > len(state.poly_loops) * DIRTY_LIMIT:
+            return None
+        return {bmesh.types.BMFace: faces}
+
+    return {
+        bmesh.types.BMFace: faces,
+        bmesh.types.BMEdge: state.edges_using(verts, faces),
+        }
+
+
+def main_check(cls, obj, info):
+    """
+    Run ``cls.main_check`` using cached results where possible.
+    """
+    import bpy
+
+    print_3d = bpy.context.scene.print_3d
+    settings = tuple(getattr(print_3d, attr) for attr in cls.check_settings)
+
+    state = _MeshState(obj)
+    entry = _data.get(obj.name)
+    if entry is None or entry["topology"] != state.topology:
+        entry = _data[obj.name] = {
+            "topology": state.topology,
+            "coords": state.coords,
+            "results": {},
+            }
+    elif entry["coords"] == state.coords:
+        # share the array between results.
+        state.coords = entry["coords"]
+    else:
+        entry["coords"] = state.coords
+
+    results = entry["results"]
+    result = results.get(cls.bl_idname)
+
+    info_check = None
+    if result is not None and result[0] == settings:
+        _settings, coords_old, info_old = result
+        if coords_old is state.coords or cls.check_dirty == 'TOPOLOGY':
+            info_check = info_old
+        elif cls.check_dirty is not None:
+            verts = state.verts_moved(coords_old)
+            elems_dirty = _elems_dirty(cls, state, coords_old, verts)
+            if elems_dirty is not None:
+                info_new = []
+                cls.main_check(obj, info_new, elems_dirty=elems_dirty)
+                if len(info_new) == len(info_old):
+                    info_check = _info_merge(info_old, info_new, elems_dirty)
+
+    if info_check is None:
+        info_check = []
+        cls.main_check(obj, info_check)
+
+    results[cls.bl_idname] = (settings, state.coords, info_check)
+    info.extend(info_check)
@@ -95,17 +95,94 @@ def bmesh_calc_area(bm):
     return sum(f.calc_area() for f in bm.faces)
 
 
-def bmesh_check_self_intersect_object(obj):
+def bmesh_faces_bounds(faces):
     """
-    Check if any faces self intersect
+    Return the (min, max) bounds of faces as tuples.
+    """
+    co_min = [float("inf")] * 3
+    co_max = [float("-inf")] * 3
+    for f in faces:
+        for v in f.verts:
+            co = v.co
+            for i in range(3):
+                if co[i] < co_min[i]:
+                    co_min[i] = co[i]
+                if co[i] > co_max[i]:
+                    co_max[i] = co[i]
+    return tuple(co_min), tuple(co_max)
+
+
+def bmesh_face_in_bounds(f, co_min, co_max, margin=0.0):
+    """
+    Check if the bounds of a face overlap (co_min, co_max).
+    """
+    for i in range(3):
+        values = [v.co[i] for v in f.verts]
+        if min(values) > co_max[i] + margin:
+            return False
+        if max(values) < co_min[i] - margin:
+            return False
+    return True
 
-    returns an array of edge index values.
+
+def bmesh_check_self_intersect_object(obj, faces_dirty=None):
     """
-    import bpy
+    Check if any faces self intersect
+
+    returns an array of face index values.
 
+    When faces_dirty is a set of face indices,
+    only these faces are checked (against all others).
+    """
     if not obj.data.polygons:
         return array.array('i', ())
 
+    try:
+        from mathutils.bvhtree import BVHTree
+    except ImportError:
+        # Blender versions before BVHTree was exposed.
+        faces_error = _bmesh_check_self_intersect_object_scene(obj)
+        if faces_dirty is not None:
+            faces_error = array.array(
+                    'i', (i for i in faces_error if i in faces_dirty))
+        return faces_error
+
+    # The tree is built from the tessellated faces, indices are mapped back
+    # to the original faces, triangles sharing vertices aren't reported.
+    bm = bmesh_copy_from_object(obj, transform=False, triangulate=False)
+    tree = BVHTree.FromBMesh(bm, epsilon=0.00001)
+
+    if faces_dirty is None:
+        faces_error = {i for i_pair in tree.overlap(tree) for i in i_pair}
+    elif not faces_dirty:
+        faces_error = set()
+    else:
+        # overlap between different trees includes faces sharing vertices,
+        # skip those the same as a tree overlapping its self does.
+        bm.verts.index_update()
+        faces = [f for i, f in enumerate(bm.faces) if i in faces_dirty]
+        faces_index = [f.index for f in faces]
+        faces_verts = [{v.index for v in f.verts} for f in faces]
+        bm_faces = bm.faces[:]
+        tree_dirty = BVHTree.FromPolygons(
+                [v.co for v in bm.verts],
+                [[v.index for v in f.verts] for f in faces],
+                epsilon=0.00001)
+        faces_error = set()
+        for i, j in tree_dirty.overlap(tree):
+            if faces_index[i] == j:
+                continue
+            if faces_verts[i].isdisjoint(v.index for v in bm_faces[j].verts):
+                faces_error.add(faces_index[i])
+
+    bm.free()
+
+    return array.array('i', faces_error)
+
+
+def _bmesh_check_self_intersect_object_scene(obj):
+    import bpy
+
     # Heres what we do!
     #
     # * Take original Mesh.
@@ -191,7 +268,81 @@ def bmesh_face_points_random(f, num_points=1, margin=0.05):
         yield vecs[0] + u1 * side1 + u2 * side2
 
 
-def bmesh_check_thick_object(obj, thickness):
+def bmesh_check_thick_object(obj, thickness, faces_dirty=None):
+    """
+    Check faces are at least thickness apart from the faces behind them.
+
+    returns an array of face index values.
+
+    When faces_dirty is a set of face indices, only these faces are checked,
+    rays are cast from the faces which may hit them (or be hit by them).
+    """
+
+    try:
+        from mathutils.bvhtree import BVHTree
+    except ImportError:
+        # Blender versions before BVHTree was exposed.
+        faces_error = _bmesh_check_thick_object_scene(obj, thickness)
+        if faces_dirty is not None:
+            faces_error = array.array(
+                    'i', (i for i in faces_error if i in faces_dirty))
+        return faces_error
+
+    # Triangulate
+    bm = bmesh_copy_from_object(obj, transform=True, triangulate=False)
+    # map original faces to their index.
+    face_index_map_org = {f: i for i, f in enumerate(bm.faces)}
+
+    if faces_dirty is not None:
+        # rays can only reach 'thickness' so only faces
+        # within this distance of the dirty faces need to be cast from.
+        co_min, co_max = bmesh_faces_bounds(
+                f for f, i in face_index_map_org.items() if i in faces_dirty)
+
+    ret = bmesh.ops.triangulate(bm, faces=bm.faces)
+    face_map = ret["face_map"]
+    del ret
+
+    bm.faces.index_update()
+    tree = BVHTree.FromBMesh(bm)
+    ray_cast = tree.ray_cast
+
+    EPS_BIAS = 0.0001
+    distance = thickness - EPS_BIAS
+
+    faces_error = set()
+
+    bm_faces_new = bm.faces[:]
+
+    for f in bm_faces_new:
+        if faces_dirty is not None:
+            if not bmesh_face_in_bounds(f, co_min, co_max, thickness):
+                continue
+        no = f.normal
+        no_sta = no * EPS_BIAS
+        no_dir = -no
+        for p in bmesh_face_points_random(f, num_points=6):
+            # Cast the ray backwards
+            co, no_hit, index, dist = ray_cast(p - no_sta, no_dir, distance)
+
+            if index is not None:
+                # Add the face we hit
+                for f_iter in (f, bm_faces_new[index]):
+                    # if the face wasn't triangulated, just use existing
+                    f_org = face_map.get(f_iter, f_iter)
+                    f_org_index = face_index_map_org[f_org]
+                    faces_error.add(f_org_index)
+
+    # finished with bm
+    bm.free()
+
+    if faces_dirty is not None:
+        faces_error &= faces_dirty
+
+    return array.array('i', faces_error)
+
+
+def _bmesh_check_thick_object_scene(obj, thickness):
 
     import bpy
 
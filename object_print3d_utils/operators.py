@@ -34,6 +34,7 @@ from bpy.props import (StringProperty,
 
 from . import mesh_helpers
 from . import report
+from . import cache
 
 
 def clean_float(text):
@@ -110,11 +111,16 @@ class Print3DInfoArea(Operator):
 # ---------------
 # Geometry Checks
 
+def elems_filter(elems_enum, elems_dirty):
+    # only re-check dirty elements, see: cache.main_check
+    return ((i, ele) for i, ele in elems_enum if i in elems_dirty)
+
+
 def execute_check(self, context):
     obj = context.active_object
 
     info = []
-    self.main_check(obj, info)
+    cache.main_check(self, obj, info)
     report.update(*info)
 
     return {'FINISHED'}
@@ -125,8 +131,11 @@ class Print3DCheckSolid(Operator):
     bl_idname = "mesh.print3d_check_solid"
     bl_label = "Print3D Check Solid"
 
+    check_settings = ()
+    check_dirty = 'TOPOLOGY'
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         import array
 
         bm = mesh_helpers.bmesh_copy_from_object(obj, transform=False, triangulate=False)
@@ -153,9 +162,17 @@ class Print3DCheckIntersections(Operator):
     bl_idname = "mesh.print3d_check_intersect"
     bl_label = "Print3D Check Intersections"
 
+    check_settings = ()
+    check_dirty = 'BOUNDS'
+
     @staticmethod
-    def main_check(obj, info):
-        faces_intersect = mesh_helpers.bmesh_check_self_intersect_object(obj)
+    def main_check(obj, info, elems_dirty=None):
+        faces_dirty = None
+        if elems_dirty is not None:
+            faces_dirty = elems_dirty[bmesh.types.BMFace]
+
+        faces_intersect = mesh_helpers.bmesh_check_self_intersect_object(
+                obj, faces_dirty=faces_dirty)
         info.append(("Intersect Face: %d" % len(faces_intersect),
                     (bmesh.types.BMFace, faces_intersect)))
 
@@ -169,8 +186,11 @@ class Print3DCheckDegenerate(Operator):
     bl_idname = "mesh.print3d_check_degenerate"
     bl_label = "Print3D Check Degenerate"
 
+    check_settings = ("threshold_zero",)
+    check_dirty = 'LOCAL'
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         import array
         scene = bpy.context.scene
         print_3d = scene.print_3d
@@ -178,8 +198,14 @@ class Print3DCheckDegenerate(Operator):
 
         bm = mesh_helpers.bmesh_copy_from_object(obj, transform=False, triangulate=False)
 
-        faces_zero = array.array('i', (i for i, ele in enumerate(bm.faces) if ele.calc_area() <= threshold))
-        edges_zero = array.array('i', (i for i, ele in enumerate(bm.edges) if ele.calc_length() <= threshold))
+        faces = enumerate(bm.faces)
+        edges = enumerate(bm.edges)
+        if elems_dirty is not None:
+            faces = elems_filter(faces, elems_dirty[bmesh.types.BMFace])
+            edges = elems_filter(edges, elems_dirty[bmesh.types.BMEdge])
+
+        faces_zero = array.array('i', (i for i, ele in faces if ele.calc_area() <= threshold))
+        edges_zero = array.array('i', (i for i, ele in edges if ele.calc_length() <= threshold))
 
         info.append(("Zero Faces: %d" % len(faces_zero),
                     (bmesh.types.BMFace, faces_zero)))
@@ -198,8 +224,11 @@ class Print3DCheckDistorted(Operator):
     bl_idname = "mesh.print3d_check_distort"
     bl_label = "Print3D Check Distorted Faces"
 
+    check_settings = ("angle_distort",)
+    check_dirty = 'LOCAL'
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         import array
 
         scene = bpy.context.scene
@@ -217,7 +246,11 @@ class Print3DCheckDistorted(Operator):
         bm = mesh_helpers.bmesh_copy_from_object(obj, transform=True, triangulate=False)
         bm.normal_update()
 
-        faces_distort = array.array('i', (i for i, ele in enumerate(bm.faces) if face_is_distorted(ele)))
+        faces = enumerate(bm.faces)
+        if elems_dirty is not None:
+            faces = elems_filter(faces, elems_dirty[bmesh.types.BMFace])
+
+        faces_distort = array.array('i', (i for i, ele in faces if face_is_distorted(ele)))
 
         info.append(("Non-Flat Faces: %d" % len(faces_distort),
                     (bmesh.types.BMFace, faces_distort)))
@@ -234,12 +267,21 @@ class Print3DCheckThick(Operator):
     bl_idname = "mesh.print3d_check_thick"
     bl_label = "Print3D Check Thickness"
 
+    check_settings = ("thickness_min",)
+    check_dirty = 'BOUNDS'
+    check_margin = "thickness_min"
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         scene = bpy.context.scene
         print_3d = scene.print_3d
 
-        faces_error = mesh_helpers.bmesh_check_thick_object(obj, print_3d.thickness_min)
+        faces_dirty = None
+        if elems_dirty is not None:
+            faces_dirty = elems_dirty[bmesh.types.BMFace]
+
+        faces_error = mesh_helpers.bmesh_check_thick_object(
+                obj, print_3d.thickness_min, faces_dirty=faces_dirty)
 
         info.append(("Thin Faces: %d" % len(faces_error),
                     (bmesh.types.BMFace, faces_error)))
@@ -253,8 +295,11 @@ class Print3DCheckSharp(Operator):
     bl_idname = "mesh.print3d_check_sharp"
     bl_label = "Print3D Check Sharp"
 
+    check_settings = ("angle_sharp",)
+    check_dirty = 'LOCAL'
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         scene = bpy.context.scene
         print_3d = scene.print_3d
         angle_sharp = print_3d.angle_sharp
@@ -262,7 +307,12 @@ class Print3DCheckSharp(Operator):
         bm = mesh_helpers.bmesh_copy_from_object(obj, transform=True, triangulate=False)
         bm.normal_update()
 
-        edges_sharp = [ele.index for ele in bm.edges
+        edges = bm.edges
+        if elems_dirty is not None:
+            edges_dirty = elems_dirty[bmesh.types.BMEdge]
+            edges = [ele for ele in edges if ele.index in edges_dirty]
+
+        edges_sharp = [ele.index for ele in edges
                        if ele.is_manifold and ele.calc_face_angle_signed() > angle_sharp]
 
         info.append(("Sharp Edge: %d" % len(edges_sharp),
@@ -278,8 +328,11 @@ class Print3DCheckOverhang(Operator):
     bl_idname = "mesh.print3d_check_overhang"
     bl_label = "Print3D Check Overhang"
 
+    check_settings = ("angle_overhang",)
+    check_dirty = 'LOCAL'
+
     @staticmethod
-    def main_check(obj, info):
+    def main_check(obj, info, elems_dirty=None):
         import math
         from mathutils import Vector
 
@@ -298,7 +351,12 @@ class Print3DCheckOverhang(Operator):
         z_down_angle = z_down.angle
 
         # 4.0 ignores zero area faces
-        faces_overhang = [ele.index for ele in bm.faces
+        faces = bm.faces
+        if elems_dirty is not None:
+            faces_dirty = elems_dirty[bmesh.types.BMFace]
+            faces = [ele for ele in faces if ele.index in faces_dirty]
+
+        faces_overhang = [ele.index for ele in faces
                           if z_down_angle(ele.normal, 4.0) < angle_overhang]
 
         info.append(("Overhang Face: %d" % len(faces_overhang),
@@ -329,7 +387,7 @@ class Print3DCheckAll(Operator):
 
         info = []
         for cls in self.check_cls:
-            cls.main_check(obj, info)
+            cache.main_check(cls, obj, info)
 
         report.update(*info)
 